@@ -0,0 +1,76 @@
+"""Initial metadata tables (uploads, analyses, reports, forms, blobs)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "uploads",
+        sa.Column("id", sa.String(64), primary_key=True),
+        sa.Column("sha256", sa.String(64), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+    )
+    op.create_index("ix_uploads_sha256", "uploads", ["sha256"])
+    op.create_index("ix_uploads_created_at", "uploads", ["created_at"])
+
+    op.create_table(
+        "analyses",
+        sa.Column("id", sa.String(64), primary_key=True),
+        sa.Column("abrechnung_id", sa.String(64), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+    )
+    op.create_index("ix_analyses_created_at", "analyses", ["created_at"])
+    op.create_index(
+        "ix_analyses_abrechnung_id_created_at", "analyses", ["abrechnung_id", "created_at"]
+    )
+
+    op.create_table(
+        "reports",
+        sa.Column("id", sa.String(64), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+    )
+    op.create_index("ix_reports_created_at", "reports", ["created_at"])
+
+    op.create_table(
+        "forms",
+        sa.Column("id", sa.String(64), primary_key=True),
+        sa.Column("sha256", sa.String(64), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+    )
+    op.create_index("ix_forms_sha256", "forms", ["sha256"])
+    op.create_index("ix_forms_created_at", "forms", ["created_at"])
+
+    op.create_table(
+        "blobs",
+        sa.Column("sha256", sa.String(64), primary_key=True),
+        sa.Column("path", sa.String(1024), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("refcount", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_blobs_created_at", "blobs", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("blobs")
+    op.drop_table("forms")
+    op.drop_table("reports")
+    op.drop_table("analyses")
+    op.drop_table("uploads")
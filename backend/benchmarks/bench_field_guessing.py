@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Feld-Erkennung im Text (PDFs ohne AcroForm)
+Bisherige Regexes aus PDFExtractor.guess_fields_from_text vs. services.field_guesser auf
+adversarialen Texten bis 5 MB. Die Spalte "ms/MB" zeigt die Skalierung: bleibt sie bei
+wachsender Größe konstant, ist die Laufzeit linear.
+
+Texte:
+    formular      - realistische Formularzeilen (Unterstrich-, Klammer- und Checkbox-Felder)
+    buchstaben    - Zeilen aus Buchstaben und Leerzeichen ohne Doppelpunkt
+    einzeilig     - dasselbe als eine einzige Zeile
+    klammern      - "[" ohne schließende Klammer
+    doppelpunkte  - Doppelpunkte gefolgt von Leerraum, aber keiner Unterstrich-Linie
+
+Die bisherigen Regexes backtracken auf den adversarialen Texten quadratisch - dort werden sie
+nur bis --legacy-max Bytes gemessen.
+
+Aufruf (aus backend/):
+    python benchmarks/bench_field_guessing.py [--sizes 524288 1048576 2097152 5242880] [--repeat 3]
+"""
+import re
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.field_guesser import guess_fields, normalize_field_id
+
+
+# ============================================
+# BISHERIGE ERKENNUNG (Referenz)
+# ============================================
+
+def _legacy_type(label: str) -> str:
+    label_lower = label.lower()
+    if any(word in label_lower for word in ['datum', 'geburt', 'date', 'von', 'bis']):
+        return "date"
+    if any(word in label_lower for word in ['telefon', 'tel.', 'mobil', 'handy', 'phone']):
+        return "tel"
+    if 'mail' in label_lower:
+        return "email"
+    if 'iban' in label_lower or 'kontoverbindung' in label_lower:
+        return "iban"
+    if 'plz' in label_lower or 'postleitzahl' in label_lower:
+        return "plz"
+    if any(word in label_lower for word in ['anzahl', 'betrag', 'summe', 'höhe', 'zahl', 'nummer']):
+        return "number"
+    return "string"
+
+
+def legacy_guess(text: str) -> list:
+    fields = []
+    pattern1 = re.compile(
+        r'([A-ZÄÖÜa-zäöüß\s/()\-\.]+):\s*_{3,}|'
+        r'([A-ZÄÖÜa-zäöüß\s/()\-\.]+)\s*\[.{3,}\]'
+    )
+    for match in pattern1.finditer(text):
+        label = (match.group(1) or match.group(2) or '').strip()
+        if len(label) < 2 or len(label) > 100:
+            continue
+        fields.append({"id": normalize_field_id(label), "label": label, "type": _legacy_type(label)})
+    pattern2 = re.compile(r'[☐\[\]]\s+([A-ZÄÖÜa-zäöüß\s/()\-\.]{3,50})')
+    for match in pattern2.finditer(text):
+        label = match.group(1).strip()
+        fields.append({"id": normalize_field_id(label), "label": label, "type": "checkbox"})
+    return fields
+
+
+# ============================================
+# TEXTE
+# ============================================
+
+FORM_LINES = [
+    "Antrag auf Wohngeld - Angaben zur antragstellenden Person",
+    "Name: ______________   Vorname: ______________",
+    "Geburtsdatum: __________   Telefonnummer [____________]",
+    "Straße, Hausnummer: ____________________   PLZ: _____",
+    "Familienstand:  ☐ ledig  ☐ verheiratet  ☐ geschieden",
+    "[ ] Ich beantrage Wohngeld als Mietzuschuss",
+    "Kontoverbindung (IBAN) [______________________]",
+    "Anzahl der Haushaltsmitglieder: ___",
+]
+
+
+def _repeat(chunk: str, size: int) -> str:
+    return (chunk * (size // len(chunk) + 1))[:size]
+
+
+TEXTS = {
+    "formular": lambda size: _repeat("\n".join(FORM_LINES) + "\n\n", size),
+    "buchstaben": lambda size: _repeat(" ".join(["Wohnanlage am Park"] * 8) + "\n", size),
+    "einzeilig": lambda size: _repeat("Wohnanlage am Park ", size),
+    "klammern": lambda size: _repeat("Angabe [ ", size),
+    "doppelpunkte": lambda size: _repeat("Angabe:      ", size),
+}
+
+
+def measure(fn, text: str, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[524288, 1048576, 2097152, 5242880])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy-max", type=int, default=16384,
+                        help="bisherige Regexes auf adversarialen Texten nur bis zu dieser Größe")
+    args = parser.parse_args()
+
+    for name, build in TEXTS.items():
+        print(f"{name}:")
+        legacy_size = args.legacy_max
+        legacy_text = build(legacy_size)
+        legacy = measure(legacy_guess, legacy_text, 1) * 1000
+        new = measure(guess_fields, legacy_text, args.repeat) * 1000
+        print(f"  {legacy_size / 1024:7.0f} KB   bisher {legacy:10.1f} ms   neu {new:8.2f} ms")
+        for size in args.sizes:
+            text = build(size)
+            elapsed = measure(guess_fields, text, args.repeat) * 1000
+            line = f"  {size / 1024:7.0f} KB   neu {elapsed:8.1f} ms   {elapsed / (size / 1048576):7.1f} ms/MB"
+            if name == "formular":
+                fields = guess_fields(text)
+                line += f"   {len(fields)} Felder, {len({field['id'] for field in fields})} eindeutige IDs"
+            print(line)
+        print()
+
+
+if __name__ == "__main__":
+    main()
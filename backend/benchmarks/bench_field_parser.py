@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Feld-Parser für Nebenkostenabrechnungen
+Bisherige Einzel-Regexes (ein voller Durchlauf je Feld und Muster) vs. services.nebenkosten_parser
+(ein Durchlauf) auf synthetischen Texten. Auf den realistischen Texten werden die Ergebnisse
+zusätzlich verglichen.
+
+Texte:
+    abrechnung  - aneinandergereihte Abrechnungsseiten (Kopfdaten, Positionen, Summen)
+    fliesstext  - lange Zeilen aus großgeschriebenen Wörtern ohne Adresse/Betrag
+                  (Worst Case für das Backtracking der Adress- und Positionsmuster)
+    zahlen      - Ziffernblöcke und Beträge ohne Bezeichnung
+
+Die bisherigen Regexes laufen auf fliesstext quadratisch - dort werden sie nur bis
+--legacy-max Bytes gemessen.
+
+Aufruf (aus backend/):
+    python benchmarks/bench_field_parser.py [--sizes 65536 262144 1048576] [--repeat 3]
+"""
+import re
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.nebenkosten_parser import parse_betrag, scan_fields
+
+MAX_POSITIONEN = 20
+
+
+# ============================================
+# BISHERIGER PARSER (Referenz)
+# ============================================
+
+def _legacy_search(patterns, text, flags=re.IGNORECASE):
+    for rank, pattern in enumerate(patterns):
+        match = re.search(pattern, text, flags)
+        if match:
+            return rank, match
+    return None
+
+
+def legacy_parse(text: str) -> dict:
+    """Stand vor dem Ein-Durchlauf-Parser (Zeitraum-Trenner bereits als (?:-|–|bis))"""
+    titel = _legacy_search([
+        r"(Nebenkostenabrechnung.*\d{4})",
+        r"(Betriebskostenabrechnung.*\d{4})",
+        r"(Jahresabrechnung.*\d{4})",
+    ], text)
+    first_line = next((line.strip() for line in text.split("\n") if line.strip()), None)
+
+    zeitraum = _legacy_search([
+        r"(\d{2}\.\d{2}\.\d{4})\s*(?:-|–|bis)\s*(\d{2}\.\d{2}\.\d{4})",
+        r"Abrechnungszeitraum[:\s]*(\d{2}\.\d{2}\.\d{4})\s*(?:-|–|bis)\s*(\d{2}\.\d{2}\.\d{4})",
+        r"Zeitraum[:\s]*(\d{2}\.\d{2}\.\d{4})\s*(?:-|–|bis)\s*(\d{2}\.\d{2}\.\d{4})",
+        r"(\d{4})",
+    ], text)
+    verwalter = _legacy_search([
+        r"Hausverwaltung[:\s]*([^\n]+)",
+        r"Verwalter[:\s]*([^\n]+)",
+        r"Verwaltung[:\s]*([^\n]+)",
+    ], text)
+    adresse = re.search(
+        r"([A-ZÄÖÜ][a-zäöüß\-]+(?:\s+[A-ZÄÖÜ][a-zäöüß\-]+)*\s+\d+[a-z]?),?\s+(\d{5})\s+"
+        r"([A-ZÄÖÜ][a-zäöüß\-]+(?:\s+[A-ZÄÖÜ][a-zäöüß\-]+)*)",
+        text
+    )
+    gesamt = _legacy_search([
+        r"Gesamtbetrag[:\s]*([\d\.]+,\d{2})\s*€",
+        r"Gesamtkosten[:\s]*([\d\.]+,\d{2})\s*€",
+        r"Summe[:\s]*([\d\.]+,\d{2})\s*€",
+        r"Nachzahlung[:\s]*([\d\.]+,\d{2})\s*€",
+    ], text)
+    positionen = []
+    for name, betrag_str in re.findall(
+        r"([A-ZÄÖÜ][a-zäöüß\-/]+(?:\s+[a-zäöüß\-/]+)*)\s+([\d\.]+,\d{2})\s*€", text
+    ):
+        betrag = parse_betrag(betrag_str)
+        if betrag > 10:
+            positionen.append({"name": name.strip(), "betrag": betrag, "umlageschluessel": "Nicht angegeben"})
+
+    if zeitraum and len(zeitraum[1].groups()) >= 2:
+        zeitraum_value = f"{zeitraum[1].group(1)} - {zeitraum[1].group(2)}"
+    else:
+        zeitraum_value = zeitraum[1].group(1) if zeitraum else None
+    return {
+        "titel": titel[1].group(1).strip() if titel else first_line,
+        "abrechnungszeitraum": zeitraum_value,
+        "verwalter": verwalter[1].group(1).strip() if verwalter else None,
+        "objekt_adresse": f"{adresse.group(1)}, {adresse.group(2)} {adresse.group(3)}" if adresse else None,
+        "gesamtkosten": parse_betrag(gesamt[1].group(1)) if gesamt else None,
+        "positionen": positionen[:MAX_POSITIONEN],
+    }
+
+
+def single_pass_parse(text: str) -> dict:
+    scan = scan_fields(text, max_positionen=MAX_POSITIONEN)
+    return {
+        "titel": scan.titel[1] if scan.titel else scan.first_line,
+        "abrechnungszeitraum": scan.abrechnungszeitraum[1] if scan.abrechnungszeitraum else None,
+        "verwalter": scan.verwalter[1] if scan.verwalter else None,
+        "objekt_adresse": scan.objekt_adresse[1] if scan.objekt_adresse else None,
+        "gesamtkosten": scan.gesamtkosten[1] if scan.gesamtkosten else None,
+        "positionen": scan.positionen,
+    }
+
+
+def single_pass_all(text: str) -> dict:
+    """Ohne Positionslimit - kein vorzeitiges Ende, der ganze Text wird gelesen"""
+    return {"positionen": scan_fields(text).positionen}
+
+
+# ============================================
+# SYNTHETISCHE TEXTE
+# ============================================
+
+POSITIONEN = [
+    "Grundsteuer", "Wasserversorgung", "Entwässerung", "Müllbeseitigung", "Gebäudereinigung",
+    "Gartenpflege", "Allgemeinstrom", "Hauswart", "Sach- und Haftpflichtversicherung", "Aufzug",
+]
+
+
+def _bill_page(page: int) -> str:
+    lines = [
+        "Mieterinformation",
+        f"Seite {page}",
+        "Hausverwaltung Muster GmbH & Co. KG",
+        "Objekt: Musterstraße 12a, 12345 Berlin",
+        f"Nebenkostenabrechnung für das Jahr 2023 (Blatt {page})",
+        "Abrechnungszeitraum: 01.01.2023 bis 31.12.2023",
+    ]
+    for index, name in enumerate(POSITIONEN):
+        lines.append(f"{name} nach Wohnfläche {(page * 37 + index * 113) % 2000 + 100},{index:02d} €")
+    lines.append(f"Gesamtkosten: {page * 1234 % 9000 + 1000},56 €")
+    lines.append("Summe Vorauszahlungen: 1.800,00 €")
+    return "\n".join(lines)
+
+
+def abrechnung(size: int) -> str:
+    pages, total, page = [], 0, 1
+    while total < size:
+        pages.append(_bill_page(page))
+        total += len(pages[-1]) + 2
+        page += 1
+    return "\n\n".join(pages)[:size]
+
+
+def fliesstext(size: int) -> str:
+    line = " ".join(["Wohnanlage Am Park Ost"] * 40)
+    return "\n".join([line] * (size // (len(line) + 1) + 1))[:size]
+
+
+def zahlen(size: int) -> str:
+    chunk = "1234567 89.012.345 67,8 € 2023 4711 "
+    return (chunk * (size // len(chunk) + 1))[:size]
+
+
+TEXTS = {"abrechnung": abrechnung, "fliesstext": fliesstext, "zahlen": zahlen}
+
+
+def measure(fn, text: str, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[65536, 262144, 1048576])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy-max", type=int, default=65536,
+                        help="bisherige Regexes auf fliesstext nur bis zu dieser Größe")
+    args = parser.parse_args()
+
+    for name, build in TEXTS.items():
+        print(f"{name}:")
+        for size in args.sizes:
+            text = build(size)
+            if name == "fliesstext" and size > args.legacy_max:
+                legacy = "      übersprungen"
+            else:
+                legacy = f"{measure(legacy_parse, text, args.repeat) * 1000:10.1f} ms"
+            single = measure(single_pass_parse, text, args.repeat) * 1000
+            full = measure(single_pass_all, text, args.repeat) * 1000
+            same = ""
+            if name == "abrechnung":
+                same = "  identisch" if legacy_parse(text) == single_pass_parse(text) else "  ABWEICHUNG"
+            print(
+                f"  {size / 1024:7.0f} KB   bisher {legacy}   ein Durchlauf {single:8.1f} ms"
+                f"   (ohne Limit {full:8.1f} ms){same}"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
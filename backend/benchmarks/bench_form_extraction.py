@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: FormSchema-Extraktion für AcroForm-Formulare
+Bisheriger Ablauf (pdfminer-Volltext aller Seiten, danach pdfrw über alle Annotationen) vs.
+PDFExtractor.extract_form_schema (AcroForm-Baum per pikepdf, Text nur von Seite 1 für den Titel).
+
+Die Formulare ähneln Behördenanträgen: mehrere Seiten Fließtext mit Eingabefeldern dazwischen.
+Gemessen wird ohne Triage und ohne OCR.
+
+Aufruf (aus backend/):
+    python benchmarks/bench_form_extraction.py [--pages 4 12 24] [--fields-per-page 20] [--repeat 5]
+"""
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from services.pdf_extractor import PDFExtractor
+
+PARAGRAPH = (
+    "Bitte füllen Sie den Antrag vollständig aus. Angaben, die Sie nicht machen, können zur "
+    "Ablehnung oder Verzögerung der Leistung führen. Ihre Daten werden nach den geltenden "
+    "Vorschriften zum Datenschutz verarbeitet."
+)
+
+
+def build_form(path: Path, pages: int, fields_per_page: int) -> None:
+    c = canvas.Canvas(str(path), pagesize=A4)
+    width, height = A4
+    for page in range(1, pages + 1):
+        c.setFont("Helvetica-Bold", 13)
+        c.drawString(40, height - 50, "Antrag auf Leistungen zur Sicherung des Lebensunterhalts")
+        c.setFont("Helvetica", 8)
+        y = height - 80
+        for field in range(fields_per_page):
+            for offset in range(0, len(PARAGRAPH), 110):
+                c.drawString(40, y, PARAGRAPH[offset:offset + 110])
+                y -= 10
+            c.drawString(40, y - 12, f"Angabe {page}.{field + 1}:")
+            c.acroForm.textfield(
+                name=f"seite{page}_feld{field + 1}", tooltip=f"Angabe {page}.{field + 1}",
+                x=160, y=y - 18, width=300, height=14, borderWidth=0
+            )
+            y -= 24
+        c.showPage()
+    c.save()
+
+
+def legacy_schema(pdf_path: str) -> int:
+    """Stand vorher: Volltext (pdfminer) + pdfrw über alle Seiten-Annotationen"""
+    from pdfminer.high_level import extract_text
+    from pdfrw import PdfReader
+
+    text = extract_text(pdf_path)
+    fields = []
+    for page in PdfReader(pdf_path).pages:
+        for annot in page.Annots or []:
+            if annot.T:
+                fields.append({"id": annot.T[1:-1], "text_length": len(text)})
+    return len(fields)
+
+
+def unified_schema(pdf_path: str) -> int:
+    return len(PDFExtractor(ocr_enabled=False).extract_form_schema(pdf_path)["fields"])
+
+
+def measure(fn, pdf_path: str, repeat: int) -> tuple:
+    runs, count = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = fn(pdf_path)
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs), count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[4, 12, 24])
+    parser.add_argument("--fields-per-page", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            pdf_path = Path(tmp) / f"antrag_{pages}.pdf"
+            build_form(pdf_path, pages, args.fields_per_page)
+            legacy, legacy_fields = measure(legacy_schema, str(pdf_path), args.repeat)
+            unified, unified_fields = measure(unified_schema, str(pdf_path), args.repeat)
+            print(
+                f"{pages:4d} Seiten ({legacy_fields:4d}/{unified_fields:4d} Felder)   "
+                f"bisher {legacy * 1000:8.1f} ms   ein Öffnen {unified * 1000:8.1f} ms   "
+                f"x{legacy / unified:5.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Befüllen flacher Formulare (ohne AcroForm)
+Overlay (PDFFiller.fill_overlay: reportlab-Ebene + pikepdf) vs. bisheriger Fallback
+(PDFFiller.create_simple_form_pdf: neues Dokument per weasyprint, HTML → PDF).
+
+Die Felder kommen aus der Layout-Erkennung (services.form_layout_detector) - gemessen wird nur
+das Befüllen. "an Position" zählt die Werte, die pdfplumber im Ergebnis innerhalb ihrer bbox
+wiederfindet.
+
+Aufruf (aus backend/):
+    python benchmarks/bench_form_fill.py [--pages 1 5 20] [--fields-per-page 24] [--repeat 3]
+"""
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pdfplumber
+
+from bench_form_layout import build_form
+from services.form_layout_detector import detect_form_layout
+from services.pdf_filler import PDFFiller
+
+try:
+    import weasyprint  # noqa: F401
+    HAS_WEASYPRINT = True
+except (ImportError, OSError):  # OSError: Pango/Cairo fehlen im System
+    HAS_WEASYPRINT = False
+
+
+def sample_mappings(fields: list) -> list:
+    mappings = []
+    for number, field in enumerate(fields):
+        value = "ja" if field["type"] == "checkbox" else f"Wert {number}"
+        mappings.append({
+            "field_id": field["id"], "label": field["label"], "value": value,
+            "type": field["type"], "page": field["page"], "bbox": field["bbox"],
+        })
+    return mappings
+
+
+def placed_values(pdf_path: Path, mappings: list) -> int:
+    """Werte, die innerhalb ihrer bbox im Ergebnis stehen (bei Kästen ggf. nach dem Label darin)"""
+    placed = 0
+    with pdfplumber.open(pdf_path) as pdf:
+        words_by_page = {}
+        for mapping in mappings:
+            page = mapping["page"]
+            if page not in words_by_page:
+                words_by_page[page] = pdf.pages[page - 1].extract_words()
+            x0, top, x1, bottom = mapping["bbox"]
+            expected = "X" if mapping["type"] == "checkbox" else mapping["value"]
+            text = " ".join(
+                word["text"] for word in words_by_page[page]
+                if word["x0"] >= x0 - 1 and word["x1"] <= x1 + 1
+                and word["top"] >= top - 1 and word["bottom"] <= bottom + 1
+            )
+            placed += text in (expected, f"{mapping['label']} {expected}")
+    return placed
+
+
+def timed(fn, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--fields-per-page", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    filler = PDFFiller()
+    if not HAS_WEASYPRINT:
+        print("weasyprint nicht installiert - nur Overlay wird gemessen\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            src = Path(tmp) / f"formular_{pages}.pdf"
+            build_form(src, pages, args.fields_per_page, text_lines=0)
+            mappings = sample_mappings(detect_form_layout(str(src), with_text=False).fields)
+
+            overlay_path = Path(tmp) / f"overlay_{pages}.pdf"
+            overlay = timed(lambda: filler.fill_overlay(str(src), str(overlay_path), mappings), args.repeat)
+            placed = placed_values(overlay_path, mappings)
+            line = (
+                f"{pages:3d} Seiten ({len(mappings):4d} Felder)   overlay {overlay * 1000:8.1f} ms   "
+                f"{placed}/{len(mappings)} an Position   "
+                f"{src.stat().st_size / 1024:6.0f} KB → {overlay_path.stat().st_size / 1024:6.0f} KB"
+            )
+
+            if HAS_WEASYPRINT:
+                simple_path = Path(tmp) / f"simple_{pages}.pdf"
+                fields = {mapping["label"]: mapping["value"] for mapping in mappings}
+                simple = timed(
+                    lambda: filler.create_simple_form_pdf(str(simple_path), "Formular", fields), args.repeat
+                )
+                line += f"   weasyprint {simple * 1000:8.1f} ms ({simple / overlay:5.1f}x)"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Layout-Felderkennung für flache Formulare (services.form_layout_detector)
+Formulare mit Kästchen (Label links, darüber oder im Kasten), Unterstrich-Linien und Checkboxen.
+
+Gemessen werden
+    gesamt     - detect_form_layout inkl. pdfplumber/pdfminer (Wörter, Rechtecke, Linien, Seitentext)
+    erkennung  - nur die Zuordnung Eingabebereich → Label (Seitenobjekte vorab geladen),
+                 mit Zeilen-Index und zum Vergleich paarweise (jeder Bereich gegen jedes Segment)
+und der Anteil korrekt zugeordneter Labels.
+
+Aufruf (aus backend/):
+    python benchmarks/bench_form_layout.py [--pages 5 20 50] [--fields-per-page 24] [--text-lines 45]
+                                              [--repeat 3]
+"""
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from services import form_layout_detector as detector
+
+LABELS = ["Name", "Vorname", "Geburtsdatum", "Straße", "Telefon", "Kontoverbindung (IBAN)", "Anzahl Kinder"]
+
+
+def build_form(path: Path, pages: int, fields_per_page: int, text_lines: int) -> list:
+    """
+    Felder in zwei Spalten in der oberen Seitenhälfte, darunter `text_lines` Zeilen Erläuterungen
+    (viele Text-Segmente ohne Eingabefeld). Liefert die erwarteten (Seite, Label)-Paare.
+    """
+    c = canvas.Canvas(str(path), pagesize=A4)
+    width, height = A4
+    expected = []
+    rows = fields_per_page // 2
+    row_height = (height / 2 - 80) / rows
+    for page in range(1, pages + 1):
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(40, height - 40, f"Antrag auf Wohngeld - Seite {page}")
+        c.setFont("Helvetica", 7)
+        for row in range(rows):
+            y = height - 90 - row * row_height
+            for column, x in enumerate((40, 310)):
+                number = row * 2 + column
+                label = f"{LABELS[number % len(LABELS)]} {page}-{number}"
+                style = number % 4
+                if style == 0:      # Label links, Kasten rechts
+                    c.drawString(x, y, label)
+                    c.rect(x + 110, y - 4, 130, 13)
+                elif style == 1:    # Label im Kasten oben links
+                    c.rect(x, y - 8, 240, 18)
+                    c.drawString(x + 2, y + 4, label)
+                elif style == 2:    # Label links, Unterstrich-Linie
+                    c.drawString(x, y, label)
+                    c.line(x + 110, y - 2, x + 240, y - 2)
+                else:               # Checkbox, Label rechts
+                    c.rect(x, y - 1, 8, 8)
+                    c.drawString(x + 12, y, label)
+                expected.append((page, label))
+        c.setFont("Helvetica", 6)
+        for line in range(text_lines):
+            y = height / 2 - 20 - line * 8
+            for column, x in enumerate((40, 170, 300, 430)):
+                c.drawString(x, y, f"Hinweis {line}.{column} zu Einkommen")
+        c.showPage()
+    c.save()
+    return expected
+
+
+def load_pages(pdf_path: Path) -> list:
+    import pdfplumber
+
+    pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for index, page in enumerate(pdf.pages):
+            chars, rects, lines = detector.page_objects(page)
+            pages.append((detector.extract_words(chars), rects, lines, index + 1))
+            page.close()
+    return pages
+
+
+def pairwise_labels(words, rects, lines, page_number) -> int:
+    """Ohne Index: jeder Bereich prüft jedes Segment der Seite"""
+
+    class Everything:
+        def __init__(self, segments):
+            self.segments = segments
+
+        def query(self, x0, top, x1, bottom):
+            return [
+                s for s in self.segments
+                if s.x0 <= x1 and s.x1 >= x0 and s.top <= bottom and s.bottom >= top
+            ]
+
+    segments = detector.text_segments(words)
+    index = Everything(segments)
+    return sum(
+        1 for region in detector.input_regions(rects, lines)
+        if detector.find_label(region, index) is not None
+    )
+
+
+def indexed_labels(words, rects, lines, page_number) -> int:
+    return len(detector.detect_page_fields(words, rects, lines, page_number))
+
+
+def timed(fn, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--fields-per-page", type=int, default=24)
+    parser.add_argument("--text-lines", type=int, default=45)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            pdf_path = Path(tmp) / f"formular_{pages}.pdf"
+            expected = build_form(pdf_path, pages, args.fields_per_page, args.text_lines)
+
+            total = timed(lambda: detector.detect_form_layout(str(pdf_path)), args.repeat)
+            layout = detector.detect_form_layout(str(pdf_path))
+            found = {(field["page"], field["label"]) for field in layout.fields}
+            correct = sum(1 for item in expected if item in found)
+
+            loaded = load_pages(pdf_path)
+            indexed = timed(lambda: [indexed_labels(*page) for page in loaded], args.repeat)
+            pairwise = timed(lambda: [pairwise_labels(*page) for page in loaded], args.repeat)
+
+            print(
+                f"{pages:4d} Seiten ({len(expected):5d} Felder, {correct / len(expected):6.1%} korrekt)   "
+                f"gesamt {total * 1000:7.1f} ms   erkennung {indexed * 1000:6.1f} ms   "
+                f"paarweise {pairwise * 1000:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
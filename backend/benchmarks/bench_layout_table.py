@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Kostenpositionen aus Tabellen
+pdfplumber extract_tables() (bisher, nur linierte Seiten) vs. services.layout_table
+(Wort-Koordinaten) auf tabellenlastigen Abrechnungen - Zeit pro Seite und gefundene Positionen.
+
+Abrechnungen:
+    liniert    - Tabelle mit Rahmenlinien: Position | Umlageschlüssel | Gesamtkosten | Ihr Anteil
+    unliniert  - dieselbe Tabelle ohne Linien (extract_tables() findet dort nichts)
+
+Beide Varianten lesen die Seite vorher mit extract_text() - wie in _extract_pages, wo die
+Layout-Analyse der Seite geteilt wird.
+
+Aufruf (aus backend/):
+    python benchmarks/bench_layout_table.py [--pages 10 50] [--rows 40] [--repeat 3]
+"""
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from services.layout_table import extract_positionen
+from services.nebenkosten_parser import parse_betrag
+
+POSITIONEN = [
+    ("Grundsteuer", "Wohnfläche"),
+    ("Wasserversorgung", "Personen"),
+    ("Entwässerung", "Verbrauch"),
+    ("Müllbeseitigung", "Wohneinheiten"),
+    ("Gebäudereinigung", "Wohnfläche"),
+    ("Gartenpflege", "Wohnfläche"),
+    ("Allgemeinstrom", "Wohnfläche"),
+    ("Hauswart", "Wohnfläche"),
+    ("Sach- und Haftpflichtversicherung", "Wohnfläche"),
+    ("Aufzug", "Wohneinheiten"),
+]
+
+
+def _betrag(value: float) -> str:
+    return f"{value:,.2f} €".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def build_bill(path: Path, pages: int, rows: int, ruled: bool) -> None:
+    """Eine Kostentabelle mit `rows` Positionen pro Seite, Beträge rechtsbündig"""
+    c = canvas.Canvas(str(path), pagesize=A4)
+    width, height = A4
+    row_height = 16
+    columns = [40, 230, 340, 450, 560]
+    for page in range(1, pages + 1):
+        top = height - 60
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(40, top + 20, f"Nebenkostenabrechnung 2023 - Seite {page}")
+        c.setFont("Helvetica", 8)
+        if ruled:
+            for row in range(rows + 2):
+                c.line(columns[0], top - row * row_height, columns[-1], top - row * row_height)
+            for x in columns:
+                c.line(x, top, x, top - (rows + 1) * row_height)
+
+        baseline = top - 11
+        c.drawString(columns[0] + 4, baseline, "Position")
+        c.drawString(columns[1] + 4, baseline, "Umlageschlüssel")
+        c.drawRightString(columns[3] - 4, baseline, "Gesamtkosten")
+        c.drawRightString(columns[4] - 4, baseline, "Ihr Anteil")
+        for row in range(1, rows + 1):
+            name, schluessel = POSITIONEN[(row - 1) % len(POSITIONEN)]
+            gesamt = (page * 7919 + row * 104729) % 90000 / 3 + 100
+            baseline = top - row * row_height - 11
+            c.drawString(columns[0] + 4, baseline, f"{name} {row}")
+            c.drawString(columns[1] + 4, baseline, schluessel)
+            c.drawRightString(columns[3] - 4, baseline, _betrag(gesamt))
+            c.drawRightString(columns[4] - 4, baseline, _betrag(gesamt / 12))
+        c.showPage()
+    c.save()
+
+
+def with_tables(page) -> int:
+    """Bisher: extract_tables() auf Seiten mit Linien, Betrag = letzte Spalte"""
+    count = 0
+    if page.lines or page.rects or page.curves:
+        for table in page.extract_tables():
+            count += sum(1 for row in table[1:] if len(row) >= 2 and parse_betrag(str(row[-1])) > 0)
+    return count
+
+
+def with_layout(page) -> int:
+    return len(extract_positionen(page))
+
+
+VARIANTS = {"extract_tables": with_tables, "layout_table": with_layout}
+
+
+def measure(pdf_path: Path, fn) -> tuple:
+    """(Sekunden nur für die Tabellen-Auswertung, Positionen)"""
+    import pdfplumber
+
+    elapsed, count = 0.0, 0
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            page.extract_text()
+            started = time.perf_counter()
+            count += fn(page)
+            elapsed += time.perf_counter() - started
+            page.close()
+    return elapsed, count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for ruled in (True, False):
+            print("liniert:" if ruled else "unliniert:")
+            for pages in args.pages:
+                pdf_path = Path(tmp) / f"bill_{pages}_{int(ruled)}.pdf"
+                build_bill(pdf_path, pages, args.rows, ruled)
+                line = f"  {pages:4d} Seiten à {args.rows} Zeilen"
+                for name, fn in VARIANTS.items():
+                    runs = [measure(pdf_path, fn) for _ in range(args.repeat)]
+                    per_page = statistics.median(run[0] for run in runs) / pages * 1000
+                    line += f"   {name} {per_page:7.2f} ms/Seite ({runs[0][1]:5d} Positionen)"
+                print(line)
+            print()
+
+
+if __name__ == "__main__":
+    main()
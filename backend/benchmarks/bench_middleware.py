@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Middleware-Stack
+Requests/s und p99-Latenz für /health und einen großen Download -
+bisherige BaseHTTPMiddleware-Variante vs. reine ASGI-Middleware.
+
+Aufruf (aus backend/):
+    python benchmarks/bench_middleware.py [--requests 2000] [--download-mb 16]
+"""
+import sys
+import math
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, FileResponse
+
+from services.rate_limiter import RateLimiter, TokenBucketLimiter
+from services.request_costs import CostPolicy, ROUTE_COSTS, rate_limit_headers
+from services.security_middleware import SecurityMiddleware
+
+CONCURRENCY = 32
+
+
+def make_limiter() -> RateLimiter:
+    # Großes Budget: gemessen wird der Overhead, nicht das Limit
+    return RateLimiter(TokenBucketLimiter(capacity=10**9, window_seconds=60))
+
+
+def add_routes(app: FastAPI, download_path: Path) -> None:
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/download")
+    async def download():
+        return FileResponse(download_path, media_type="application/pdf")
+
+
+def build_legacy_app(download_path: Path) -> FastAPI:
+    """Stand vor der Umstellung: zwei @app.middleware("http") (BaseHTTPMiddleware)"""
+    app = FastAPI()
+    limiter = make_limiter()
+    policy = CostPolicy(ROUTE_COSTS)
+
+    @app.middleware("http")
+    async def rate_limit_middleware(request: Request, call_next):
+        client_ip = request.client.host if request.client else "unknown"
+        cost, _ = policy.cost_for(request.method, request.url.path, request.query_params)
+        result = await limiter.hit(client_ip, cost)
+        if not result.allowed:
+            return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded"})
+        request.state.rate_limit_result = result
+        response = await call_next(request)
+        response.headers.update(rate_limit_headers(result, limiter.window_seconds))
+        return response
+
+    @app.middleware("http")
+    async def security_headers_middleware(request: Request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+        return response
+
+    add_routes(app, download_path)
+    return app
+
+
+def build_asgi_app(download_path: Path) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(SecurityMiddleware, limiter=make_limiter(), cost_policy=CostPolicy(ROUTE_COSTS))
+    add_routes(app, download_path)
+    return app
+
+
+async def run_load(app: FastAPI, path: str, requests: int) -> dict:
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)  # Warm-up
+
+        queue = iter(range(requests))
+
+        async def worker():
+            for _ in queue:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.status_code
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, math.ceil(len(latencies) * 0.99) - 1)]
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": p99 * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--download-mb", type=int, default=16)
+    parser.add_argument("--download-requests", type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        download_path = Path(tmp) / "large.pdf"
+        with open(download_path, "wb") as f:
+            chunk = b"%PDF" + b"\0" * (1024 * 1024 - 4)
+            for _ in range(args.download_mb):
+                f.write(chunk)
+
+        scenarios = [
+            ("/health", "/health", args.requests),
+            (f"download {args.download_mb}MB", "/download", args.download_requests),
+        ]
+        apps = [
+            ("BaseHTTPMiddleware", build_legacy_app(download_path)),
+            ("pure ASGI", build_asgi_app(download_path)),
+        ]
+
+        print(f"Concurrency {CONCURRENCY}, httpx.ASGITransport (ohne Netzwerk)\n")
+        for label, path, requests in scenarios:
+            print(f"{label} ({requests} Requests):")
+            for name, app in apps:
+                stats = asyncio.run(run_load(app, path, requests))
+                print(
+                    f"  {name:<20} {stats['rps']:9.0f} req/s   "
+                    f"p50 {stats['p50_ms']:8.2f} ms   p99 {stats['p99_ms']:8.2f} ms"
+                )
+            print()
+
+
+if __name__ == "__main__":
+    main()
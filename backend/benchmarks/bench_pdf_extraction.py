@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF-Extraktion mit pdfplumber
+Wall-Time und Peak-RSS für mehrseitige Nebenkostenabrechnungen -
+bisheriger Zwei-Durchlauf-Pfad (Text, dann Tabellen) vs. ein Durchlauf pro Seite.
+
+Jede Messung läuft in einem frischen Prozess, damit Peak-RSS nicht verfälscht wird.
+
+Aufruf (aus backend/):
+    python benchmarks/bench_pdf_extraction.py [--pages 20 100 300] [--repeat 3]
+"""
+import sys
+import time
+import resource
+import argparse
+import tempfile
+import statistics
+import multiprocessing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+POSITIONEN = [
+    ("Grundsteuer", "Wohnfläche"),
+    ("Wasserversorgung", "Personen"),
+    ("Entwässerung", "Verbrauch"),
+    ("Müllbeseitigung", "Wohneinheiten"),
+    ("Gebäudereinigung", "Wohnfläche"),
+    ("Gartenpflege", "Wohnfläche"),
+    ("Allgemeinstrom", "Wohnfläche"),
+    ("Hauswart", "Wohnfläche"),
+    ("Versicherung", "Wohnfläche"),
+    ("Aufzug", "Wohneinheiten"),
+]
+
+
+def build_bill(path: Path, pages: int) -> None:
+    """Abrechnung mit Kopfzeilen und einer linierten Kostentabelle pro Seite"""
+    c = canvas.Canvas(str(path), pagesize=A4)
+    width, height = A4
+    for page in range(1, pages + 1):
+        y = height - 60
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(50, y, "Nebenkostenabrechnung 2023")
+        c.setFont("Helvetica", 10)
+        c.drawString(50, y - 20, "Abrechnungszeitraum: 01.01.2023 - 31.12.2023")
+        c.drawString(50, y - 35, "Hausverwaltung Muster GmbH, Musterstraße 1, 12345 Berlin")
+        c.drawString(50, y - 50, f"Seite {page} von {pages}")
+
+        top = y - 80
+        row_height = 18
+        columns = [50, 250, 400, 520]
+        rows = len(POSITIONEN) * 2 + 1
+        for row in range(rows + 1):
+            c.line(columns[0], top - row * row_height, columns[-1], top - row * row_height)
+        for x in columns:
+            c.line(x, top, x, top - rows * row_height)
+
+        c.drawString(columns[0] + 4, top - 13, "Position")
+        c.drawString(columns[1] + 4, top - 13, "Umlageschlüssel")
+        c.drawString(columns[2] + 4, top - 13, "Betrag")
+        for row in range(1, rows):
+            name, schluessel = POSITIONEN[(row - 1) % len(POSITIONEN)]
+            betrag = f"{(page * 37 + row * 113) % 2000 + 100},{row:02d} €"
+            baseline = top - row * row_height - 13
+            c.drawString(columns[0] + 4, baseline, name)
+            c.drawString(columns[1] + 4, baseline, schluessel)
+            c.drawString(columns[2] + 4, baseline, betrag)
+
+        c.drawString(50, top - rows * row_height - 30, f"Gesamtkosten: {page * 1234},56 €")
+        c.showPage()
+    c.save()
+
+
+def table_positionen(tables: list) -> list:
+    """Kostenpositionen aus extract_tables() wie vor services.layout_table (erste Zeile = Kopf)"""
+    from services.nebenkosten_parser import parse_betrag
+
+    positionen = []
+    for table in tables:
+        for row in table[1:]:
+            if len(row) >= 2:
+                betrag = parse_betrag(str(row[-1]).strip())
+                if betrag > 0:
+                    positionen.append({
+                        "name": str(row[0]).strip(),
+                        "betrag": betrag,
+                        "umlageschluessel": row[1] if len(row) > 2 else "Nicht angegeben"
+                    })
+    return positionen
+
+
+def two_pass(pdf_path: Path) -> int:
+    """Stand vor der Umstellung: Text über alle Seiten, danach Tabellen über alle Seiten"""
+    import pdfplumber
+    from services.pdf_extraction_service import get_extraction_service
+
+    with pdfplumber.open(pdf_path) as pdf:
+        full_text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+        tables = []
+        for page in pdf.pages:
+            page_tables = page.extract_tables()
+            if page_tables:
+                tables.extend(page_tables)
+        data = get_extraction_service()._parse_text(full_text, table_positionen(tables))
+    return len(data["positionen"])
+
+
+def single_pass(pdf_path: Path) -> int:
+    from services.pdf_extraction_service import get_extraction_service
+
+    result = get_extraction_service()._extract_with_pdfplumber(pdf_path)
+    return len(result["data"]["positionen"])
+
+
+VARIANTS = {
+    "zwei Durchläufe": two_pass,
+    "ein Durchlauf": single_pass,
+}
+
+
+def _measure(variant: str, pdf_path: str, queue) -> None:
+    # Importe vorab, damit Peak-RSS und Zeit nur die Extraktion abbilden
+    import pdfplumber  # noqa: F401
+    import services.pdf_extraction_service  # noqa: F401
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    positionen = VARIANTS[variant](Path(pdf_path))
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, baseline_kb, peak_kb, positionen))
+
+
+def run_isolated(ctx, variant: str, pdf_path: Path) -> tuple:
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(variant, str(pdf_path), queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 100, 300])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            pdf_path = Path(tmp) / f"abrechnung_{pages}.pdf"
+            build_bill(pdf_path, pages)
+            size_kb = pdf_path.stat().st_size / 1024
+            print(f"{pages} Seiten ({size_kb:.0f} KB):")
+
+            for variant in VARIANTS:
+                runs = [run_isolated(ctx, variant, pdf_path) for _ in range(args.repeat)]
+                wall = statistics.median(r[0] for r in runs)
+                growth_mb = statistics.median((r[2] - r[1]) / 1024 for r in runs)
+                peak_mb = max(r[2] for r in runs) / 1024
+                print(
+                    f"  {variant:<16} {wall:8.2f} s   Peak-RSS {peak_mb:7.1f} MB "
+                    f"(+{growth_mb:6.1f} MB)   {runs[0][3]} Positionen"
+                )
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Micro-Benchmark: Rate Limiter
+Kosten pro Request bei wachsender Zahl verschiedener Clients - Token-Bucket vs. alte Timestamp-Listen.
+
+Aufruf (aus backend/):
+    python benchmarks/bench_rate_limiter.py
+"""
+import sys
+import time
+import random
+import tracemalloc
+from pathlib import Path
+from collections import defaultdict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.rate_limiter import TokenBucketLimiter
+
+REQUESTS = 200_000
+CAPACITY = 100
+WINDOW = 60
+
+
+class LegacyListLimiter:
+    """Bisherige Implementierung aus main_enhanced.py (Liste aller Timestamps pro IP)"""
+
+    def __init__(self, capacity: int, window: float):
+        self.capacity = capacity
+        self.window = window
+        self.storage = defaultdict(list)
+
+    def hit(self, key: str) -> bool:
+        now = time.time()
+        self.storage[key] = [t for t in self.storage[key] if now - t < self.window]
+        if len(self.storage[key]) >= self.capacity:
+            return False
+        self.storage[key].append(now)
+        return True
+
+
+def make_keys(clients: int, requests: int):
+    rng = random.Random(42)
+    pool = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)]
+    return [pool[rng.randrange(clients)] for _ in range(requests)]
+
+
+def run(limiter, keys) -> float:
+    hit = limiter.hit
+    started = time.perf_counter()
+    for key in keys:
+        hit(key)
+    return (time.perf_counter() - started) / len(keys) * 1e9
+
+
+def measure(name: str, factory, keys):
+    # Zeit und Speicher getrennt messen - tracemalloc verfälscht die Laufzeit
+    ns = run(factory(), keys)
+
+    tracemalloc.start()
+    limiter = factory()
+    run(limiter, keys)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {name:<14} {ns:8.0f} ns/req   peak {peak / 1024 / 1024:7.1f} MB")
+
+
+def main():
+    print(f"{REQUESTS:,} Requests pro Lauf, Limit {CAPACITY}/{WINDOW}s\n")
+
+    for clients in (1, 100, 10_000, 100_000, 1_000_000):
+        keys = make_keys(clients, REQUESTS)
+        print(f"{clients:>9,} Clients:")
+        measure("token-bucket", lambda: TokenBucketLimiter(CAPACITY, WINDOW), keys)
+        measure(
+            "token-bucket*",
+            lambda: TokenBucketLimiter(CAPACITY, WINDOW, max_keys=10_000),
+            keys
+        )
+        if clients <= 100_000:
+            measure("legacy-list", lambda: LegacyListLimiter(CAPACITY, WINDOW), keys)
+        print()
+
+    print("* max_keys=10_000 - Speicher bleibt unabhängig von der Client-Zahl begrenzt")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,33 @@
 Forms API - Universal Antrags-Assistent Endpoints
 Extrahiert, befüllt und verarbeitet beliebige Formulare.
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 import os
+import time
 import uuid
 import logging
 from pathlib import Path
 import tempfile
 
-from services.pdf_extractor import PDFExtractor
-from services.pdf_filler import PDFFiller
+from services.pdf_extractor import extract_form as extract_form_schema
+from services.pdf_extractor import EXTRACTOR_VERSION, form_cache_options, rebind_form_schema
+from services.pdf_filler import fill_pdf
 from services.field_normalizer import FieldNormalizer
+from services.upload_stream import UploadTooLargeError
+from services.blob_store import get_blob_store
+from services.metadata_store import get_metadata_store
+from services.storage_lifecycle import touch
+from services.request_costs import charge_request, pdf_page_count, page_cost
+from services.executor import get_executor, ExecutorError
+from services.jobs import get_job_manager, job_view
+from services.sharded_extraction import extract_form_sharded, should_shard
+from services.pdf_triage import get_triage_service, needs_ocr
+from services.result_cache import cache_key, get_result_cache
+from services.form_registry import get_form_registry
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +42,8 @@ class FormField(BaseModel):
     required: bool = False
     value: Optional[Any] = None
     confidence: Optional[float] = None
+    page: Optional[int] = None            # Layout-Felder: Seite (1-basiert)
+    bbox: Optional[List[float]] = None    # Layout-Felder: [x0, top, x1, bottom] in Punkten, Ursprung oben links
 
 class FormSchema(BaseModel):
     form_id: str
@@ -50,27 +67,37 @@ class ExtractResponse(BaseModel):
     success: bool
     form_schema: FormSchema
     upload_id: str
+    triage: Optional[Dict[str, Any]] = None
+    cached: bool = False
 
 class FillResponse(BaseModel):
     success: bool
     output_url: str
-    method: str  # "acroform" | "simple"
+    method: str  # "acroform" | "overlay" | "simple"
     filled_count: int
 
-# In-Memory Storage (später DB)
-FORMS_STORAGE = {}
-UPLOADS_DIR = Path("uploads/forms")
+# Persistenter Storage (geteilt über alle Worker)
+FORMS_STORAGE = get_metadata_store().forms
+BLOB_STORE = get_blob_store()
+EXECUTOR = get_executor()
+JOB_MANAGER = get_job_manager()
+TRIAGE = get_triage_service()
+RESULT_CACHE = get_result_cache()
+FORM_REGISTRY = get_form_registry()
+UPLOADS_DIR = BLOB_STORE.root
 OUTPUTS_DIR = Path("outputs/forms")
+MAX_FORM_SIZE = int(os.getenv("FORMS_MAX_FILE_SIZE", str(20 * 1024 * 1024)))  # 20MB
 
 # Verzeichnisse erstellen
-UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 OUTPUTS_DIR.mkdir(parents=True, exist_ok=True)
 
 
 @router.post("/extract", response_model=ExtractResponse)
 async def extract_form(
+    request: Request,
     file: UploadFile = File(...),
-    ocr_enabled: bool = True
+    ocr_enabled: bool = True,
+    background: bool = False
 ):
     """
     Extrahiert FormSchema aus hochgeladenem PDF.
@@ -78,6 +105,10 @@ async def extract_form(
     - Erkennt AcroForm-Felder
     - Falls nicht: Text-Pattern-Matching
     - Optional: OCR für Scans
+    - Triage vorab (AcroForm/digital/Scan) - wird unter "triage" mitgeliefert
+    - Bekannte Dateien (gleicher Hash, gleiche Optionen) aus dem Result-Cache
+    - Bekannte Formular-Vorlagen (gleiche AcroForm-Struktur) aus der Form Registry
+    - background=true: sofort 202 + job_id (Ergebnis über /jobs/{job_id})
     
     Returns:
         FormSchema mit allen erkannten Feldern
@@ -87,35 +118,120 @@ async def extract_form(
         if not file.filename.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Nur PDF-Dateien erlaubt")
         
-        # Speichern
+        # Speichern (dedupliziert über Content-Hash)
         upload_id = str(uuid.uuid4())
-        file_path = UPLOADS_DIR / f"{upload_id}_{file.filename}"
         
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        try:
+            blob = await BLOB_STORE.ingest_upload(file, MAX_FORM_SIZE)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
         
-        logger.info(f"Uploaded form: {file.filename} ({len(content)} bytes)")
+        file_path = await run_in_threadpool(BLOB_STORE.local_path, blob["sha256"])
+        logger.info(
+            f"Uploaded form: {file.filename} ({blob['size']} bytes, "
+            f"{'bekannt' if blob['deduplicated'] else 'neu'})"
+        )
+        
+        # Triage + seitenabhängige Kosten (nicht bei Cache-/Vorlagen-Treffern) -
+        # bei 429 den gerade angelegten Blob-Verweis wieder freigeben
+        cached = None
+        structure = template_schema = None
+        try:
+            triage = await run_in_threadpool(TRIAGE.triage, file_path, blob["sha256"])
+            triage_info = triage.to_dict() if triage else None
+            key = cache_key(
+                "forms-extract", blob["sha256"], EXTRACTOR_VERSION, form_cache_options(ocr_enabled, triage_info)
+            )
+            if not background:
+                cached = await run_in_threadpool(RESULT_CACHE.get, key)
+                if cached is None and (triage is None or triage.acroform_fields):
+                    structure, template_schema = await run_in_threadpool(
+                        FORM_REGISTRY.match, str(file_path), upload_id, file.filename,
+                        triage.kind if triage else None
+                    )
+            if cached is None and template_schema is None:
+                pages = triage.pages if triage and triage.pages else await run_in_threadpool(pdf_page_count, file_path)
+                await charge_request(request, page_cost(pages, needs_ocr(triage, ocr_enabled)))
+        except HTTPException:
+            await run_in_threadpool(BLOB_STORE.release, blob["sha256"])
+            raise
         
-        # Extrahieren
-        extractor = PDFExtractor(ocr_enabled=ocr_enabled)
-        form_schema = extractor.extract_form_schema(str(file_path), form_id=upload_id)
+        if background:
+            # Der Job übernimmt die Blob-Referenz (Freigabe bei Fehlschlag)
+            try:
+                job = await JOB_MANAGER.submit(
+                    "forms-extract",
+                    sha256=blob["sha256"],
+                    args={
+                        "ocr_enabled": ocr_enabled, "form_id": upload_id, "filename": file.filename,
+                        "triage": triage_info
+                    },
+                    context={
+                        "form_id": upload_id, "blob_path": blob["path"], "filename": file.filename,
+                        "triage": triage_info
+                    }
+                )
+            except Exception:
+                await run_in_threadpool(BLOB_STORE.release, blob["sha256"])
+                raise
+            return JSONResponse(status_code=202, content=job_view(job))
         
-        # In Memory speichern
-        FORMS_STORAGE[upload_id] = {
+        # Extrahieren (CPU-lastig → Prozess-Pool, große PDFs parallel nach Seitenbereichen)
+        try:
+            started = time.perf_counter()
+            if cached is not None:
+                form_schema = rebind_form_schema(cached, upload_id, file.filename, str(file_path))
+            elif template_schema is not None:
+                form_schema = template_schema
+            elif should_shard(pages, EXECUTOR.cpu.workers):
+                form_schema = await extract_form_sharded(
+                    EXECUTOR,
+                    str(file_path),
+                    pages,
+                    ocr_enabled=ocr_enabled,
+                    form_id=upload_id,
+                    filename=file.filename,
+                    triage=triage_info
+                )
+            else:
+                form_schema = await EXECUTOR.run_cpu(
+                    extract_form_schema,
+                    str(file_path),
+                    ocr_enabled=ocr_enabled,
+                    form_id=upload_id,
+                    filename=file.filename,
+                    triage=triage_info
+                )
+            if cached is None:
+                await run_in_threadpool(RESULT_CACHE.put, key, form_schema)
+            if cached is None and template_schema is None:
+                await run_in_threadpool(
+                    FORM_REGISTRY.learn, structure, form_schema, time.perf_counter() - started
+                )
+        except Exception:
+            await run_in_threadpool(BLOB_STORE.release, blob["sha256"])
+            raise
+        
+        # Metadaten speichern
+        await FORMS_STORAGE.aset(upload_id, {
             "schema": form_schema,
-            "file_path": str(file_path),
-            "filename": file.filename
-        }
+            "file_path": blob["path"],
+            "filename": file.filename,
+            "sha256": blob["sha256"]
+        })
         
         logger.info(f"Extracted {len(form_schema['fields'])} fields from {file.filename}")
         
         return ExtractResponse(
             success=True,
             form_schema=FormSchema(**form_schema),
-            upload_id=upload_id
+            upload_id=upload_id,
+            triage=triage_info,
+            cached=cached is not None or template_schema is not None
         )
         
+    except (HTTPException, ExecutorError):
+        raise
     except Exception as e:
         logger.error(f"Form extraction failed: {e}")
         raise HTTPException(status_code=500, detail=f"Extraktion fehlgeschlagen: {str(e)}")
@@ -138,11 +254,16 @@ async def fill_form(
     """
     try:
         # Formular abrufen
-        if upload_id not in FORMS_STORAGE:
+        form_data = await FORMS_STORAGE.aget(upload_id)
+        if form_data is None:
             raise HTTPException(status_code=404, detail="Formular nicht gefunden")
-        
-        form_data = FORMS_STORAGE[upload_id]
-        src_path = form_data["file_path"]
+        if form_data.get("expired_at"):
+            raise HTTPException(status_code=404, detail="Formular-Datei nicht mehr verfügbar")
+        try:
+            src_path = str(await run_in_threadpool(BLOB_STORE.local_path, form_data["sha256"]))
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Formular-Datei nicht mehr verfügbar")
+        touch(src_path)
         
         # Ausgabedatei
         output_filename = f"filled_{upload_id}.pdf"
@@ -161,19 +282,24 @@ async def fill_form(
                 field_type = field.get("type", "string")
                 normalized_value = FieldNormalizer.normalize(mapping.value, field_type)
             else:
+                field_type = None
                 normalized_value = str(mapping.value)
             
             normalized_mappings.append({
                 "field_id": mapping.field_id,
                 "label": mapping.label,
-                "value": normalized_value
+                "value": normalized_value,
+                "type": field_type,
+                # Layout-Felder: Position für die Overlay-Befüllung flacher PDFs
+                "page": field.get("page") if field else None,
+                "bbox": field.get("bbox") if field else None
             })
         
         logger.info(f"Filling {len(normalized_mappings)} fields for {upload_id}")
         
-        # Befüllen
-        filler = PDFFiller()
-        result = filler.fill_form(
+        # Befüllen (CPU-lastig → Prozess-Pool)
+        result = await EXECUTOR.run_cpu(
+            fill_pdf,
             src_path,
             str(output_path),
             normalized_mappings,
@@ -190,6 +316,8 @@ async def fill_form(
             filled_count=result["filled_count"]
         )
         
+    except (HTTPException, ExecutorError):
+        raise
     except Exception as e:
         logger.error(f"Form filling failed: {e}")
         raise HTTPException(status_code=500, detail=f"Befüllen fehlgeschlagen: {str(e)}")
@@ -197,6 +325,7 @@ async def fill_form(
 
 @router.post("/extract-and-fill", response_model=FillResponse)
 async def extract_and_fill(
+    request: Request,
     file: UploadFile = File(...),
     mappings: str = Form(...),  # JSON string
     title: Optional[str] = Form(None),
@@ -211,7 +340,7 @@ async def extract_and_fill(
         import json
         
         # 1. Extrahieren
-        extract_result = await extract_form(file, ocr_enabled)
+        extract_result = await extract_form(request, file, ocr_enabled)
         upload_id = extract_result.upload_id
         
         # 2. Mappings parsen
@@ -228,6 +357,8 @@ async def extract_and_fill(
         
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Ungültiges JSON in mappings")
+    except (HTTPException, ExecutorError):
+        raise
     except Exception as e:
         logger.error(f"Extract-and-fill failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -238,11 +369,11 @@ async def get_form_schema(upload_id: str):
     """
     Ruft gespeichertes FormSchema ab.
     """
-    if upload_id not in FORMS_STORAGE:
+    form_data = await FORMS_STORAGE.aget(upload_id)
+    if form_data is None:
         raise HTTPException(status_code=404, detail="Formular nicht gefunden")
     
-    schema = FORMS_STORAGE[upload_id]["schema"]
-    return FormSchema(**schema)
+    return FormSchema(**form_data["schema"])
 
 
 @router.delete("/form/{upload_id}")
@@ -250,16 +381,15 @@ async def delete_form(upload_id: str):
     """
     Löscht hochgeladenes Formular und generierte Outputs.
     """
-    if upload_id not in FORMS_STORAGE:
+    form_data = await FORMS_STORAGE.aget(upload_id)
+    if form_data is None:
         raise HTTPException(status_code=404, detail="Formular nicht gefunden")
     
     try:
-        # Dateien löschen
-        form_data = FORMS_STORAGE[upload_id]
-        src_path = Path(form_data["file_path"])
-        
-        if src_path.exists():
-            src_path.unlink()
+        # Referenz auf Blob freigeben (Datei wird gelöscht, wenn niemand mehr darauf zeigt);
+        # nach Retention hält der Eintrag keine Referenz mehr
+        if not form_data.get("expired_at"):
+            await run_in_threadpool(BLOB_STORE.release, form_data["sha256"])
         
         # Output löschen (falls vorhanden)
         output_path = OUTPUTS_DIR / f"filled_{upload_id}.pdf"
@@ -267,7 +397,7 @@ async def delete_form(upload_id: str):
             output_path.unlink()
         
         # Aus Storage entfernen
-        del FORMS_STORAGE[upload_id]
+        await FORMS_STORAGE.adelete(upload_id)
         
         logger.info(f"Deleted form {upload_id}")
         
@@ -302,7 +432,8 @@ async def forms_health():
     """Status der Forms API"""
     return {
         "status": "healthy",
-        "forms_count": len(FORMS_STORAGE),
+        "forms_count": await run_in_threadpool(len, FORMS_STORAGE),
+        "form_registry": FORM_REGISTRY.stats(),
         "uploads_dir": str(UPLOADS_DIR),
         "outputs_dir": str(OUTPUTS_DIR)
     }
@@ -0,0 +1,82 @@
+"""
+Jobs API Endpoints
+Status-Abfrage und Server-Sent Events für Hintergrund-Jobs (Extraktion, Formular-Analyse)
+"""
+import json
+import time
+import logging
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from services.jobs import get_job_manager, job_view, TERMINAL_STATES
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+JOB_MANAGER = get_job_manager()
+
+# Updates anderer Worker/Celery werden in diesem Intervall gepollt
+EVENTS_POLL_INTERVAL = 0.5
+KEEPALIVE_INTERVAL = 15.0
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Aktueller Status, Fortschritt und (nach Abschluss) Ergebnis eines Jobs"""
+    job = await JOB_MANAGER.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    return job_view(job)
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events:
+    - `progress` bei jeder Status-/Seitenänderung ({"status", "progress"})
+    - `done` einmalig mit dem vollständigen Job (inkl. Ergebnis oder Fehler)
+    """
+    if await JOB_MANAGER.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+
+    async def stream():
+        last_snapshot = None
+        last_sent = time.monotonic()
+
+        while True:
+            job = await JOB_MANAGER.get(job_id)
+            if job is None:
+                return
+
+            snapshot = (job["status"], job["progress"].get("done"), job["progress"].get("total"))
+            if snapshot != last_snapshot:
+                last_snapshot = snapshot
+                last_sent = time.monotonic()
+                yield _sse("progress", {
+                    "job_id": job_id,
+                    "status": job["status"],
+                    "progress": job["progress"]
+                })
+
+            if job["status"] in TERMINAL_STATES:
+                yield _sse("done", job_view(job))
+                return
+
+            if await request.is_disconnected():
+                return
+
+            changed = await JOB_MANAGER.wait_for_change(job_id, EVENTS_POLL_INTERVAL)
+            if not changed and time.monotonic() - last_sent > KEEPALIVE_INTERVAL:
+                last_sent = time.monotonic()
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -2,12 +2,13 @@
 LLM API Endpoints
 Echte OpenAI Integration (kein Mock)
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 import logging
 
 from services.llm_service import get_llm_service
+from services.request_costs import charge_request, llm_cost
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/llm", tags=["LLM"])
@@ -77,7 +78,7 @@ async def health_check():
     )
 
 @router.post("/invoke", response_model=InvokeLLMResponse)
-async def invoke_llm(request: InvokeLLMRequest):
+async def invoke_llm(request: InvokeLLMRequest, http_request: Request):
     """
     Führt LLM-Anfrage aus (generisch)
     
@@ -98,6 +99,8 @@ async def invoke_llm(request: InvokeLLMRequest):
             detail="OpenAI API nicht konfiguriert. Setze OPENAI_API_KEY in .env"
         )
     
+    await charge_request(http_request, llm_cost(request.max_tokens or llm_service.max_tokens))
+    
     try:
         result = await llm_service.invoke(
             prompt=request.prompt,
@@ -117,7 +120,7 @@ async def invoke_llm(request: InvokeLLMRequest):
         )
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """
     Chat-Assistent für Mietrechts-Fragen
     
@@ -137,6 +140,8 @@ async def chat(request: ChatRequest):
             detail="OpenAI API nicht konfiguriert"
         )
     
+    await charge_request(http_request, llm_cost(llm_service.chat_max_tokens))
+    
     try:
         response_text = await llm_service.chat_assistant(
             user_message=request.message,
@@ -157,7 +162,7 @@ async def chat(request: ChatRequest):
         )
 
 @router.post("/analyze-nebenkosten", response_model=AnalyzeNebenkostenResponse)
-async def analyze_nebenkosten(request: AnalyzeNebenkostenRequest):
+async def analyze_nebenkosten(request: AnalyzeNebenkostenRequest, http_request: Request):
     """
     Analysiert Nebenkostenabrechnung mit KI
     
@@ -184,6 +189,8 @@ async def analyze_nebenkosten(request: AnalyzeNebenkostenRequest):
             detail="OpenAI API nicht konfiguriert"
         )
     
+    await charge_request(http_request, llm_cost(llm_service.max_tokens))
+    
     try:
         result = await llm_service.analyze_nebenkosten(
             extracted_data=request.extracted_data,
@@ -6,23 +6,40 @@ MiMiCheck — www.mimicheck.ai
 from fastapi import FastAPI, UploadFile, File, HTTPException, status, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
 import re
-import hashlib
+import json
+import uuid
 import tempfile
+import mimetypes
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 import logging
-from collections import defaultdict
-import time
 
+# .env vor den Service-Importen laden - deren Einstellungen werden beim Import gelesen
 load_dotenv()
 
+from services.upload_stream import UploadTooLargeError
+from services.blob_store import get_blob_store
+from services.metadata_store import get_metadata_store
+from services.file_serving import serve_file, CachedStaticFiles
+from services.storage_lifecycle import StorageClass, StorageLifecycleManager, touch
+from services.rate_limiter import create_rate_limiter
+from services.request_costs import COST_POLICY, charge_request, pdf_page_count, page_cost
+from services.security_middleware import SecurityMiddleware
+from services.executor import get_executor, ExecutorError
+from services.pdf_extraction_service import EXTRACTOR_VERSION, extract_pdf_data, extraction_cache_options
+from services.jobs import get_job_manager, job_view
+from services.sharded_extraction import extract_pdf_data_sharded, should_shard
+from services.extraction_stream import result_events, stream_extraction
+from services.pdf_triage import get_triage_service, choose_pipeline, needs_ocr
+from services.result_cache import cache_key, get_result_cache
+
 # Logging konfigurieren
 logging.basicConfig(
     level=logging.INFO,
@@ -42,47 +59,11 @@ app = FastAPI(
 # SECURITY MIDDLEWARE (2025 Best Practices)
 # ============================================
 
-# Rate Limiting Storage
-rate_limit_storage = defaultdict(list)
-RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
-RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # seconds
-
-@app.middleware("http")
-async def rate_limit_middleware(request: Request, call_next):
-    """Rate limiting - prevent abuse"""
-    client_ip = request.client.host if request.client else "unknown"
-    current_time = time.time()
-    
-    # Clean old entries
-    rate_limit_storage[client_ip] = [
-        req_time for req_time in rate_limit_storage[client_ip]
-        if current_time - req_time < RATE_LIMIT_WINDOW
-    ]
-    
-    # Check limit
-    if len(rate_limit_storage[client_ip]) >= RATE_LIMIT_REQUESTS:
-        logger.warning(f"Rate limit exceeded for {client_ip}")
-        return JSONResponse(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            content={"detail": "Rate limit exceeded", "retry_after": RATE_LIMIT_WINDOW}
-        )
-    
-    rate_limit_storage[client_ip].append(current_time)
-    response = await call_next(request)
-    return response
-
-@app.middleware("http")
-async def security_headers_middleware(request: Request, call_next):
-    """Add OWASP recommended security headers"""
-    response = await call_next(request)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-    if request.url.scheme == "https":
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    return response
+# Rate Limiting (Token-Bucket, lokal oder in Redis über alle Worker geteilt)
+RATE_LIMITER = create_rate_limiter()
+
+# Rate Limiting + Security Header als eine reine ASGI-Middleware
+app.add_middleware(SecurityMiddleware, limiter=RATE_LIMITER, cost_policy=COST_POLICY)
 
 # Trusted Host Middleware (prevent host header attacks)
 if os.getenv("ENVIRONMENT") == "production":
@@ -100,15 +81,71 @@ app.add_middleware(
     max_age=3600,
 )
 
-# Simple in-memory storage (Sprint 1 MVP)
-UPLOADS = {}
-ANALYSES = {}
-REPORTS = {}
+# Persistent metadata storage (SQLite lokal, Postgres via DATABASE_URL)
+METADATA = get_metadata_store()
+UPLOADS = METADATA.uploads
+ANALYSES = METADATA.analyses
+REPORTS = METADATA.reports
 
 # Storage directory
 STORAGE_DIR = Path(tempfile.gettempdir()) / "nebenkosten-storage"
 STORAGE_DIR.mkdir(exist_ok=True)
 
+# Content-addressed Blob Store (eine Kopie pro Datei-Hash)
+BLOB_STORE = get_blob_store()
+
+# Worker-Pools für blockierende Arbeit (PDF-Parsing/OCR im Prozess-Pool)
+EXECUTOR = get_executor()
+
+# Hintergrund-Jobs (lokale Queue oder Celery, Start im Startup-Hook)
+JOB_MANAGER = get_job_manager()
+
+# Triage vor der Extraktion (AcroForm/digital/Scan, gecacht pro Content-Hash)
+TRIAGE = get_triage_service()
+
+# Extraktionsergebnisse pro Datei-Hash (Speicher + Disk)
+RESULT_CACHE = get_result_cache()
+
+def expire_blob_records(sha256: str) -> None:
+    """Uploads/Formulare, deren Blob per Retention gelöscht wurde, als abgelaufen markieren"""
+    expired_at = datetime.now().isoformat()
+    for table in (METADATA.uploads, METADATA.forms):
+        for key, value in table.find_all("sha256", sha256).items():
+            table[key] = {**value, "expired_at": expired_at}
+
+# Retention / Quota (Hintergrund-Sweeper, Start im Startup-Hook)
+HOUR = 3600
+STORAGE_LIFECYCLE = StorageLifecycleManager(
+    classes=[
+        StorageClass(
+            "uploads", BLOB_STORE.root,
+            ttl_seconds=float(os.getenv("RETENTION_UPLOADS_HOURS", "720")) * HOUR,
+            recursive=True,
+            # Über den Blob Store: beansprucht das Löschen im Index und markiert die Einträge
+            evict=lambda path, accessed: BLOB_STORE.expire(path.name, accessed, expire_blob_records)
+        ),
+        StorageClass(
+            "staging", BLOB_STORE.staging_dir,
+            ttl_seconds=1 * HOUR,  # abgebrochene Uploads
+            pattern="*"
+        ),
+        StorageClass(
+            "reports", STORAGE_DIR,
+            ttl_seconds=float(os.getenv("RETENTION_REPORTS_HOURS", "168")) * HOUR,
+            pattern="report_*.html"
+        ),
+        StorageClass(
+            "outputs", Path("outputs/forms"),
+            ttl_seconds=float(os.getenv("RETENTION_OUTPUTS_HOURS", "24")) * HOUR,
+            pattern="filled_*.pdf"
+        ),
+    ],
+    quota_bytes=int(os.getenv("STORAGE_QUOTA_MB", "2048")) * 1024 * 1024,
+    interval_seconds=float(os.getenv("STORAGE_SWEEP_INTERVAL", "600")),
+    lock_path=STORAGE_DIR / ".lifecycle.lock",
+    record_sweeps=[JOB_MANAGER.purge_finished]
+)
+
 # ============================================
 # FORMS API (Universal Antrags-Assistent)
 # ============================================
@@ -119,12 +156,18 @@ try:
     # Static files für befüllte PDFs
     outputs_dir = Path("outputs/forms")
     outputs_dir.mkdir(parents=True, exist_ok=True)
-    app.mount("/outputs/forms", StaticFiles(directory=str(outputs_dir)), name="outputs_forms")
+    app.mount("/outputs/forms", CachedStaticFiles(directory=str(outputs_dir)), name="outputs_forms")
     
     logging.info("✅ Forms API mounted at /api/forms")
 except Exception as e:
     logging.warning(f"⚠️ Forms API not available: {e}")
 
+# ============================================
+# JOBS API (Status-Polling + SSE-Fortschritt)
+# ============================================
+from jobs_api import router as jobs_router
+app.include_router(jobs_router)
+
 # ============================================
 # LLM API (OpenAI Integration)
 # ============================================
@@ -144,6 +187,8 @@ class UploadResponse(BaseModel):
     file_url: str
     status: str = "uploaded"
     message: str = "File uploaded successfully"
+    sha256: Optional[str] = None
+    deduplicated: bool = False
 
 class AnalyzeRequest(BaseModel):
     abrechnung_id: str
@@ -178,10 +223,32 @@ class HealthResponse(BaseModel):
 # ============================================
 
 def generate_id(prefix: str) -> str:
-    """Generate unique ID"""
-    timestamp = datetime.now().isoformat()
-    hash_obj = hashlib.md5(timestamp.encode())
-    return f"{prefix}_{hash_obj.hexdigest()[:8]}"
+    """Generate unique ID (random, collision-safe under concurrency)"""
+    return f"{prefix}_{uuid.uuid4().hex[:16]}"
+
+async def resolve_upload_path(upload_data: Dict) -> Path:
+    """Lokaler Pfad eines Uploads (lädt bei S3 über den Scratch-Cache nach)"""
+    if upload_data.get("expired_at"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File no longer available (retention expired)"
+        )
+    try:
+        file_path = await run_in_threadpool(BLOB_STORE.local_path, upload_data["sha256"])
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File no longer available (retention expired)"
+        )
+    touch(file_path)
+    return file_path
+
+async def triage_upload(upload_data: Dict, file_path: Path):
+    """Triage (gecacht pro Content-Hash) + Seitenzahl; ohne pikepdf nur die Seitenzahl"""
+    triage = await run_in_threadpool(TRIAGE.triage, file_path, upload_data["sha256"])
+    if triage is not None and triage.pages:
+        return triage, triage.pages
+    return triage, await run_in_threadpool(pdf_page_count, file_path)
 
 def extract_text_from_pdf(file_path: Path) -> str:
     """
@@ -325,6 +392,21 @@ async def health():
     """Health Check"""
     return HealthResponse(timestamp=datetime.now().isoformat())
 
+@app.get("/api/executor/stats")
+async def executor_stats():
+    """Auslastung der Worker-Pools (laufende/wartende Jobs, Timeouts, Ablehnungen)"""
+    return EXECUTOR.stats()
+
+@app.get("/api/storage/stats")
+async def storage_stats():
+    """Retention/Quota-Metriken (bytes reclaimed, files evicted, ...)"""
+    return STORAGE_LIFECYCLE.metrics
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Result-Cache: Treffer (Speicher/Disk), Misses, Einträge und Größe je Stufe"""
+    return RESULT_CACHE.stats()
+
 @app.post("/api/upload", response_model=UploadResponse)
 async def upload_file(file: UploadFile = File(...)):
     """
@@ -345,85 +427,124 @@ async def upload_file(file: UploadFile = File(...)):
             detail="Invalid file type. Allowed: PDF, JPG, PNG"
         )
     
-    # Read and validate size
-    try:
-        content = await file.read()
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File too large. Maximum size: {MAX_FILE_SIZE // 1024 // 1024}MB"
-            )
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to read file: {str(e)}"
-        )
-    
     # Generate ID
     abrechnung_id = generate_id("abr")
     
     # Sanitize filename (prevent path traversal)
     safe_filename = re.sub(r'[^a-zA-Z0-9._-]', '_', filename)
     file_ext = Path(safe_filename).suffix
-    file_path = STORAGE_DIR / f"{abrechnung_id}{file_ext}"
     
+    # Stream into blob store (hash + size check on the fly, dedup by content)
     try:
-        with open(file_path, 'wb') as f:
-            f.write(content)
-        
-        # Store metadata
-        UPLOADS[abrechnung_id] = {
-            "id": abrechnung_id,
-            "filename": file.filename,
-            "file_path": str(file_path),
-            "content_type": file.content_type,
-            "size": len(content),
-            "uploaded_at": datetime.now().isoformat()
-        }
-        
-        return UploadResponse(
-            abrechnung_id=abrechnung_id,
-            file_url=f"/files/{abrechnung_id}{file_ext}",
-            status="uploaded",
-            message=f"File '{file.filename}' uploaded successfully"
+        blob = await BLOB_STORE.ingest_upload(file, MAX_FILE_SIZE)
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
         )
-    
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Upload failed: {str(e)}"
         )
+    
+    # Store metadata
+    await UPLOADS.aset(abrechnung_id, {
+        "id": abrechnung_id,
+        "filename": file.filename,
+        "file_path": blob["path"],
+        "content_type": file.content_type,
+        "size": blob["size"],
+        "sha256": blob["sha256"],
+        "uploaded_at": datetime.now().isoformat()
+    })
+    
+    return UploadResponse(
+        abrechnung_id=abrechnung_id,
+        file_url=f"/files/{abrechnung_id}{file_ext}",
+        status="uploaded",
+        message=f"File '{file.filename}' uploaded successfully",
+        sha256=blob["sha256"],
+        deduplicated=blob["deduplicated"]
+    )
 
 @app.post("/api/extract-data/{abrechnung_id}")
-async def extract_data_from_pdf(abrechnung_id: str, use_ocr: bool = False):
+async def extract_data_from_pdf(
+    abrechnung_id: str,
+    request: Request,
+    use_ocr: bool = False,
+    background: bool = False
+):
     """
     Extrahiert strukturierte Daten aus hochgeladenem PDF (REAL - kein Mock!)
+    
+    Die Triage (Objektstruktur, Stichprobe von Seiten) wählt vorab die Pipeline und wird
+    unter "triage" mitgeliefert. Bekannte Dateien (gleicher Hash, gleiche Optionen) kommen
+    aus dem Result-Cache ("cached": true) und kosten keine Seitenpauschale.
+    Mit background=true: sofort 202 + job_id, Ergebnis über GET /jobs/{job_id} bzw. SSE
     """
-    if abrechnung_id not in UPLOADS:
+    upload_data = await UPLOADS.aget(abrechnung_id)
+    if upload_data is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Abrechnung '{abrechnung_id}' not found"
         )
     
-    upload_data = UPLOADS[abrechnung_id]
-    file_path = upload_data["file_path"]
+    file_path = await resolve_upload_path(upload_data)
+    
+    triage, pages = await triage_upload(upload_data, file_path)
+    pipeline = choose_pipeline(triage, use_ocr)
+    triage_info = triage.to_dict() if triage else None
+    
+    key = cache_key(
+        "extract-data", upload_data["sha256"], EXTRACTOR_VERSION, extraction_cache_options(use_ocr, pipeline)
+    )
+    if not background:
+        cached = await run_in_threadpool(RESULT_CACHE.get, key)
+        if cached is not None:
+            return {
+                "success": True,
+                "abrechnung_id": abrechnung_id,
+                "data": cached,
+                "triage": triage_info,
+                "cached": True
+            }
+    
+    await charge_request(request, page_cost(pages, needs_ocr(triage, use_ocr)))
+    
+    if background:
+        job = await JOB_MANAGER.submit(
+            "extract-data",
+            sha256=upload_data["sha256"],
+            args={"use_ocr": use_ocr, "pipeline": pipeline},
+            context={"abrechnung_id": abrechnung_id, "triage": triage_info}
+        )
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job_view(job))
     
     try:
-        from services.pdf_extraction_service import get_extraction_service
-        
-        extraction_service = get_extraction_service()
-        extracted_data = extraction_service.extract_from_pdf(file_path, use_ocr=use_ocr)
+        # CPU-lastig (Parsing/OCR) → Prozess-Pool, Event-Loop bleibt frei
+        if should_shard(pages, EXECUTOR.cpu.workers):
+            extracted_data = await extract_pdf_data_sharded(
+                EXECUTOR, str(file_path), pages, use_ocr=use_ocr, pipeline=pipeline
+            )
+        else:
+            extracted_data = await EXECUTOR.run_cpu(
+                extract_pdf_data, str(file_path), use_ocr=use_ocr, pipeline=pipeline
+            )
         
         logging.info(f"✅ Daten extrahiert aus {abrechnung_id}: {len(extracted_data.get('positionen', []))} Positionen")
+        await run_in_threadpool(RESULT_CACHE.put, key, extracted_data)
         
         return {
             "success": True,
             "abrechnung_id": abrechnung_id,
-            "data": extracted_data
+            "data": extracted_data,
+            "triage": triage_info,
+            "cached": False
         }
         
+    except ExecutorError:
+        raise
     except Exception as e:
         logging.error(f"❌ Extraktion fehlgeschlagen: {e}")
         raise HTTPException(
@@ -431,23 +552,71 @@ async def extract_data_from_pdf(abrechnung_id: str, use_ocr: bool = False):
             detail=f"Daten-Extraktion fehlgeschlagen: {str(e)}"
         )
 
+@app.post("/api/extract-data/{abrechnung_id}/stream")
+async def stream_extract_data(abrechnung_id: str, request: Request, use_ocr: bool = False):
+    """
+    Wie /api/extract-data, aber als NDJSON-Strom (eine JSON-Zeile pro Event):
+    start, header (titel, abrechnungszeitraum, verwalter, objekt_adresse) sobald gefunden,
+    position pro Kostenposition, page pro gelesener Seite, dann totals und done (Gesamtergebnis).
+    Gleiche Triage-Pipeline und gleicher Result-Cache wie /api/extract-data.
+    """
+    upload_data = await UPLOADS.aget(abrechnung_id)
+    if upload_data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Abrechnung '{abrechnung_id}' not found"
+        )
+    
+    file_path = await resolve_upload_path(upload_data)
+    
+    triage, pages = await triage_upload(upload_data, file_path)
+    pipeline = choose_pipeline(triage, use_ocr)
+    
+    # Bekanntes Ergebnis aus /api/extract-data: ohne Seitenpauschale als Event-Strom
+    key = cache_key(
+        "extract-data", upload_data["sha256"], EXTRACTOR_VERSION, extraction_cache_options(use_ocr, pipeline)
+    )
+    cached = await run_in_threadpool(RESULT_CACHE.get, key)
+    if cached is None:
+        await charge_request(request, page_cost(pages, needs_ocr(triage, use_ocr)))
+    
+    async def ndjson():
+        if cached is not None:
+            for event in result_events(cached, pages):
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+            return
+        async for event in stream_extraction(EXECUTOR, str(file_path), pages, use_ocr=use_ocr, pipeline=pipeline):
+            if event["event"] == "done":
+                # Gleiches Ergebnis wie /api/extract-data - auch dort ohne erneute Extraktion
+                await run_in_threadpool(RESULT_CACHE.put, key, event["data"])
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/analyze", response_model=AnalyzeResponse)
-async def analyze_abrechnung(request: AnalyzeRequest):
+async def analyze_abrechnung(request: AnalyzeRequest, http_request: Request):
     """
     Analysiert eine Abrechnung (Sprint 1: einfache Regeln)
     """
     # Check if abrechnung exists
-    if request.abrechnung_id not in UPLOADS:
+    upload_data = await UPLOADS.aget(request.abrechnung_id)
+    if upload_data is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Abrechnung '{request.abrechnung_id}' not found"
         )
     
-    upload_data = UPLOADS[request.abrechnung_id]
-    file_path = Path(upload_data["file_path"])
+    file_path = await resolve_upload_path(upload_data)
+    
+    _, pages = await triage_upload(upload_data, file_path)
+    await charge_request(http_request, page_cost(pages, ocr=False))
     
     # Extract text
-    text = extract_text_from_pdf(file_path)
+    text = await EXECUTOR.run_io(extract_text_from_pdf, file_path)
     
     # Analyze
     analysis_result = analyze_abrechnung_simple(text)
@@ -456,14 +625,14 @@ async def analyze_abrechnung(request: AnalyzeRequest):
     analyse_id = generate_id("ana")
     
     # Store analysis
-    ANALYSES[analyse_id] = {
+    await ANALYSES.aset(analyse_id, {
         "analyse_id": analyse_id,
         "abrechnung_id": request.abrechnung_id,
         "findings": [f.dict() for f in analysis_result["findings"]],
         "potential_savings_eur": analysis_result["total_savings"],
         "confidence": analysis_result["confidence"],
         "analyzed_at": datetime.now().isoformat()
-    }
+    })
     
     return AnalyzeResponse(
         analyse_id=analyse_id,
@@ -479,12 +648,8 @@ async def get_report(abrechnung_id: str):
     """
     Generiert und liefert HTML-Report
     """
-    # Find analysis for this abrechnung
-    analysis = None
-    for ana in ANALYSES.values():
-        if ana["abrechnung_id"] == abrechnung_id:
-            analysis = ana
-            break
+    # Find latest analysis for this abrechnung (indexed lookup)
+    analysis = await ANALYSES.afind_latest("abrechnung_id", abrechnung_id)
     
     if not analysis:
         raise HTTPException(
@@ -500,12 +665,12 @@ async def get_report(abrechnung_id: str):
     with open(report_path, 'w', encoding='utf-8') as f:
         f.write(html_content)
     
-    REPORTS[abrechnung_id] = {
+    await REPORTS.aset(abrechnung_id, {
         "abrechnung_id": abrechnung_id,
         "report_path": str(report_path),
         "format": "html",
         "generated_at": datetime.now().isoformat()
-    }
+    })
     
     return ReportResponse(
         report_url=f"/reports/{abrechnung_id}",
@@ -514,15 +679,16 @@ async def get_report(abrechnung_id: str):
     )
 
 @app.get("/reports/{abrechnung_id}")
-async def download_report(abrechnung_id: str):
+async def download_report(abrechnung_id: str, request: Request):
     """Download generated report"""
-    if abrechnung_id not in REPORTS:
+    report = await REPORTS.aget(abrechnung_id)
+    if report is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Report for '{abrechnung_id}' not found"
         )
     
-    report_path = Path(REPORTS[abrechnung_id]["report_path"])
+    report_path = Path(report["report_path"])
     
     if not report_path.exists():
         raise HTTPException(
@@ -530,16 +696,25 @@ async def download_report(abrechnung_id: str):
             detail="Report file not found on disk"
         )
     
-    return FileResponse(
-        path=report_path,
+    return await serve_file(
+        request.headers,
+        report_path,
+        method=request.method,
         media_type="text/html",
         filename=f"bericht_{abrechnung_id}.html"
     )
 
 @app.get("/files/{filename}")
-async def get_file(filename: str):
+async def get_file(filename: str, request: Request):
     """Serve uploaded files"""
-    file_path = STORAGE_DIR / filename
+    upload_data = await UPLOADS.aget(Path(filename).stem)
+    if upload_data:
+        # Upload-IDs zeigen immer auf denselben Blob → Content-Hash als ETag, unbegrenzt cachebar
+        file_path = await resolve_upload_path(upload_data)
+        etag = upload_data["sha256"]
+    else:
+        file_path = STORAGE_DIR / filename
+        etag = None
     
     if not file_path.exists():
         raise HTTPException(
@@ -547,7 +722,15 @@ async def get_file(filename: str):
             detail="File not found"
         )
     
-    return FileResponse(path=file_path)
+    # Blobs liegen ohne Endung auf Disk - Typ aus angefragtem Namen ableiten
+    return await serve_file(
+        request.headers,
+        file_path,
+        method=request.method,
+        media_type=mimetypes.guess_type(filename)[0],
+        etag=etag,
+        immutable=etag is not None
+    )
 
 # ============================================
 # ERROR HANDLERS
@@ -560,7 +743,20 @@ async def http_exception_handler(request, exc):
         content={
             "code": exc.status_code,
             "message": exc.detail
-        }
+        },
+        headers=exc.headers
+    )
+
+@app.exception_handler(ExecutorError)
+async def executor_exception_handler(request, exc):
+    headers = {"Retry-After": "5"} if exc.status_code == status.HTTP_503_SERVICE_UNAVAILABLE else None
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "code": exc.status_code,
+            "message": str(exc)
+        },
+        headers=headers
     )
 
 @app.exception_handler(Exception)
@@ -584,11 +780,17 @@ async def startup_event():
     print(f"📍 CORS Origins: {os.getenv('CORS_ALLOW_ORIGINS')}")
     print(f"💾 Storage Directory: {STORAGE_DIR}")
     print(f"📊 Uploads: {len(UPLOADS)}, Analyses: {len(ANALYSES)}, Reports: {len(REPORTS)}")
+    STORAGE_LIFECYCLE.start()
+    await JOB_MANAGER.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup"""
     print("👋 Shutting down...")
+    await STORAGE_LIFECYCLE.stop()
+    await JOB_MANAGER.stop()
+    await RATE_LIMITER.close()
+    EXECUTOR.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
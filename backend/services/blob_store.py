@@ -0,0 +1,280 @@
+"""
+Blob Store Service
+Content-addressed Ablage: eine physische Kopie pro SHA-256, Referenzzählung pro Upload.
+Die Bytes liegen im konfigurierten Object Storage (lokale Disk oder S3).
+"""
+import os
+import uuid
+import asyncio
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional
+from datetime import datetime
+
+from services.upload_stream import stream_upload_to_disk
+from services.metadata_store import get_metadata_store
+from services.object_storage import ObjectStorage, LocalDiskStorage, get_object_storage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOB_DIR = Path(tempfile.gettempdir()) / "nebenkosten-storage" / "blobs"
+
+# Wartezeit auf ein laufendes Löschen desselben Blobs; danach gilt die Markierung als verwaist
+# (abgestürzter Worker) und wird übernommen
+DELETE_WAIT_SECONDS = 30.0
+
+
+class BlobIndex:
+    """
+    In-Memory Index: sha256 → Blob-Metadaten (inkl. refcount).
+    refcount -1 markiert einen Blob, dessen Objekt gerade gelöscht wird.
+    """
+
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        record = self._records.get(sha256)
+        return dict(record) if record else None
+
+    def acquire(self, record: Dict[str, Any]) -> Optional[int]:
+        """Legt Blob mit refcount=1 an oder erhöht den refcount um 1 (None: wird gerade gelöscht)"""
+        with self._lock:
+            existing = self._records.get(record["sha256"])
+            if existing is None:
+                self._records[record["sha256"]] = {**record, "refcount": 1}
+                return 1
+            if existing["refcount"] < 0:
+                return None
+            existing["refcount"] += 1
+            return existing["refcount"]
+
+    def incr(self, sha256: str, delta: int) -> Optional[int]:
+        """Ändert refcount um delta (nie unter 0), gibt neuen Wert zurück (None = unbekannt)"""
+        with self._lock:
+            record = self._records.get(sha256)
+            if record is None or record["refcount"] + delta < 0:
+                return None
+            record["refcount"] += delta
+            return record["refcount"]
+
+    def mark_deleting(self, sha256: str) -> bool:
+        """refcount 0 → -1; True wenn dieser Aufrufer das Objekt löschen darf"""
+        with self._lock:
+            record = self._records.get(sha256)
+            if record is None or record["refcount"] != 0:
+                return False
+            record["refcount"] = -1
+            return True
+
+    def claim(self, record: Dict[str, Any]) -> Optional[int]:
+        """
+        Retention: n → -1 unabhängig vom refcount, gibt den bisherigen refcount zurück.
+        Unbekannte Blobs werden als Lösch-Markierung angelegt (0). None: wird bereits gelöscht.
+        """
+        with self._lock:
+            existing = self._records.get(record["sha256"])
+            if existing is None:
+                self._records[record["sha256"]] = {**record, "refcount": -1}
+                return 0
+            if existing["refcount"] < 0:
+                return None
+            previous = existing["refcount"]
+            existing["refcount"] = -1
+            return previous
+
+    def restore(self, sha256: str, refcount: int) -> None:
+        """Hebt eine Lösch-Markierung aus claim() wieder auf (-1 → refcount)"""
+        with self._lock:
+            record = self._records.get(sha256)
+            if record is not None and record["refcount"] == -1:
+                record["refcount"] = refcount
+
+    def remove(self, sha256: str) -> None:
+        with self._lock:
+            self._records.pop(sha256, None)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class BlobStore:
+    """Dedupliziert Uploads über ihren Content-Hash"""
+
+    def __init__(
+        self,
+        root: Path,
+        index: Optional[BlobIndex] = None,
+        backend: Optional[ObjectStorage] = None
+    ):
+        self.root = Path(root)
+        self.staging_dir = self.root / ".staging"
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        self.index = index if index is not None else BlobIndex()
+        self.backend = backend if backend is not None else LocalDiskStorage(self.root)
+
+    def get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        return self.index.get(sha256)
+
+    def local_path(self, sha256: str) -> Path:
+        """
+        Lokal lesbarer Pfad eines Blobs (blockierend).
+        Bei S3 wird der Blob bei Bedarf in den Scratch-Cache geladen.
+        """
+        return self.backend.local_path(sha256)
+
+    async def ingest_upload(self, upload, max_size: int) -> Dict[str, Any]:
+        """
+        Streamt ein UploadFile in den Store.
+
+        Returns:
+            Blob-Record {"sha256", "path", "size", "refcount", "created_at", "deduplicated"}
+        """
+        staging_path = self.staging_dir / uuid.uuid4().hex
+        stored = await stream_upload_to_disk(upload, staging_path, max_size)
+        # Backend-I/O (z.B. S3-Multipart-Upload) nicht im Event-Loop
+        return await asyncio.to_thread(
+            self.ingest_file, staging_path, stored["sha256"], stored["size"]
+        )
+
+    def ingest_file(self, staging_path: Path, sha256: str, size: int) -> Dict[str, Any]:
+        """
+        Übernimmt eine bereits gehashte Datei.
+        Existiert der Blob schon, wird nur der refcount erhöht (O(1), kein Kopieren).
+        """
+        record = {
+            "sha256": sha256,
+            "path": self.backend.uri(sha256),
+            "size": size,
+            "created_at": datetime.now().isoformat()
+        }
+
+        while True:
+            refcount = self._acquire(record)
+            record["refcount"] = refcount
+
+            if refcount == 1 or not self.backend.exists(sha256):
+                # Erste Referenz: immer schreiben (ein altes Objekt kann verwaist oder unvollständig sein)
+                self.backend.put_file(sha256, staging_path)
+                break
+
+            # Frischer Zugriff - schützt den Blob vor TTL/LRU-Eviction. Erst danach die Referenz
+            # prüfen: ein expire() dazwischen sieht den Zugriff und bricht ab
+            self.backend.touch(sha256)
+            current = self.index.get(sha256)
+            if current is not None and current["refcount"] > 0:
+                os.unlink(staging_path)
+                break
+            # Per Retention abgelaufen (expire) - die eben genommene Referenz ist mit verfallen
+
+        deduplicated = record["refcount"] > 1
+        if deduplicated:
+            logger.info(f"Blob {sha256[:12]} bereits vorhanden (refcount={record['refcount']})")
+        else:
+            logger.info(f"Neuer Blob {sha256[:12]} ({size} bytes)")
+
+        return {**record, "deduplicated": deduplicated}
+
+    def _acquire(self, record: Dict[str, Any]) -> int:
+        """
+        Nimmt eine Referenz (atomar, auch über Worker hinweg) - solange sie besteht,
+        löscht kein release() das Objekt. Wartet, solange der Blob gerade gelöscht wird.
+        """
+        sha256 = record["sha256"]
+        deadline = time.monotonic() + DELETE_WAIT_SECONDS
+        while True:
+            refcount = self.index.acquire(record)
+            if refcount is not None:
+                return refcount
+            if time.monotonic() > deadline:
+                logger.warning(f"Verwaiste Lösch-Markierung für Blob {sha256[:12]} übernommen")
+                self.index.remove(sha256)
+            time.sleep(0.05)
+
+    def release(self, sha256: str) -> bool:
+        """
+        Gibt eine Referenz frei. Die Datei wird gelöscht, sobald niemand mehr darauf zeigt.
+
+        Returns:
+            True wenn die physische Datei entfernt wurde
+        """
+        refcount = self.index.incr(sha256, -1)
+        if refcount is None or refcount > 0:
+            return False
+
+        # Löschen beanspruchen (0 → -1): schlägt fehl, wenn ein ingest_file() den Blob
+        # inzwischen wieder referenziert; neue Referenzen warten bis der Eintrag entfernt ist
+        if not self.index.mark_deleting(sha256):
+            return False
+        try:
+            self.backend.delete(sha256)
+        finally:
+            self.index.remove(sha256)
+
+        logger.info(f"Blob {sha256[:12]} gelöscht (keine Referenzen mehr)")
+        return True
+
+    def expire(
+        self,
+        sha256: str,
+        accessed: float,
+        on_expired: Optional[Callable[[str], None]] = None
+    ) -> bool:
+        """
+        Retention: löscht einen Blob auch mit bestehenden Referenzen (blockierend).
+
+        Args:
+            sha256: Content-Hash
+            accessed: Letzter Zugriff laut Sweep - wurde der Blob seitdem gelesen oder
+                erneut hochgeladen, bleibt er erhalten
+            on_expired: Markiert die Einträge, die noch auf den Blob zeigen (vor dem
+                Entfernen des Index-Eintrags, damit sie keine neue Referenz freigeben)
+
+        Returns:
+            True wenn das Objekt entfernt wurde
+        """
+        record = {
+            "sha256": sha256,
+            "path": self.backend.uri(sha256),
+            "size": 0,
+            "created_at": datetime.now().isoformat()
+        }
+        # Löschen beanspruchen (n → -1): neue Referenzen warten, release() ist ein No-op
+        refcount = self.index.claim(record)
+        if refcount is None:
+            return False
+
+        current_access = self.backend.last_access(sha256)
+        if current_access is None or current_access > accessed:
+            self.index.restore(sha256, refcount)
+            return False
+
+        try:
+            self.backend.delete(sha256)
+            if refcount > 0 and on_expired is not None:
+                on_expired(sha256)
+        finally:
+            self.index.remove(sha256)
+
+        logger.info(f"Blob {sha256[:12]} abgelaufen (Retention, {refcount} Referenzen)")
+        return True
+
+
+# Global Instance
+_blob_store = None
+
+def get_blob_store() -> BlobStore:
+    """Singleton Blob Store (geteilt von Nebenkosten- und Forms-API)"""
+    global _blob_store
+    if _blob_store is None:
+        root = Path(os.getenv("BLOB_STORE_DIR", str(DEFAULT_BLOB_DIR)))
+        _blob_store = BlobStore(
+            root,
+            index=get_metadata_store().blobs,
+            backend=get_object_storage(root)
+        )
+    return _blob_store
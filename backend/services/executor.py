@@ -0,0 +1,214 @@
+"""
+Executor Service
+Gemeinsame Worker-Pools: Prozesse für CPU-lastiges Parsen/OCR/Befüllen, Threads für I/O.
+Begrenzte Warteschlange, Timeouts pro Job und Abbruch - der Event-Loop blockiert nie.
+"""
+import os
+import asyncio
+import logging
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Module, die Worker-Prozesse beim Start vorladen (forkserver) - spart Importzeit pro Job
+PRELOAD_MODULES = [
+    "services.pdf_extraction_service",
+    "services.pdf_extractor",
+    "services.pdf_filler",
+]
+
+
+class ExecutorError(Exception):
+    """Basisklasse; status_code wird von den API-Handlern übernommen"""
+    status_code = 500
+
+
+class QueueFullError(ExecutorError):
+    """Zu viele wartende Jobs - Client soll später erneut versuchen"""
+    status_code = 503
+
+
+class JobTimeoutError(ExecutorError):
+    """Job hat JOB_TIMEOUT überschritten und wurde abgebrochen"""
+    status_code = 504
+
+
+def _default_cpu_workers() -> int:
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def mp_context():
+    """forkserver: Worker starten aus einem sauberen Prozess statt aus dem Server mit seinen Threads"""
+    methods = multiprocessing.get_all_start_methods()
+    method = os.getenv("CPU_START_METHOD") or ("forkserver" if "forkserver" in methods else "spawn")
+    ctx = multiprocessing.get_context(method)
+    if method == "forkserver":
+        ctx.set_forkserver_preload(PRELOAD_MODULES)
+    return ctx
+
+
+class _Pool:
+    """Ein Executor mit Zähler für laufende + wartende Jobs"""
+
+    def __init__(self, name: str, workers: int, max_queue_depth: int, factory: Callable[[], Executor]):
+        self.name = name
+        self.workers = workers
+        self.max_queue_depth = max_queue_depth
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self.generation = 0
+        self.in_flight = 0
+        self.metrics = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0,
+                        "timeouts": 0, "cancelled": 0, "recycled": 0}
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._factory()
+        return self._executor
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue_depth
+
+    def recycle(self) -> None:
+        """Ersetzt den Executor und beendet die alten Worker (nur Prozess-Pools)"""
+        old, self._executor = self._executor, None
+        self.generation += 1
+        self.metrics["recycled"] += 1
+        if old is None:
+            return
+        # Laufende Prozesse lassen sich nicht einzeln abbrechen - alten Pool hart beenden
+        for process in list(getattr(old, "_processes", {}).values()):
+            process.terminate()
+        old.shutdown(wait=False, cancel_futures=True)
+        logger.warning(f"{self.name}-Pool neu gestartet (Generation {self.generation})")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "max_queue_depth": self.max_queue_depth,
+            **self.metrics,
+        }
+
+
+class WorkerPools:
+    """
+    CPU-Jobs laufen in einem ProcessPoolExecutor, I/O-Jobs in einem ThreadPoolExecutor.
+
+    - Jobs über Kapazität (Worker + MAX_QUEUE_DEPTH) werden sofort mit QueueFullError abgelehnt
+    - Nach `timeout` wird der Job abgebrochen (JobTimeoutError); ein hängender CPU-Job
+      führt zum Neustart des Prozess-Pools, betroffene Nachbar-Jobs werden einmal neu eingereiht
+    - Wird der wartende Request abgebrochen, wird ein noch nicht gestarteter Job verworfen
+    """
+
+    def __init__(
+        self,
+        cpu_workers: int,
+        io_workers: int,
+        job_timeout: float,
+        max_queue_depth: int
+    ):
+        self.job_timeout = job_timeout
+        self.cpu = _Pool(
+            "CPU", cpu_workers, max_queue_depth,
+            lambda: ProcessPoolExecutor(max_workers=cpu_workers, mp_context=mp_context())
+        )
+        self.io = _Pool(
+            "I/O", io_workers, max_queue_depth,
+            lambda: ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="io-worker")
+        )
+
+    async def run_cpu(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Führt eine picklebare Top-Level-Funktion in einem Worker-Prozess aus"""
+        return await self._run(self.cpu, fn, args, kwargs, timeout, retry_on_recycle=True)
+
+    async def run_io(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Führt blockierende I/O in einem Thread aus (Timeout bricht nur das Warten ab)"""
+        return await self._run(self.io, fn, args, kwargs, timeout, retry_on_recycle=False)
+
+    async def _run(self, pool: _Pool, fn, args, kwargs, timeout, retry_on_recycle: bool) -> Any:
+        if pool.in_flight >= pool.capacity:
+            pool.metrics["rejected"] += 1
+            raise QueueFullError(
+                f"{pool.name}-Warteschlange voll ({pool.in_flight} Jobs) - bitte später erneut versuchen"
+            )
+
+        timeout = self.job_timeout if timeout is None else timeout
+        call = functools.partial(fn, *args, **kwargs)
+        pool.in_flight += 1
+        pool.metrics["submitted"] += 1
+        try:
+            for attempt in (1, 2):
+                generation = pool.generation
+                future = None
+                try:
+                    future = pool.executor.submit(call)
+                    result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+                    pool.metrics["completed"] += 1
+                    return result
+                except asyncio.TimeoutError:
+                    pool.metrics["timeouts"] += 1
+                    if not future.cancel() and isinstance(pool.executor, ProcessPoolExecutor):
+                        pool.recycle()
+                    raise JobTimeoutError(
+                        f"Job {getattr(fn, '__name__', fn)} nach {timeout:g}s abgebrochen"
+                    )
+                except asyncio.CancelledError:
+                    pool.metrics["cancelled"] += 1
+                    future.cancel()
+                    raise
+                except BrokenProcessPool:
+                    # Pool wurde neu gestartet (hängender Nachbar-Job) oder ein Worker ist abgestürzt
+                    if retry_on_recycle and attempt == 1:
+                        if pool.generation == generation:
+                            pool.recycle()
+                        continue
+                    pool.metrics["failed"] += 1
+                    raise
+                except Exception:
+                    pool.metrics["failed"] += 1
+                    raise
+        finally:
+            pool.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "job_timeout": self.job_timeout,
+            "cpu": self.cpu.stats(),
+            "io": self.io.stats(),
+        }
+
+    def shutdown(self) -> None:
+        self.cpu.shutdown()
+        self.io.shutdown()
+
+
+# Global Instance
+_worker_pools = None
+
+def get_executor() -> WorkerPools:
+    """Singleton Worker-Pools (CPU_WORKERS, IO_WORKERS, JOB_TIMEOUT, MAX_QUEUE_DEPTH)"""
+    global _worker_pools
+    if _worker_pools is None:
+        cpu_workers = int(os.getenv("CPU_WORKERS", str(_default_cpu_workers())))
+        _worker_pools = WorkerPools(
+            cpu_workers=cpu_workers,
+            io_workers=int(os.getenv("IO_WORKERS", "8")),
+            job_timeout=float(os.getenv("JOB_TIMEOUT", "120")),
+            max_queue_depth=int(os.getenv("MAX_QUEUE_DEPTH", str(cpu_workers * 4)))
+        )
+        logger.info(
+            f"✅ Worker-Pools: {cpu_workers} CPU-Prozesse, {_worker_pools.io.workers} I/O-Threads"
+        )
+    return _worker_pools
@@ -0,0 +1,185 @@
+"""
+Extraction Stream Service
+Seitenweise Extraktion als Event-Strom (NDJSON): Kopfdaten sobald gefunden, dann jede
+Kostenposition, am Ende Summen. Seiten werden in kleinen Blöcken im Prozess-Pool gelesen -
+Time-to-first-byte hängt nicht von der Seitenzahl ab, der Gesamttext wird nie aufgebaut.
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from services.executor import WorkerPools
+from services.pdf_extraction_service import MAX_POSITIONEN, extract_pdf_data, scan_page_range
+from services.pdf_triage import PIPELINE_NONE
+
+logger = logging.getLogger(__name__)
+
+# Seiten pro Worker-Aufruf; der nächste Block läuft schon, während der aktuelle gesendet wird
+STREAM_CHUNK_PAGES = int(os.getenv("STREAM_CHUNK_PAGES", "4"))
+
+HEADER_FIELDS = ("titel", "abrechnungszeitraum", "verwalter", "objekt_adresse")
+
+
+class StreamingExtraction:
+    """
+    Führt Seitenbefunde (scan_page_range) zu Events zusammen.
+
+    Kopfdaten folgen den Regeln von _parse_text: das erste Muster (Rang 0) gewinnt, bei
+    gleichem Rang die frühere Seite. Ein Rang-0-Treffer ist damit endgültig und wird sofort
+    gesendet, schwächere Treffer erst am Ende. Positionen wie in _parse_text: Tabellenzeilen
+    ersetzen die Treffer im Seitentext vollständig - Tabellenzeilen gehen sofort raus, Text-
+    Treffer werden gesammelt und nur gesendet, wenn das Dokument keine Tabellenzeilen hat.
+    """
+
+    def __init__(self, max_positionen: int = MAX_POSITIONEN):
+        self.max_positionen = max_positionen
+        self.best: Dict[str, Tuple[int, Any]] = {}
+        self.sent: set = set()
+        self.positionen: List[Dict[str, Any]] = []
+        self.text_positionen: List[Tuple[int, Dict[str, Any]]] = []
+        self.first_line: Optional[str] = None
+        self.raw_text = ""
+        self.ocr_pages: List[int] = []
+
+    def add_page(self, findings: Dict[str, Any]) -> List[Dict[str, Any]]:
+        events = []
+        page = findings["page"]
+        if findings["ocr"]:
+            self.ocr_pages.append(page)
+
+        if findings["has_text"]:
+            if self.first_line is None:
+                self.first_line = findings["first_line"]
+            if len(self.raw_text) < 1000:
+                self.raw_text = (self.raw_text + "\n" + findings["text_head"]).lstrip("\n")[:1000]
+
+        for field in HEADER_FIELDS + ("gesamtkosten",):
+            found = findings[field]
+            if found and (field not in self.best or found[0] < self.best[field][0]):
+                self.best[field] = tuple(found)
+
+        for field in HEADER_FIELDS:
+            if field not in self.sent and self.best.get(field, (None,))[0] == 0:
+                self.sent.add(field)
+                events.append({"event": "header", "field": field, "value": self.best[field][1], "page": page})
+
+        for position in findings["table_positionen"]:
+            if len(self.positionen) >= self.max_positionen:
+                break
+            self.positionen.append(position)
+            events.append({"event": "position", "page": page, "position": position})
+        if not self.positionen:
+            for position in findings["text_positionen"]:
+                if len(self.text_positionen) >= self.max_positionen:
+                    break
+                self.text_positionen.append((page, position))
+
+        events.append({"event": "page", "page": page, "ocr": findings["ocr"]})
+        return events
+
+    def _header_value(self, field: str) -> Any:
+        if field in self.best:
+            return self.best[field][1]
+        if field == "titel":
+            return self.first_line or "Nebenkostenabrechnung"
+        if field == "abrechnungszeitraum":
+            return str(datetime.now().year)
+        return "Nicht erkannt"
+
+    def finish(self) -> List[Dict[str, Any]]:
+        events = [
+            {"event": "header", "field": field, "value": self._header_value(field)}
+            for field in HEADER_FIELDS if field not in self.sent
+        ]
+        if not self.positionen:
+            for page, position in self.text_positionen:
+                self.positionen.append(position)
+                events.append({"event": "position", "page": page, "position": position})
+        data = {field: self._header_value(field) for field in HEADER_FIELDS}
+        data["gesamtkosten"] = self.best["gesamtkosten"][1] if "gesamtkosten" in self.best else 0.0
+        data["positionen"] = self.positionen
+        data["extraction_method"] = "pdfplumber+ocr" if self.ocr_pages else "pdfplumber"
+        data["raw_text"] = self.raw_text
+        if self.ocr_pages:
+            data["ocr_pages"] = self.ocr_pages
+        events.append(_totals(data))
+        events.append({"event": "done", "data": data})
+        return events
+
+
+def result_events(data: Dict[str, Any], pages: int) -> List[Dict[str, Any]]:
+    """Fertiges Ergebnis (Result-Cache, übersprungene Extraktion) als vollständiger Event-Strom"""
+    events = [{"event": "start", "pages": pages}]
+    events.extend({"event": "header", "field": field, "value": data.get(field)} for field in HEADER_FIELDS)
+    events.extend({"event": "position", "position": position} for position in data.get("positionen", []))
+    events.append(_totals(data))
+    events.append({"event": "done", "data": data})
+    return events
+
+
+def _totals(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "event": "totals",
+        "gesamtkosten": data["gesamtkosten"],
+        "summe_positionen": round(sum(p["betrag"] for p in data["positionen"]), 2),
+        "anzahl_positionen": len(data["positionen"]),
+    }
+
+
+async def stream_extraction(
+    executor: WorkerPools,
+    pdf_path: str,
+    pages: int,
+    use_ocr: bool = False,
+    chunk_pages: int = STREAM_CHUNK_PAGES,
+    pipeline: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Events: start → (header | position | page)* → header (Rest) → position (Text-Treffer)
+    → totals → done, bei Fehlern ein abschließendes `error`-Event (der Status 200 ist dann
+    schon gesendet). Mit use_ocr werden Seiten ohne Textebene im jeweiligen Block per OCR
+    erkannt. PIPELINE_NONE (Triage) überspringt die Extraktion wie extract_pdf_data.
+    """
+    if pipeline == PIPELINE_NONE:
+        try:
+            data = await executor.run_cpu(extract_pdf_data, pdf_path, use_ocr=use_ocr, pipeline=pipeline)
+        except Exception as e:
+            logger.error(f"❌ Streaming-Extraktion fehlgeschlagen ({pdf_path}): {e}")
+            yield {"event": "error", "detail": str(e) or type(e).__name__}
+            return
+        for event in result_events(data, pages):
+            yield event
+        return
+
+    yield {"event": "start", "pages": pages}
+    state = StreamingExtraction()
+    chunks = [(first, min(first + chunk_pages, pages)) for first in range(0, pages, chunk_pages)]
+
+    def submit(index: int) -> Optional[asyncio.Future]:
+        if index >= len(chunks):
+            return None
+        return asyncio.ensure_future(
+            executor.run_cpu(scan_page_range, pdf_path, *chunks[index], use_ocr=use_ocr)
+        )
+
+    pending = submit(0)
+    try:
+        index = 0
+        while pending is not None:
+            findings = await pending
+            index += 1
+            pending = submit(index)
+            for page in findings:
+                for event in state.add_page(page):
+                    yield event
+
+        for event in state.finish():
+            yield event
+    except Exception as e:
+        logger.error(f"❌ Streaming-Extraktion fehlgeschlagen ({pdf_path}): {e}")
+        yield {"event": "error", "detail": str(e) or type(e).__name__}
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -0,0 +1,126 @@
+"""
+Field Guesser
+Erkennt Formularfelder im Text von PDFs ohne AcroForm - Zeile für Zeile, in linearer Zeit.
+
+Eingabe-Marker (ein kompilierter Ausdruck, alle Wiederholungen begrenzt):
+    "Label: _______"   Unterstrich-Linie nach Doppelpunkt        → Textfeld (Label davor)
+    "Label [______]"   Klammerfeld mit mindestens 3 Zeichen      → Textfeld (Label davor)
+    "☐ Label", "[ ] Label", "[x] Label"                          → Checkbox (Label danach)
+
+Labels werden von Hand vom Marker aus gelesen (höchstens LABEL_MAX * 2 Zeichen rückwärts bzw.
+CHECKBOX_LABEL_MAX vorwärts, nie über den vorigen Marker hinaus) - jede Textstelle wird so nur
+konstant oft angefasst. Der Feldtyp kommt aus einem einzigen Schlüsselwort-Ausdruck, doppelte
+IDs bekommen ein Suffix (_2, _3, ...).
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+LABEL_MIN = 2
+LABEL_MAX = 100
+CHECKBOX_LABEL_MAX = 50
+# Längstes Klammerfeld "[....]" - begrenzt den Suchweg bei "[" ohne "]"
+BOX_MAX = 200
+
+LABEL_CHARS = frozenset(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÜabcdefghijklmnopqrstuvwxyzäöüß /()-.\t"
+)
+
+_MARKER = re.compile(
+    r"(?P<underline>:[ \t]*_{3,})"
+    r"|(?P<box>\[[^\]]{3,%d}\])"
+    r"|(?P<check>☐|\[[ xX]?\])" % BOX_MAX
+)
+
+# Feldtypen nach Priorität (erster Treffer in dieser Reihenfolge gewinnt) - Teilwort-Treffer
+# wie bisher, z.B. "Geburtsdatum" → date
+FIELD_TYPES = (
+    ("date", ("datum", "geburt", "date", "von", "bis")),
+    ("tel", ("telefon", "tel.", "mobil", "handy", "phone")),
+    ("email", ("mail",)),
+    ("iban", ("iban", "kontoverbindung")),
+    ("plz", ("plz", "postleitzahl")),
+    ("number", ("anzahl", "betrag", "summe", "höhe", "zahl", "nummer")),
+)
+_TYPE_KEYWORDS = re.compile("|".join(
+    f"(?P<{field_type}>{'|'.join(re.escape(word) for word in words)})"
+    for field_type, words in FIELD_TYPES
+))
+_TYPE_PRIORITY = {field_type: rank for rank, (field_type, _) in enumerate(FIELD_TYPES)}
+
+
+def normalize_field_id(label: str) -> str:
+    """Normalisiert Label zu field_id: 'Vorname' -> 'vorname'"""
+    # Sonderzeichen entfernen, Leerzeichen durch Underscore
+    field_id = re.sub(r'[^\w\s]', '', label)
+    field_id = field_id.lower().strip().replace(' ', '_')
+    return field_id
+
+
+def classify_label(label: str) -> str:
+    """Feldtyp aus dem Label - ein Durchlauf über alle Schlüsselwörter"""
+    best = None
+    for match in _TYPE_KEYWORDS.finditer(label.lower()):
+        rank = _TYPE_PRIORITY[match.lastgroup]
+        if best is None or rank < best:
+            best = rank
+            if rank == 0:
+                break
+    return FIELD_TYPES[best][0] if best is not None else "string"
+
+
+def _label_before(line: str, end: int, floor: int) -> Optional[str]:
+    """Label-Zeichen direkt vor `end` (nicht vor `floor`); None wenn zu lang oder zu kurz"""
+    limit = max(floor, end - LABEL_MAX * 2)
+    start = end
+    while start > limit and line[start - 1] in LABEL_CHARS:
+        start -= 1
+    if start == limit and limit > floor and line[start - 1] in LABEL_CHARS:
+        return None  # Lauf länger als die Obergrenze
+    label = line[start:end].strip()
+    return label if LABEL_MIN <= len(label) <= LABEL_MAX else None
+
+
+def _label_after(line: str, start: int) -> Optional[str]:
+    """Label-Zeichen nach einem Checkbox-Marker (mindestens ein Leerzeichen dazwischen)"""
+    if start >= len(line) or line[start] not in " \t":
+        return None
+    end = start
+    limit = min(len(line), start + CHECKBOX_LABEL_MAX + 1)
+    while end < limit and line[end] in LABEL_CHARS:
+        end += 1
+    label = line[start:end].strip()
+    return label if LABEL_MIN <= len(label) <= CHECKBOX_LABEL_MAX else None
+
+
+def guess_fields(text: str) -> List[Dict[str, Any]]:
+    """Felder in Textreihenfolge mit id, label, type, required, confidence"""
+    fields = []
+    seen: Dict[str, int] = {}
+
+    def add(label: str, field_type: str, confidence: float) -> None:
+        field_id = normalize_field_id(label)
+        if not field_id:
+            return
+        count = seen.get(field_id, 0) + 1
+        seen[field_id] = count
+        fields.append({
+            "id": field_id if count == 1 else f"{field_id}_{count}",
+            "label": label,
+            "type": field_type,
+            "required": False,
+            "confidence": confidence
+        })
+
+    for line in text.splitlines():
+        floor = 0
+        for match in _MARKER.finditer(line):
+            if match.lastgroup == "check":
+                label = _label_after(line, match.end())
+                if label:
+                    add(label, "checkbox", 0.7)
+            else:
+                label = _label_before(line, match.start(), floor)
+                if label:
+                    add(label, classify_label(label), 0.6)
+            floor = match.end()
+    return fields
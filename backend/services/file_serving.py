@@ -0,0 +1,277 @@
+"""
+File Serving Service
+Liefert Dateien mit starken ETags, Conditional GET (304), Byte-Ranges (206) und Zero-Copy.
+"""
+import os
+import stat
+import hashlib
+import logging
+import mimetypes
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Content-Hashes pro (Pfad, Größe, mtime) - begrenzt, damit der Cache nicht wächst
+_ETAG_CACHE: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_ETAG_CACHE_SIZE = 4096
+_ETAG_CACHE_LOCK = threading.Lock()
+
+
+def _hash_file(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+async def content_etag(path: Path, stat_result: os.stat_result) -> str:
+    """Starker ETag aus dem SHA-256 des Inhalts (gecacht pro Dateiversion)"""
+    key = (str(path), stat_result.st_size, stat_result.st_mtime_ns)
+    with _ETAG_CACHE_LOCK:
+        digest = _ETAG_CACHE.get(key)
+        if digest is not None:
+            _ETAG_CACHE.move_to_end(key)
+            return digest
+
+    digest = await anyio.to_thread.run_sync(_hash_file, path)
+
+    with _ETAG_CACHE_LOCK:
+        _ETAG_CACHE[key] = digest
+        while len(_ETAG_CACHE) > _ETAG_CACHE_SIZE:
+            _ETAG_CACHE.popitem(last=False)
+    return digest
+
+
+def _etag_matches(header_value: str, etag: str, weak: bool = True) -> bool:
+    """Vergleicht ETag-Liste aus If-None-Match / If-Range"""
+    for candidate in header_value.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if weak and candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _not_modified_since(header_value: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header_value).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def _parse_range(header_value: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parst einen einzelnen Byte-Range ("bytes=0-99", "bytes=100-", "bytes=-500").
+
+    Returns:
+        (start, end) inklusiv, None = Header ignorieren (ungültig / mehrere Ranges)
+
+    Raises:
+        ValueError: Range ist syntaktisch gültig, aber nicht erfüllbar (→ 416)
+    """
+    unit, _, spec = header_value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    first, last = first.strip(), last.strip()
+    if not sep:
+        return None
+
+    if first == "":
+        if not last.isdigit():
+            return None
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("range not satisfiable")
+        return max(size - suffix, 0), size - 1
+
+    if not first.isdigit() or (last and not last.isdigit()):
+        return None
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(Response):
+    """
+    Dateiantwort für einen Byte-Bereich.
+
+    Nutzt die ASGI-Extensions 'http.response.zerocopysend' (sendfile) bzw.
+    'http.response.pathsend', wenn der Server sie anbietet - sonst chunkweises Lesen.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        start: int,
+        length: int,
+        status_code: int,
+        headers: dict,
+        media_type: Optional[str]
+    ):
+        self.path = path
+        self.start = start
+        self.length = length
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if scope["method"] == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        full_file = self.start == 0 and self.status_code == 200
+
+        if full_file and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+
+        if "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            await f.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def serve_file(
+    request_headers: Headers,
+    path: Path,
+    method: str = "GET",
+    media_type: Optional[str] = None,
+    etag: Optional[str] = None,
+    immutable: bool = False,
+    filename: Optional[str] = None,
+    stat_result: Optional[os.stat_result] = None
+) -> Response:
+    """
+    Baut die passende Antwort für eine Datei: 200, 206, 304 oder 416.
+
+    Args:
+        request_headers: Header des Requests
+        path: Datei auf Disk
+        method: HTTP-Methode (Ranges nur bei GET)
+        media_type: Content-Type (sonst aus Dateiname geraten)
+        etag: Bekannter Content-Hash (z.B. Blob-SHA-256), sonst wird er berechnet
+        immutable: Inhalt ändert sich unter dieser URL nie (langes Caching)
+        filename: Als Download anbieten (Content-Disposition: attachment)
+        stat_result: Bereits ermittelter os.stat des Pfads
+    """
+    path = Path(path)
+    if stat_result is None:
+        stat_result = await anyio.to_thread.run_sync(os.stat, path)
+
+    size = stat_result.st_size
+    strong_etag = f'"{etag or await content_etag(path, stat_result)}"'
+
+    headers = {
+        "etag": strong_etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "accept-ranges": "bytes",
+        "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+    }
+    if filename:
+        headers["content-disposition"] = f"attachment; filename*=utf-8''{quote(filename)}"
+
+    if media_type is None:
+        media_type = mimetypes.guess_type(filename or path.name)[0] or "application/octet-stream"
+
+    # Conditional GET (If-None-Match hat Vorrang vor If-Modified-Since)
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, strong_etag):
+            return Response(status_code=304, headers=headers)
+    elif _not_modified_since(request_headers.get("if-modified-since"), stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request_headers.get("range")
+    if range_header and method == "GET":
+        if_range = request_headers.get("if-range")
+        range_valid = (
+            if_range is None
+            or _etag_matches(if_range, strong_etag, weak=False)
+            or (not if_range.startswith(('"', "W/")) and _not_modified_since(if_range, stat_result.st_mtime))
+        )
+
+        if range_valid:
+            try:
+                byte_range = _parse_range(range_header, size)
+            except ValueError:
+                return Response(
+                    status_code=416,
+                    headers={**headers, "content-range": f"bytes */{size}"}
+                )
+
+            if byte_range is not None:
+                start, end = byte_range
+                headers["content-range"] = f"bytes {start}-{end}/{size}"
+                return RangeFileResponse(path, start, end - start + 1, 206, headers, media_type)
+
+    return RangeFileResponse(path, 0, size, 200, headers, media_type)
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles mit ETag/Range/Zero-Copy-Handling aus serve_file()"""
+
+    async def get_response(self, path: str, scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                return await serve_file(
+                    Headers(scope=scope),
+                    Path(full_path),
+                    method=scope["method"],
+                    stat_result=stat_result
+                )
+        return await super().get_response(path, scope)
@@ -0,0 +1,357 @@
+"""
+Form Layout Detector
+Eingabefelder flacher PDFs (ohne AcroForm) aus der Vektorgrafik: Kästchen (rects), Unterstrich-
+Linien (lines) und kleine quadratische Checkboxen. Jeder Eingabebereich bekommt sein nächstes
+Label aus den Wörtern der Seite:
+
+    Text im Kasten (kleine Beschriftung oben links)  → Label
+    sonst Text links in derselben Zeile              → Label   ("Name  [__________]")
+    sonst Text direkt darüber                        → Label   (Beschriftung über dem Kasten)
+    Checkboxen: Text rechts daneben, sonst links
+
+Flächen (gefüllte oder randlose Rechtecke, z.B. graue Abschnittsbalken) und Kästen, deren Text
+sie ausfüllt (Überschrift im Rahmen), sind keine Eingabefelder.
+
+Die Text-Segmente liegen in einem Zeilen-Index (waagerechte Bänder zu BAND_HEIGHT Punkten) -
+die Suchfenster sind flach und breit, jeder Bereich prüft also nur die Segmente der ein bis
+zwei Bänder seiner Höhe statt aller Segmente der Seite.
+
+Koordinaten wie bei pdfplumber: Punkte, Ursprung oben links; bbox = [x0, top, x1, bottom].
+"""
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from services.field_guesser import LABEL_MAX, classify_label, normalize_field_id
+from services.layout_table import cluster_rows, row_cells
+
+try:
+    import pdfplumber
+    from pdfplumber.utils import extract_words
+    from pdfminer.layout import LTChar, LTContainer, LTLine, LTRect
+    HAS_PDFPLUMBER = True
+except ImportError:
+    HAS_PDFPLUMBER = False
+    logging.warning("pdfplumber nicht installiert - Layout-Felderkennung deaktiviert")
+
+logger = logging.getLogger(__name__)
+
+BAND_HEIGHT = 24.0
+
+MIN_INPUT_WIDTH = 30.0      # schmalere Kästen/Linien sind Deko oder Tabellenraster
+LINE_THICKNESS = 2.0        # dünne Rechtecke zählen als Linie
+LINE_INPUT_HEIGHT = 12.0    # Eingabebereich über einer Unterstrich-Linie
+BOX_MIN_HEIGHT = 8.0
+BOX_MAX_HEIGHT = 60.0       # größere Flächen sind Rahmen/Hintergründe
+BOX_TEXT_SPAN = 0.6         # Text über diesen Anteil der Kastenbreite/-höhe = kein Eingabefeld
+CHECKBOX_MIN = 5.0
+CHECKBOX_MAX = 16.0
+
+LEFT_REACH = 220.0          # Label links in derselben Zeile
+ABOVE_REACH = 24.0          # Label über dem Bereich
+RIGHT_REACH = 160.0         # Label rechts neben einer Checkbox
+TOLERANCE = 2.0
+
+KIND_BOX = "box"
+KIND_LINE = "line"
+KIND_CHECKBOX = "checkbox"
+
+
+class Region(NamedTuple):
+    x0: float
+    top: float
+    x1: float
+    bottom: float
+    kind: str
+
+
+class Segment(NamedTuple):
+    x0: float
+    top: float
+    x1: float
+    bottom: float
+    text: str
+
+
+class FormLayout(NamedTuple):
+    texts: List[str]                # Seitentext aus den Wörtern (leer, wenn nicht angefordert)
+    fields: List[Dict[str, Any]]
+
+
+class BandIndex:
+    """Waagerechte Bänder: Band → Segmente, die es überlappen"""
+
+    def __init__(self, segments: Sequence[Segment], height: float = BAND_HEIGHT):
+        self.height = height
+        self._bands: Dict[int, List[Segment]] = defaultdict(list)
+        for segment in segments:
+            for band in range(int(segment.top // height), int(segment.bottom // height) + 1):
+                self._bands[band].append(segment)
+
+    def query(self, x0: float, top: float, x1: float, bottom: float) -> List[Segment]:
+        """Segmente, deren bbox das Fenster schneidet (ohne Duplikate)"""
+        found = []
+        first = int(top // self.height)
+        for band in range(first, int(bottom // self.height) + 1):
+            for segment in self._bands.get(band, ()):
+                # Segment über mehrere Bänder nur im ersten abgefragten Band zählen
+                if band > first and int(segment.top // self.height) < band:
+                    continue
+                if segment.x0 <= x1 and segment.x1 >= x0 and segment.top <= bottom and segment.bottom >= top:
+                    found.append(segment)
+        return found
+
+
+def text_segments(words: Sequence[Dict[str, Any]]) -> List[Segment]:
+    """Wörter → Segmente (zusammenhängende Wortgruppen einer Zeile, siehe layout_table)"""
+    segments = []
+    for row in cluster_rows(words):
+        top = min(word["top"] for word in row)
+        bottom = max(word["bottom"] for word in row)
+        for cell in row_cells(row):
+            segments.append(Segment(cell.x0, top, cell.x1, bottom, cell.text))
+    return segments
+
+
+def _layout_items(objs) -> Iterator[Any]:
+    for obj in objs:
+        if isinstance(obj, LTContainer):
+            yield from _layout_items(obj)
+        else:
+            yield obj
+
+
+def page_objects(page) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    (Zeichen, Rechtecke, Linien) einer pdfplumber-Seite direkt aus deren pdfminer-Layout, nur mit
+    den Schlüsseln, die Wort- und Felderkennung brauchen. page.chars/rects/lines lösen für jedes
+    Objekt sämtliche Attribute auf (Farben, Grafikzustand) - das kostet mehr als das Parsen selbst.
+    Koordinaten wie pdfplumber (Page.process_object).
+    """
+    mb_x0, mb_top = page.mediabox[:2]
+    height, doctop = page.height, page.initial_doctop
+    chars, rects, lines = [], [], []
+    for obj in _layout_items(page.layout):
+        if not isinstance(obj, (LTChar, LTRect, LTLine)):
+            continue
+        top = height - obj.y1 + mb_top
+        item = {"x0": obj.x0 + mb_x0, "x1": obj.x1 + mb_x0, "top": top, "bottom": height - obj.y0 + mb_top}
+        if isinstance(obj, LTChar):
+            item.update(text=obj.get_text(), doctop=doctop + top, upright=obj.upright, size=obj.size)
+            chars.append(item)
+        elif isinstance(obj, LTRect):
+            item.update(fill=obj.fill, stroke=obj.stroke)
+            rects.append(item)
+        else:
+            lines.append(item)
+    return chars, rects, lines
+
+
+def page_text(words: Sequence[Dict[str, Any]]) -> str:
+    """Seitentext aus den Wörtern (Zeilen wie cluster_rows) - spart pdfplumbers extract_text"""
+    return "\n".join(" ".join(word["text"] for word in row) for row in cluster_rows(words))
+
+
+def _box_or_line(x0: float, top: float, x1: float, bottom: float) -> Optional[Region]:
+    width, height = x1 - x0, bottom - top
+    if CHECKBOX_MIN <= width <= CHECKBOX_MAX and CHECKBOX_MIN <= height <= CHECKBOX_MAX \
+            and abs(width - height) <= TOLERANCE:
+        return Region(x0, top, x1, bottom, KIND_CHECKBOX)
+    if width < MIN_INPUT_WIDTH:
+        return None
+    if height <= LINE_THICKNESS:
+        return Region(x0, bottom - LINE_INPUT_HEIGHT, x1, bottom, KIND_LINE)
+    if BOX_MIN_HEIGHT <= height <= BOX_MAX_HEIGHT:
+        return Region(x0, top, x1, bottom, KIND_BOX)
+    return None
+
+
+def _has_edge(verticals: Dict[int, List[Dict[str, Any]]], x: float, top: float, bottom: float) -> bool:
+    """Senkrechte Linie bei x, die von top bis bottom reicht"""
+    for key in range(round(x) - round(TOLERANCE), round(x) + round(TOLERANCE) + 1):
+        for line in verticals.get(key, ()):
+            if abs(line["x0"] - x) <= TOLERANCE and line["top"] <= top + TOLERANCE \
+                    and line["bottom"] >= bottom - TOLERANCE:
+                return True
+    return False
+
+
+def input_regions(rects: Sequence[Dict[str, Any]], lines: Sequence[Dict[str, Any]]) -> List[Region]:
+    """
+    Eingabebereiche aus Rechtecken und waagerechten Linien. Zwei gleich breite Linien im Abstand
+    einer Kastenhöhe, deren Enden senkrechte Linien verbinden (Kasten aus Einzellinien), werden zu
+    einem Kasten zusammengefasst - ohne Seitenkanten bleiben es untereinander stehende Linien.
+    """
+    regions = []
+    for rect in rects:
+        region = _box_or_line(rect["x0"], rect["top"], rect["x1"], rect["bottom"])
+        if region is None:
+            continue
+        # Gefüllte/randlose Kästen sind Balken und Hintergründe - dünne gefüllte Rechtecke
+        # zeichnen dagegen oft Unterstrich-Linien
+        if region.kind != KIND_LINE and (rect.get("fill") or not rect.get("stroke", True)):
+            continue
+        regions.append(region)
+
+    horizontal = []
+    verticals: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for line in lines:
+        if line["bottom"] - line["top"] <= LINE_THICKNESS and line["x1"] - line["x0"] >= MIN_INPUT_WIDTH:
+            horizontal.append(line)
+        elif line["x1"] - line["x0"] <= LINE_THICKNESS and line["bottom"] - line["top"] >= BOX_MIN_HEIGHT:
+            verticals[round(line["x0"])].append(line)
+    horizontal.sort(key=lambda line: (round(line["x0"]), round(line["x1"]), line["top"]))
+
+    index = 0
+    while index < len(horizontal):
+        line = horizontal[index]
+        following = horizontal[index + 1] if index + 1 < len(horizontal) else None
+        if (
+            following is not None
+            and (round(following["x0"]), round(following["x1"])) == (round(line["x0"]), round(line["x1"]))
+            and BOX_MIN_HEIGHT <= following["top"] - line["top"] <= BOX_MAX_HEIGHT
+            and _has_edge(verticals, line["x0"], line["top"], following["bottom"])
+            and _has_edge(verticals, line["x1"], line["top"], following["bottom"])
+        ):
+            regions.append(Region(line["x0"], line["top"], line["x1"], following["bottom"], KIND_BOX))
+            index += 2
+            continue
+        regions.append(Region(line["x0"], line["bottom"] - LINE_INPUT_HEIGHT, line["x1"], line["bottom"], KIND_LINE))
+        index += 1
+    return regions
+
+
+def _clean_label(text: str) -> Optional[str]:
+    label = text.strip().rstrip(":").strip()
+    if len(label) < 2 or len(label) > LABEL_MAX or not any(char.isalpha() for char in label):
+        return None
+    return label
+
+
+def _inside(region: Region, segment: Segment) -> bool:
+    middle_x = (segment.x0 + segment.x1) / 2
+    middle_y = (segment.top + segment.bottom) / 2
+    return region.x0 <= middle_x <= region.x1 and region.top <= middle_y <= region.bottom
+
+
+def _fills_box(region: Region, segments: Sequence[Segment]) -> bool:
+    width = max(segment.x1 for segment in segments) - min(segment.x0 for segment in segments)
+    height = max(segment.bottom for segment in segments) - min(segment.top for segment in segments)
+    return width >= BOX_TEXT_SPAN * (region.x1 - region.x0) or height >= BOX_TEXT_SPAN * (region.bottom - region.top)
+
+
+def find_label(region: Region, index: BandIndex) -> Optional[str]:
+    """Nächstes Label eines Eingabebereichs (Reihenfolge siehe Modul-Docstring)"""
+    if region.kind == KIND_CHECKBOX:
+        right = [
+            segment for segment in index.query(region.x1, region.top, region.x1 + RIGHT_REACH, region.bottom)
+            if segment.x0 >= region.x1 - TOLERANCE
+        ]
+        if right:
+            return _clean_label(min(right, key=lambda segment: segment.x0).text)
+    else:
+        inside = [segment for segment in index.query(*region[:4]) if _inside(region, segment)]
+        if inside:
+            # Kasten mit Beschriftung; zu viel Text oder Text über den ganzen Kasten = kein
+            # leeres Eingabefeld
+            text = " ".join(segment.text for segment in sorted(inside, key=lambda s: (s.top, s.x0)))
+            if len(text) > LABEL_MAX or _fills_box(region, inside):
+                return None
+            return _clean_label(text)
+
+    left = [
+        segment for segment in index.query(region.x0 - LEFT_REACH, region.top, region.x0, region.bottom)
+        if segment.x1 <= region.x0 + TOLERANCE
+    ]
+    if left:
+        return _clean_label(max(left, key=lambda segment: segment.x1).text)
+
+    if region.kind != KIND_CHECKBOX:
+        above = [
+            segment for segment in index.query(region.x0, region.top - ABOVE_REACH, region.x1, region.top)
+            if segment.bottom <= region.top + TOLERANCE
+        ]
+        if above:
+            return _clean_label(max(above, key=lambda segment: (segment.bottom, -segment.x0)).text)
+    return None
+
+
+def detect_page_fields(
+    words: Sequence[Dict[str, Any]],
+    rects: Sequence[Dict[str, Any]],
+    lines: Sequence[Dict[str, Any]],
+    page_number: int
+) -> List[Dict[str, Any]]:
+    """Felder einer Seite (ohne eindeutige IDs - siehe detect_fields)"""
+    regions = input_regions(rects, lines)
+    if not regions:
+        return []
+    index = BandIndex(text_segments(words))
+    fields = []
+    for region in sorted(regions, key=lambda region: (round(region.top), region.x0)):
+        label = find_label(region, index)
+        if label is None:
+            continue
+        fields.append({
+            "id": normalize_field_id(label),
+            "label": label,
+            "type": "checkbox" if region.kind == KIND_CHECKBOX else classify_label(label),
+            "required": False,
+            "confidence": 0.65,
+            "page": page_number,
+            "bbox": [round(value, 1) for value in region[:4]],
+        })
+    return fields
+
+
+def unique_field_ids(fields: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    IDs aus den Labels, doppelte mit Zähler ("name", "name_2") - auch zum Zusammenführen der
+    Felder mehrerer Seitenbereiche. Felder ohne ID (Label ohne Buchstaben/Ziffern) entfallen.
+    """
+    unique = []
+    seen: Dict[str, int] = {}
+    for field in fields:
+        field_id = normalize_field_id(field["label"])
+        if not field_id:
+            continue
+        count = seen.get(field_id, 0) + 1
+        seen[field_id] = count
+        unique.append(dict(field, id=field_id if count == 1 else f"{field_id}_{count}"))
+    return unique
+
+
+def detect_form_layout(
+    pdf_path: str,
+    page_numbers: Optional[Sequence[int]] = None,
+    with_text: bool = True,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> FormLayout:
+    """
+    Ein pdfplumber-Durchlauf: Layout-Felder (mit eindeutigen IDs) und - mit `with_text` -
+    der Text jeder Seite (aus denselben Wörtern). `page_numbers` sind 0-basiert.
+    """
+    if not HAS_PDFPLUMBER:
+        return FormLayout([], [])
+
+    texts, fields = [], []
+    with pdfplumber.open(pdf_path) as pdf:
+        indices = list(page_numbers) if page_numbers is not None else list(range(len(pdf.pages)))
+        for done, page_index in enumerate(indices, start=1):
+            page = pdf.pages[page_index]
+            try:
+                chars, rects, lines = page_objects(page)
+                # Seiten ohne Vektorgrafik: Wörter nur für den Text
+                words = extract_words(chars) if with_text or rects or lines else []
+                if with_text:
+                    texts.append(page_text(words))
+                page_fields = detect_page_fields(words, rects, lines, page_index + 1)
+            finally:
+                page.close()
+            fields.extend(page_fields)
+            if progress:
+                progress(done, len(indices))
+
+    fields = unique_field_ids(fields)
+    logger.info(f"Detected {len(fields)} layout fields on {len(indices)} pages")
+    return FormLayout(texts, fields)
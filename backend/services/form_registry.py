@@ -0,0 +1,224 @@
+"""
+Form Registry Service
+Vorlagen-Register für wiederkehrende Formulare (Wohngeld, BAföG, Kindergeld ...): ein
+Struktur-Fingerprint (AcroForm-Feldnamen + -typen, Seitengeometrie - ohne ausgefüllte Werte)
+verweist auf ein fertiges FormSchema. Treffer sparen die komplette Extraktion.
+
+Quellen, in dieser Reihenfolge:
+    kuratiert - JSON-Dateien in FORM_TEMPLATES_DIR ({"fingerprint", "template_id", "title", "fields"})
+    gelernt   - Tabelle form_templates; bei jedem Miss wird das extrahierte Schema eingetragen
+
+Statistiken (Treffer, Latenz) gelten pro Worker-Prozess.
+"""
+import os
+import copy
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections.abc import MutableMapping
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from services.metadata_store import get_metadata_store
+from services.pdf_extractor import EXTRACTOR_VERSION, HAS_PIKEPDF, acroform_fields, rebind_form_schema
+
+if HAS_PIKEPDF:
+    import pikepdf
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "form_templates"
+
+SOURCE_CURATED = "curated"
+SOURCE_LEARNED = "learned"
+
+
+class FormStructure(NamedTuple):
+    fingerprint: str
+    values: Dict[str, Any]   # Feld-ID → ausgefüllter Wert dieses Uploads
+
+
+def read_form_structure(pdf_path: str) -> Optional[FormStructure]:
+    """
+    Fingerprint + Feldwerte eines PDFs; None ohne AcroForm-Felder (dann gibt es keine
+    verlässliche Struktur) oder wenn die Datei nicht lesbar ist. Blockierend.
+    """
+    if not HAS_PIKEPDF:
+        return None
+    try:
+        with pikepdf.open(pdf_path) as pdf:
+            fields = acroform_fields(pdf)
+            if not fields:
+                return None
+            pages = [
+                [round(float(value), 1) for value in page.mediabox] + [int(page.obj.get("/Rotate", 0))]
+                for page in pdf.pages
+            ]
+    except Exception as e:
+        logger.debug(f"Formular-Struktur nicht lesbar ({Path(pdf_path).name}): {e}")
+        return None
+
+    material = json.dumps(
+        {"fields": sorted([field["id"], field["type"]] for field in fields), "pages": pages},
+        separators=(",", ":")
+    )
+    return FormStructure(
+        fingerprint=hashlib.sha256(material.encode("utf-8")).hexdigest(),
+        values={field["id"]: field["value"] for field in fields}
+    )
+
+
+class FormRegistry:
+    """Fingerprint → FormSchema aus kuratierten Vorlagen oder gelernten Einträgen"""
+
+    def __init__(
+        self,
+        curated: Dict[str, Dict[str, Any]],
+        learned: Optional[MutableMapping] = None,
+        learn: bool = True
+    ):
+        self.curated = curated
+        self.learned = learned
+        self.learn_enabled = learn and learned is not None
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, float] = {
+            "hits_curated": 0, "hits_learned": 0, "misses": 0, "learned": 0, "errors": 0,
+            "hit_seconds": 0.0, "miss_seconds": 0.0,
+        }
+
+    @classmethod
+    def from_directory(cls, directory: Path, learned: Optional[MutableMapping] = None, learn: bool = True):
+        curated = {}
+        if directory.is_dir():
+            for path in sorted(directory.glob("*.json")):
+                try:
+                    template = json.loads(path.read_text(encoding="utf-8"))
+                    curated[template["fingerprint"]] = {
+                        "template_id": template.get("template_id", path.stem),
+                        "schema": {
+                            "form_id": template.get("template_id", path.stem),
+                            "title": template["title"],
+                            "fields": template["fields"],
+                            "source": {"file": ""},
+                        }
+                    }
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Formular-Vorlage übersprungen ({path.name}): {e}")
+        logger.info(f"📋 Form Registry: {len(curated)} kuratierte Vorlagen")
+        return cls(curated, learned, learn)
+
+    def _find(self, fingerprint: str):
+        template = self.curated.get(fingerprint)
+        if template is not None:
+            return SOURCE_CURATED, template
+        if self.learned is None:
+            return None, None
+        try:
+            template = self.learned.get(fingerprint)
+        except Exception as e:
+            logger.warning(f"Gelernte Formular-Vorlage nicht lesbar: {e}")
+            with self._lock:
+                self.metrics["errors"] += 1
+            return None, None
+        # Vorlagen einer älteren Extraktor-Version neu lernen
+        if template is None or template.get("extractor_version") != EXTRACTOR_VERSION:
+            return None, None
+        return SOURCE_LEARNED, template
+
+    def match(
+        self,
+        pdf_path: str,
+        form_id: str,
+        filename: Optional[str] = None,
+        kind: Optional[str] = None
+    ) -> Tuple[Optional[FormStructure], Optional[Dict[str, Any]]]:
+        """
+        (FormStructure, FormSchema) - Schema nur bei einem Treffer, mit den Feldwerten dieses
+        Uploads. Structure ist None für PDFs ohne AcroForm. Blockierend.
+        """
+        started = time.perf_counter()
+        structure = read_form_structure(pdf_path)
+        if structure is None:
+            return None, None
+
+        source, template = self._find(structure.fingerprint)
+        if template is None:
+            with self._lock:
+                self.metrics["misses"] += 1
+            return structure, None
+
+        schema = copy.deepcopy(template["schema"])
+        for field in schema["fields"]:
+            field["value"] = structure.values.get(field["id"])
+        schema = rebind_form_schema(schema, form_id, filename, pdf_path)
+        schema["source"].update(
+            has_acroform=True, kind=kind, template=template["template_id"], template_source=source
+        )
+        schema["stats"] = {**(schema.get("stats") or {}), "field_count": len(schema["fields"])}
+
+        with self._lock:
+            self.metrics[f"hits_{source}"] += 1
+            self.metrics["hit_seconds"] += time.perf_counter() - started
+        return structure, schema
+
+    def learn(self, structure: Optional[FormStructure], schema: Dict[str, Any], elapsed: float) -> None:
+        """Miss abschließen: Extraktionszeit erfassen und das Schema als Vorlage speichern"""
+        if structure is None:
+            return  # kein AcroForm - kein Registry-Lookup
+        with self._lock:
+            self.metrics["miss_seconds"] += elapsed
+        if not self.learn_enabled or not schema["source"].get("has_acroform"):
+            return
+
+        template = copy.deepcopy(schema)
+        for field in template["fields"]:
+            field["value"] = None
+        try:
+            self.learned[structure.fingerprint] = {
+                "template_id": f"learned/{structure.fingerprint[:12]}",
+                "extractor_version": EXTRACTOR_VERSION,
+                "schema": template,
+            }
+        except Exception as e:
+            logger.warning(f"Formular-Vorlage nicht gespeichert: {e}")
+            with self._lock:
+                self.metrics["errors"] += 1
+            return
+        with self._lock:
+            self.metrics["learned"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self.metrics)
+        hits = metrics["hits_curated"] + metrics["hits_learned"]
+        lookups = hits + metrics["misses"]
+        return {
+            "curated_templates": len(self.curated),
+            "hits_curated": int(metrics["hits_curated"]),
+            "hits_learned": int(metrics["hits_learned"]),
+            "misses": int(metrics["misses"]),
+            "learned": int(metrics["learned"]),
+            "errors": int(metrics["errors"]),
+            "hit_ratio": round(hits / lookups, 3) if lookups else None,
+            "avg_hit_ms": round(metrics["hit_seconds"] / hits * 1000, 2) if hits else None,
+            "avg_miss_ms": (
+                round(metrics["miss_seconds"] / metrics["misses"] * 1000, 2) if metrics["misses"] else None
+            ),
+        }
+
+
+# Global Instance
+_form_registry = None
+
+def get_form_registry() -> FormRegistry:
+    """Singleton Form Registry (FORM_TEMPLATES_DIR, FORM_REGISTRY_LEARN)"""
+    global _form_registry
+    if _form_registry is None:
+        _form_registry = FormRegistry.from_directory(
+            Path(os.getenv("FORM_TEMPLATES_DIR") or DEFAULT_TEMPLATES_DIR),
+            learned=get_metadata_store().form_templates,
+            learn=os.getenv("FORM_REGISTRY_LEARN", "true").lower() in ("1", "true", "yes")
+        )
+    return _form_registry
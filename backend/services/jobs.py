@@ -0,0 +1,469 @@
+"""
+Job Service
+Hintergrund-Jobs für lange Extraktionen: sofortige Job-ID, Abarbeitung aus einer Queue,
+Status und Seiten-Fortschritt im Metadata Store.
+Backends: lokale asyncio-Queue + Prozess-Pool (Default) oder Celery (JOB_BACKEND=celery).
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from services.metadata_store import get_metadata_store
+from services.blob_store import get_blob_store
+from services.executor import get_executor, mp_context, QueueFullError
+from services.pdf_extraction_service import (
+    EXTRACTOR_VERSION, extract_pdf_data, extraction_cache_options
+)
+from services.pdf_extractor import EXTRACTOR_VERSION as FORM_EXTRACTOR_VERSION
+from services.pdf_extractor import extract_form, form_cache_options
+from services.result_cache import cache_key, get_result_cache
+from services.request_costs import pdf_page_count
+from services.sharded_extraction import (
+    extract_form_sharded, extract_pdf_data_sharded, should_shard
+)
+
+try:
+    from celery import Celery
+    HAS_CELERY = True
+except ImportError:
+    HAS_CELERY = False
+
+logger = logging.getLogger(__name__)
+
+JOB_BACKEND = os.getenv("JOB_BACKEND", "local").lower()
+JOB_TIMEOUT = float(os.getenv("JOB_BACKGROUND_TIMEOUT", "1800"))  # seconds
+TERMINAL_STATES = ("succeeded", "failed")
+# Abgeschlossene Jobs (inkl. Ergebnis) so lange abrufbar, danach löscht sie der Storage-Sweep
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "168"))
+
+# Fortschritt höchstens alle 250ms in den Store schreiben (letzte Seite immer)
+PROGRESS_INTERVAL = 0.25
+
+
+# ============================================
+# JOB KINDS
+# ============================================
+
+class JobKind(NamedTuple):
+    """
+    run:      picklebare Top-Level-Funktion (pdf_path, progress=..., **args)
+    finalize: (job, result) → gespeichertes Ergebnis, läuft nach Erfolg im API-/Celery-Prozess
+    on_error: (job) → Aufräumen nach Fehlschlag
+    run_sharded: async (executor, pdf_path, pages, progress=..., **args) - parallel nach
+              Seitenbereichen, nur lokales Backend und große PDFs (siehe should_shard)
+    """
+    run: Callable
+    finalize: Optional[Callable[[Dict[str, Any], Any], Any]] = None
+    on_error: Optional[Callable[[Dict[str, Any]], None]] = None
+    run_sharded: Optional[Callable[..., Awaitable[Any]]] = None
+
+
+def _finalize_extract_data(job: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    args = job["args"]
+    get_result_cache().put(
+        cache_key("extract-data", job["sha256"], EXTRACTOR_VERSION,
+                  extraction_cache_options(args["use_ocr"], args.get("pipeline"))),
+        data
+    )
+    context = job["context"]
+    return {"abrechnung_id": context["abrechnung_id"], "data": data, "triage": context.get("triage")}
+
+
+def _finalize_forms_extract(job: Dict[str, Any], schema: Dict[str, Any]) -> Dict[str, Any]:
+    args = job["args"]
+    get_result_cache().put(
+        cache_key("forms-extract", job["sha256"], FORM_EXTRACTOR_VERSION,
+                  form_cache_options(args["ocr_enabled"], args.get("triage"))),
+        schema
+    )
+    context = job["context"]
+    get_metadata_store().forms[context["form_id"]] = {
+        "schema": schema,
+        "file_path": context["blob_path"],
+        "filename": context["filename"],
+        "sha256": job["sha256"]
+    }
+    return {"upload_id": context["form_id"], "form_schema": schema, "triage": context.get("triage")}
+
+
+def _release_blob(job: Dict[str, Any]) -> None:
+    get_blob_store().release(job["sha256"])
+
+
+JOB_KINDS: Dict[str, JobKind] = {
+    "extract-data": JobKind(
+        run=extract_pdf_data, finalize=_finalize_extract_data, run_sharded=extract_pdf_data_sharded
+    ),
+    "forms-extract": JobKind(
+        run=extract_form, finalize=_finalize_forms_extract, on_error=_release_blob,
+        run_sharded=extract_form_sharded
+    ),
+}
+
+
+def run_job_in_worker(kind: str, pdf_path: str, args: Dict[str, Any], job_id: str, progress_queue) -> Any:
+    """Einstieg im Worker-Prozess - Fortschritt geht über die Manager-Queue zurück"""
+    def progress(done: int, total: int) -> None:
+        progress_queue.put((job_id, done, total))
+
+    return JOB_KINDS[kind].run(pdf_path, progress=progress, **args)
+
+
+# ============================================
+# STORE HELPERS
+# ============================================
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _update_job(store, job_id: str, **fields) -> Dict[str, Any]:
+    job = store[job_id]
+    job.update(fields)
+    job["updated_at"] = _now()
+    store[job_id] = job
+    return job
+
+
+def _complete_job(store, job: Dict[str, Any], result: Any) -> Dict[str, Any]:
+    kind = JOB_KINDS[job["kind"]]
+    stored = kind.finalize(job, result) if kind.finalize else result
+    return _update_job(store, job["job_id"], status="succeeded", result=stored, finished_at=_now())
+
+
+def _fail_job(store, job: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    kind = JOB_KINDS[job["kind"]]
+    logger.error(f"Job {job['job_id']} ({job['kind']}) fehlgeschlagen: {error}")
+    if kind.on_error:
+        try:
+            kind.on_error(job)
+        except Exception as e:
+            logger.warning(f"on_error für Job {job['job_id']} fehlgeschlagen: {e}")
+    return _update_job(
+        store, job["job_id"], status="failed", error=str(error) or type(error).__name__, finished_at=_now()
+    )
+
+
+def job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Öffentliche Sicht auf einen Job (ohne interne Parameter)"""
+    return {
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "status_url": f"/jobs/{job['job_id']}",
+        "events_url": f"/jobs/{job['job_id']}/events",
+    }
+
+
+# ============================================
+# MANAGER
+# ============================================
+
+class JobManager:
+    """
+    Nimmt Jobs an und verarbeitet sie.
+
+    local:  asyncio-Queue mit `concurrency` Consumer-Tasks; die eigentliche Arbeit läuft im
+            Prozess-Pool des Executors, Fortschritt kommt über eine Manager-Queue zurück.
+    celery: Jobs werden als Task 'jobs.run' eingereiht; Status/Fortschritt schreibt der
+            Celery-Worker direkt in den (geteilten) Metadata Store.
+    """
+
+    def __init__(
+        self,
+        backend: str = "local",
+        concurrency: int = 2,
+        queue_size: int = 100,
+        timeout: float = JOB_TIMEOUT
+    ):
+        self.store = get_metadata_store().jobs
+        self.backend = backend
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._mp_manager = None
+        self._progress_queue = None
+        self._forwarder: Optional[asyncio.Task] = None
+        self._changed: Dict[str, asyncio.Event] = {}
+        # Nur laufende Jobs - späte Fortschrittsmeldungen beendeter Jobs werden verworfen
+        self._last_progress_write: Dict[str, float] = {}
+        self._progress_tasks: set = set()
+        # Store-Zugriffe laufen im Thread-Pool (Postgres = Netzwerk-Roundtrip); _update_job liest
+        # und schreibt den ganzen Eintrag - Updates desselben Managers deshalb nacheinander
+        self._store_lock = asyncio.Lock()
+
+    # --- Lifecycle -------------------------------------------------------
+
+    async def start(self) -> None:
+        if self.backend != "local" or self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        logger.info(f"✅ Job-Queue aktiv ({self.backend}, {self.concurrency} parallel)")
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+        self._queue = None
+
+        if self._progress_queue is not None:
+            self._progress_queue.put(None)  # Forwarder beenden
+            if self._forwarder is not None:
+                await self._forwarder
+        if self._mp_manager is not None:
+            self._mp_manager.shutdown()
+        self._progress_queue = self._mp_manager = self._forwarder = None
+
+    # --- API ---------------------------------------------------------------
+
+    async def submit(
+        self,
+        kind: str,
+        sha256: str,
+        args: Dict[str, Any],
+        context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Legt einen Job an und reiht ihn ein.
+
+        Raises:
+            QueueFullError: Lokale Queue ist voll (→ 503)
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unbekannter Job-Typ: {kind}")
+        if self.backend == "local" and self._queue is not None and self._queue.full():
+            raise QueueFullError("Job-Queue voll - bitte später erneut versuchen")
+
+        job_id = f"job_{uuid.uuid4().hex[:16]}"
+        job = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "sha256": sha256,
+            "args": args,
+            "context": context or {},
+            "progress": {"done": 0, "total": None},
+            "backend": self.backend,
+            "created_at": _now(),
+            "updated_at": _now(),
+        }
+        await self.store.aset(job_id, job)
+
+        if self.backend == "celery":
+            await asyncio.to_thread(celery_app.send_task, "jobs.run", args=[job_id])
+        else:
+            if self._queue is None:
+                await self.start()
+            self._queue.put_nowait(job_id)
+
+        logger.info(f"Job {job_id} ({kind}) eingereiht")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.store.aget(job_id)
+
+    def purge_finished(self) -> int:
+        """Löscht abgeschlossene Jobs älter als JOB_RETENTION_HOURS (blockierend - Storage-Sweep)"""
+        before = datetime.now() - timedelta(hours=JOB_RETENTION_HOURS)
+        removed = self.store.purge("status", TERMINAL_STATES, before)
+        if removed:
+            logger.info(f"🧹 {removed} abgeschlossene Jobs entfernt")
+        return removed
+
+    async def wait_for_change(self, job_id: str, timeout: float) -> bool:
+        """Wartet auf ein lokales Update (oder Timeout - Updates anderer Prozesse werden gepollt)"""
+        event = self._changed.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            # Jobs anderer Worker melden sich hier nie - Event nicht liegen lassen
+            # (weitere Wartende auf dasselbe Event pollen nach ihrem Timeout)
+            if self._changed.get(job_id) is event:
+                del self._changed[job_id]
+            return False
+
+    # --- Verarbeitung (local) -----------------------------------------------
+
+    async def _update(self, job_id: str, **fields) -> Dict[str, Any]:
+        return await self._write(job_id, _update_job, job_id, **fields)
+
+    async def _write(self, job_id: str, fn: Callable, *args, **kwargs) -> Dict[str, Any]:
+        """fn(store, *args) im Thread-Pool, danach Wartende auf den Job wecken"""
+        async with self._store_lock:
+            job = await asyncio.to_thread(fn, self.store, *args, **kwargs)
+        self._notify(job_id)
+        return job
+
+    def _notify(self, job_id: str) -> None:
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def _get_progress_queue(self):
+        """Manager-Queue (picklebar, prozessübergreifend) + Forwarder-Task, lazy gestartet"""
+        if self._progress_queue is None:
+            self._mp_manager = mp_context().Manager()
+            self._progress_queue = self._mp_manager.Queue()
+            self._forwarder = asyncio.create_task(self._forward_progress())
+        return self._progress_queue
+
+    async def _forward_progress(self) -> None:
+        queue = self._progress_queue
+        while True:
+            message = await asyncio.to_thread(queue.get)
+            if message is None:
+                return
+            await self._record_progress(*message)
+
+    def _schedule_progress(self, job_id: str, done: int, total: int) -> None:
+        """Synchroner Fortschritts-Callback im Event-Loop (sharded Jobs) - schreibt als Task"""
+        task = asyncio.ensure_future(self._record_progress(job_id, done, total))
+        self._progress_tasks.add(task)
+        task.add_done_callback(self._progress_tasks.discard)
+
+    async def _record_progress(self, job_id: str, done: int, total: int) -> None:
+        last_write = self._last_progress_write.get(job_id)
+        if last_write is None:
+            return  # Job bereits beendet
+        now = time.monotonic()
+        if done < total and now - last_write < PROGRESS_INTERVAL:
+            return
+        self._last_progress_write[job_id] = now
+        try:
+            await self._update(job_id, progress={"done": done, "total": total})
+        except KeyError:
+            pass
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._process(job_id)
+            except Exception as e:
+                logger.error(f"Job-Worker Fehler bei {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job_id: str) -> None:
+        job = await self._update(job_id, status="running", started_at=_now())
+        self._last_progress_write[job_id] = 0.0
+        kind = JOB_KINDS[job["kind"]]
+        executor = get_executor()
+        try:
+            pdf_path = await asyncio.to_thread(get_blob_store().local_path, job["sha256"])
+            pages = await asyncio.to_thread(pdf_page_count, pdf_path) if kind.run_sharded else 0
+            # Auf freie Pool-Plätze höchstens so lange warten wie der Job laufen dürfte
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    if kind.run_sharded and should_shard(pages, executor.cpu.workers):
+                        # Fortschritt kommt hier direkt im Event-Loop an (pro fertigem Bereich)
+                        result = await asyncio.wait_for(
+                            kind.run_sharded(
+                                executor, str(pdf_path), pages,
+                                progress=lambda done, total: self._schedule_progress(job_id, done, total),
+                                **job["args"]
+                            ),
+                            self.timeout
+                        )
+                    else:
+                        result = await executor.run_cpu(
+                            run_job_in_worker, job["kind"], str(pdf_path), job["args"], job_id,
+                            self._get_progress_queue(), timeout=self.timeout
+                        )
+                    break
+                except QueueFullError:
+                    # Synchrone Requests belegen den Pool - Job wartet statt sofort zu scheitern
+                    if time.monotonic() >= deadline:
+                        raise
+                    await asyncio.sleep(1)
+            await self._write(job_id, _complete_job, job, result)
+        except Exception as e:
+            await self._write(job_id, _fail_job, job, e)
+        finally:
+            self._last_progress_write.pop(job_id, None)
+            self._notify(job_id)
+
+
+# ============================================
+# CELERY
+# ============================================
+
+def run_job_sync(job_id: str) -> None:
+    """Verarbeitet einen Job im aktuellen Prozess (Celery-Worker)"""
+    store = get_metadata_store().jobs
+    job = _update_job(store, job_id, status="running", started_at=_now())
+    last_write = [0.0]
+
+    def progress(done: int, total: int) -> None:
+        now = time.monotonic()
+        if done >= total or now - last_write[0] >= PROGRESS_INTERVAL:
+            last_write[0] = now
+            _update_job(store, job_id, progress={"done": done, "total": total})
+
+    try:
+        pdf_path = get_blob_store().local_path(job["sha256"])
+        result = JOB_KINDS[job["kind"]].run(str(pdf_path), progress=progress, **job["args"])
+        _complete_job(store, job, result)
+    except Exception as e:
+        _fail_job(store, job, e)
+
+
+def create_celery_app():
+    """Celery-App für `celery -A services.jobs:celery_app worker` (Broker: CELERY_BROKER_URL / REDIS_URL)"""
+    broker = os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL", "redis://localhost:6379"))
+    app = Celery("mimicheck", broker=broker)
+    app.conf.update(
+        task_acks_late=True,
+        worker_prefetch_multiplier=1,
+        task_ignore_result=True,
+    )
+
+    @app.task(name="jobs.run", soft_time_limit=JOB_TIMEOUT)
+    def run_job(job_id: str) -> None:
+        run_job_sync(job_id)
+
+    return app
+
+
+celery_app = None
+if JOB_BACKEND == "celery":
+    if HAS_CELERY:
+        celery_app = create_celery_app()
+    else:
+        logger.warning("⚠️ JOB_BACKEND=celery, aber celery nicht installiert - lokale Job-Queue")
+        JOB_BACKEND = "local"
+
+
+# Global Instance
+_job_manager = None
+
+def get_job_manager() -> JobManager:
+    """Singleton Job Manager (JOB_BACKEND, JOB_CONCURRENCY, JOB_QUEUE_SIZE)"""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = JobManager(
+            backend=JOB_BACKEND,
+            concurrency=int(os.getenv("JOB_CONCURRENCY", "2")),
+            queue_size=int(os.getenv("JOB_QUEUE_SIZE", "100"))
+        )
+    return _job_manager
@@ -0,0 +1,174 @@
+"""
+Layout Table Service
+Kostenpositionen aus den Wort-Koordinaten einer Seite (pdfplumber extract_words) statt über
+extract_tables(): Wörter → Zeilen (Sweep über die y-Position) → Zellen (Lücken innerhalb der
+Zeile) → Spalten (Sweep über die x-Intervalle). Betragsspalten werden am Inhalt erkannt, nicht
+an der Position - Linien/Rechtecke werden nicht gebraucht, auch unlinierte Tabellen zählen.
+
+Alle Schritte sind Sortierungen mit anschließendem linearen Durchlauf: O(n log n) in der
+Anzahl der Wörter einer Seite.
+"""
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from services.nebenkosten_parser import parse_betrag
+
+# "1.234,56", "-12,30", optional mit € / EUR davor oder danach
+AMOUNT_PATTERN = re.compile(
+    r"(?:€|EUR)?\s*-?(?:\d{1,3}(?:\.\d{3})+|\d+),\d{2}\s*(?:€|EUR)?", re.IGNORECASE
+)
+LETTER_PATTERN = re.compile(r"[A-Za-zÄÖÜäöüß]")
+
+# Wörter gehören zur selben Zelle, solange die Lücke kleiner ist als dieser Anteil der Schrifthöhe
+# (ein Leerzeichen ist ~0,3 Schrifthöhen breit, Spaltenabstände deutlich mehr)
+CELL_GAP = 0.8
+# Anteil der Zellen einer Spalte, die Beträge sein müssen, damit sie als Betragsspalte gilt
+AMOUNT_SHARE = 0.6
+# Mindestanzahl Betragszellen einer Betragsspalte
+MIN_AMOUNT_ROWS = 2
+
+
+class Cell(NamedTuple):
+    x0: float
+    x1: float
+    text: str
+    amount: bool
+
+
+class _Band:
+    """Spalte: zusammengeführte x-Intervalle der Zellen"""
+    __slots__ = ("x0", "x1", "cells", "amounts")
+
+    def __init__(self, x0: float, x1: float):
+        self.x0 = x0
+        self.x1 = x1
+        self.cells = 0
+        self.amounts = 0
+
+    @property
+    def is_amount(self) -> bool:
+        return self.amounts >= MIN_AMOUNT_ROWS and self.amounts >= AMOUNT_SHARE * self.cells
+
+
+def is_amount(text: str) -> bool:
+    return AMOUNT_PATTERN.fullmatch(text.strip()) is not None
+
+
+def cluster_rows(words: Sequence[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Wörter → Zeilen, jeweils von links nach rechts. Sweep nach oberer Kante: ein Wort gehört zur
+    laufenden Zeile, wenn seine vertikale Mitte innerhalb deren Höhe liegt.
+    """
+    rows: List[List[Dict[str, Any]]] = []
+    bottom = None
+    for word in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        middle = (word["top"] + word["bottom"]) / 2
+        if bottom is not None and middle <= bottom:
+            rows[-1].append(word)
+            bottom = max(bottom, word["bottom"])
+        else:
+            rows.append([word])
+            bottom = word["bottom"]
+    for row in rows:
+        row.sort(key=lambda w: w["x0"])
+    return rows
+
+
+def row_cells(row: Sequence[Dict[str, Any]]) -> List[Cell]:
+    """Benachbarte Wörter einer Zeile mit kleiner Lücke zu Zellen zusammenfassen"""
+    cells: List[Cell] = []
+    texts: List[str] = []
+    x0 = x1 = 0.0
+    for word in row:
+        height = word["bottom"] - word["top"]
+        if texts and word["x0"] - x1 <= CELL_GAP * height:
+            texts.append(word["text"])
+            x1 = max(x1, word["x1"])
+            continue
+        if texts:
+            text = " ".join(texts)
+            cells.append(Cell(x0, x1, text, is_amount(text)))
+        texts = [word["text"]]
+        x0, x1 = word["x0"], word["x1"]
+    if texts:
+        text = " ".join(texts)
+        cells.append(Cell(x0, x1, text, is_amount(text)))
+    return cells
+
+
+def cluster_columns(rows: Sequence[Sequence[Cell]]) -> List[_Band]:
+    """Sweep über die nach x0 sortierten Zellen: überlappende Intervalle bilden eine Spalte"""
+    bands: List[_Band] = []
+    for cell in sorted((cell for cells in rows for cell in cells), key=lambda c: c.x0):
+        if not bands or cell.x0 > bands[-1].x1:
+            bands.append(_Band(cell.x0, cell.x1))
+        band = bands[-1]
+        band.x1 = max(band.x1, cell.x1)
+        band.cells += 1
+        band.amounts += cell.amount
+    return bands
+
+
+def _band_of(bands: Sequence[_Band], cell: Cell) -> Optional[_Band]:
+    # Wenige Spalten pro Seite - linear genügt
+    for band in bands:
+        if band.x0 <= cell.x0 <= band.x1:
+            return band
+    return None
+
+
+def positionen_from_words(words: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Kostenpositionen aus Wörtern einer Seite (Schlüssel x0, x1, top, bottom, text wie bei
+    pdfplumber extract_words).
+
+    Tabellenzeilen sind Zeilen mit mindestens zwei Zellen, davon ein Betrag. Der Betrag stammt
+    aus der rechtesten Betragsspalte, die Bezeichnung aus der ersten Zelle, der Umlageschlüssel
+    aus der ersten Textzelle dazwischen.
+    """
+    table_rows = []
+    for row in cluster_rows(words):
+        cells = row_cells(row)
+        if len(cells) >= 2 and any(cell.amount for cell in cells[1:]):
+            table_rows.append(cells)
+    if not table_rows:
+        return []
+
+    bands = cluster_columns(table_rows)
+    amount_bands = [band for band in bands if band.is_amount]
+    if not amount_bands:
+        return []
+    betrag_band = amount_bands[-1]
+
+    positionen = []
+    for cells in table_rows:
+        name_cell = cells[0]
+        if name_cell.amount or not LETTER_PATTERN.search(name_cell.text):
+            continue
+        betrag_cell = next(
+            (cell for cell in reversed(cells) if cell.amount and _band_of(bands, cell) is betrag_band),
+            None
+        )
+        if betrag_cell is None:
+            continue
+        betrag = parse_betrag(betrag_cell.text.upper().replace("EUR", ""))
+        if betrag <= 0:
+            continue
+        umlageschluessel = next(
+            (
+                cell.text for cell in cells[1:]
+                if cell.x0 < betrag_cell.x0 and not cell.amount and LETTER_PATTERN.search(cell.text)
+            ),
+            "Nicht angegeben"
+        )
+        positionen.append({
+            "name": name_cell.text.strip(),
+            "betrag": betrag,
+            "umlageschluessel": umlageschluessel,
+        })
+    return positionen
+
+
+def extract_positionen(page) -> List[Dict[str, Any]]:
+    """Kostenpositionen einer pdfplumber-Seite (nutzt die gecachten chars der Seite)"""
+    return positionen_from_words(page.extract_words())
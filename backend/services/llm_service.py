@@ -18,6 +18,7 @@ class LLMService:
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         self.max_tokens = int(os.getenv("OPENAI_MAX_TOKENS", "4096"))
+        self.chat_max_tokens = 1500
         self.temperature = float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
         
         if not self.api_key:
@@ -222,7 +223,7 @@ Analysiere die Abrechnung und gib folgendes JSON zurück:
                 model=self.model,
                 messages=messages,
                 temperature=0.7,
-                max_tokens=1500
+                max_tokens=self.chat_max_tokens
             )
             
             return response.choices[0].message.content
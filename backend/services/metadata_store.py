@@ -0,0 +1,479 @@
+"""
+Metadata Store Service
+Persistente, indizierte Ablage für Uploads, Analysen, Reports, Formulare, Formular-Vorlagen,
+Jobs und Blobs.
+SQLite lokal, Postgres in Production (DATABASE_URL) - mit begrenztem Read-Through-Cache.
+"""
+import os
+import asyncio
+import copy
+import time
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Dict, Any, Optional, Iterator, Tuple
+
+from sqlalchemy import (
+    create_engine, event, select, update, delete, func,
+    String, Integer, BigInteger, DateTime, JSON, Index
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE_URL = (
+    f"sqlite:///{Path(tempfile.gettempdir()) / 'nebenkosten-storage' / 'metadata.db'}"
+)
+CACHE_SIZE = int(os.getenv("METADATA_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "30"))  # seconds
+
+
+# ============================================
+# MODELS
+# ============================================
+
+class Base(DeclarativeBase):
+    pass
+
+
+class UploadRecord(Base):
+    __tablename__ = "uploads"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    sha256: Mapped[Optional[str]] = mapped_column(String(64), index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON)
+
+
+class AnalysisRecord(Base):
+    __tablename__ = "analyses"
+    __table_args__ = (
+        Index("ix_analyses_abrechnung_id_created_at", "abrechnung_id", "created_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    abrechnung_id: Mapped[str] = mapped_column(String(64))
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON)
+
+
+class ReportRecord(Base):
+    __tablename__ = "reports"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)  # = abrechnung_id
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON)
+
+
+class FormRecord(Base):
+    __tablename__ = "forms"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)  # = upload_id
+    sha256: Mapped[Optional[str]] = mapped_column(String(64), index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON)
+
+
+class JobRecord(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)  # = job_id
+    status: Mapped[Optional[str]] = mapped_column(String(16), index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON)
+
+
+class FormTemplateRecord(Base):
+    __tablename__ = "form_templates"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)  # = Struktur-Fingerprint
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON)
+
+
+class BlobRecord(Base):
+    __tablename__ = "blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    path: Mapped[str] = mapped_column(String(1024))
+    size: Mapped[int] = mapped_column(BigInteger)
+    refcount: Mapped[int] = mapped_column(Integer, default=1)
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+
+# ============================================
+# CACHE
+# ============================================
+
+class LRUCache:
+    """Begrenzter LRU-Cache mit TTL (hält Worker-übergreifende Staleness klein)"""
+
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+# ============================================
+# TABLES
+# ============================================
+
+class RecordTable(MutableMapping):
+    """
+    Dict-artiger Zugriff auf eine Tabelle (drop-in für die bisherigen In-Memory-Dicts).
+
+    Werte sind JSON-Dicts; indizierte Spalten werden beim Schreiben aus dem Dict übernommen.
+    Gelesene Werte sind Kopien - Änderungen müssen per Zuweisung zurückgeschrieben werden.
+    """
+
+    def __init__(
+        self,
+        sessions: sessionmaker,
+        model,
+        created_key: Optional[str] = None,
+        indexed: Tuple[str, ...] = (),
+        cache_ttl: float = CACHE_TTL
+    ):
+        self._sessions = sessions
+        self._model = model
+        self._created_key = created_key
+        self._indexed = indexed
+        self._cache = LRUCache(ttl=cache_ttl)
+
+    def _row_values(self, key: str, value: Dict[str, Any]) -> Dict[str, Any]:
+        created_at = datetime.now()
+        if self._created_key and value.get(self._created_key):
+            created_at = datetime.fromisoformat(value[self._created_key])
+
+        row = {"id": key, "created_at": created_at, "payload": value}
+        for column in self._indexed:
+            row[column] = value.get(column)
+        return row
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        cached = self._cache.get(key)
+        if cached is None:
+            with self._sessions() as session:
+                row = session.get(self._model, key)
+                if row is None:
+                    raise KeyError(key)
+                cached = row.payload
+            self._cache.put(key, cached)
+        return copy.deepcopy(cached)
+
+    def __setitem__(self, key: str, value: Dict[str, Any]) -> None:
+        with self._sessions.begin() as session:
+            session.merge(self._model(**self._row_values(key, value)))
+        self._cache.put(key, copy.deepcopy(value))
+        for column in self._indexed:
+            self._cache.invalidate(f"latest:{column}:{value.get(column)}")
+
+    def __delitem__(self, key: str) -> None:
+        self._cache.invalidate(key)
+        with self._sessions.begin() as session:
+            result = session.execute(delete(self._model).where(self._model.id == key))
+            if result.rowcount == 0:
+                raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        if self._cache.get(key) is not None:
+            return True
+        with self._sessions() as session:
+            return session.scalar(select(self._model.id).where(self._model.id == key)) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        with self._sessions() as session:
+            ids = session.scalars(select(self._model.id).order_by(self._model.created_at)).all()
+        return iter(ids)
+
+    def __len__(self) -> int:
+        with self._sessions() as session:
+            return session.scalar(select(func.count()).select_from(self._model))
+
+    # Async-Zugriff für Request-Handler: jede Abfrage ist (mit Postgres) ein Netzwerk-Roundtrip
+    # und läuft deshalb im Thread-Pool statt auf dem Event-Loop
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """Wie get(key) - None, wenn es den Eintrag nicht gibt"""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self.__setitem__, key, value)
+
+    async def adelete(self, key: str) -> None:
+        await asyncio.to_thread(self.__delitem__, key)
+
+    async def afind_latest(self, column: str, value: Any) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.find_latest, column, value)
+
+    def purge(self, column: str, values: Tuple[Any, ...], before: datetime, batch_size: int = 500) -> int:
+        """Löscht Einträge mit column in values, die vor `before` angelegt wurden (Retention)"""
+        model_column = getattr(self._model, column)
+        removed = 0
+        while True:
+            with self._sessions.begin() as session:
+                ids = session.scalars(
+                    select(self._model.id)
+                    .where(model_column.in_(values), self._model.created_at < before)
+                    .limit(batch_size)
+                ).all()
+                if ids:
+                    session.execute(delete(self._model).where(self._model.id.in_(ids)))
+            for key in ids:
+                self._cache.invalidate(key)
+            removed += len(ids)
+            if len(ids) < batch_size:
+                return removed
+
+    def find_all(self, column: str, value: Any) -> Dict[str, Dict[str, Any]]:
+        """Alle Einträge mit column == value (Index-Lookup), key → Wert"""
+        model_column = getattr(self._model, column)
+        with self._sessions() as session:
+            rows = session.execute(
+                select(self._model.id, self._model.payload).where(model_column == value)
+            ).all()
+        return {key: copy.deepcopy(payload) for key, payload in rows}
+
+    def find_latest(self, column: str, value: Any) -> Optional[Dict[str, Any]]:
+        """Neuester Eintrag mit column == value (Index-Lookup statt linearem Scan)"""
+        cache_key = f"latest:{column}:{value}"
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        model_column = getattr(self._model, column)
+        with self._sessions() as session:
+            payload = session.scalar(
+                select(self._model.payload)
+                .where(model_column == value)
+                .order_by(self._model.created_at.desc())
+                .limit(1)
+            )
+
+        if payload is None:
+            return None
+        self._cache.put(cache_key, payload)
+        return copy.deepcopy(payload)
+
+
+class SQLBlobIndex:
+    """
+    Blob-Index mit atomarer Referenzzählung (sicher über mehrere Worker).
+    refcount -1 markiert einen Blob, dessen Objekt gerade gelöscht wird.
+    """
+
+    def __init__(self, sessions: sessionmaker):
+        self._sessions = sessions
+
+    @staticmethod
+    def _to_dict(row: BlobRecord) -> Dict[str, Any]:
+        return {
+            "sha256": row.sha256,
+            "path": row.path,
+            "size": row.size,
+            "refcount": row.refcount,
+            "created_at": row.created_at.isoformat()
+        }
+
+    def get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        with self._sessions() as session:
+            row = session.get(BlobRecord, sha256)
+            return self._to_dict(row) if row else None
+
+    def acquire(self, record: Dict[str, Any]) -> Optional[int]:
+        """Legt Blob mit refcount=1 an oder erhöht den refcount um 1 (None: wird gerade gelöscht)"""
+        try:
+            with self._sessions.begin() as session:
+                session.add(BlobRecord(
+                    sha256=record["sha256"],
+                    path=record["path"],
+                    size=record["size"],
+                    refcount=1,
+                    created_at=datetime.fromisoformat(record["created_at"])
+                ))
+            return 1
+        except IntegrityError:
+            # Vorhandener Eintrag - oder inzwischen entfernt/im Löschen (None → erneut versuchen)
+            return self._update(record["sha256"], 1, BlobRecord.refcount >= 0)
+
+    def incr(self, sha256: str, delta: int) -> Optional[int]:
+        """Ändert refcount um delta (nie unter 0), gibt neuen Wert zurück (None = unbekannt)"""
+        return self._update(sha256, delta, BlobRecord.refcount + delta >= 0)
+
+    def _update(self, sha256: str, delta: int, condition) -> Optional[int]:
+        with self._sessions.begin() as session:
+            result = session.execute(
+                update(BlobRecord)
+                .where(BlobRecord.sha256 == sha256, condition)
+                .values(refcount=BlobRecord.refcount + delta)
+            )
+            if result.rowcount == 0:
+                return None
+            return session.scalar(select(BlobRecord.refcount).where(BlobRecord.sha256 == sha256))
+
+    def mark_deleting(self, sha256: str) -> bool:
+        """refcount 0 → -1 in einem Statement; True wenn dieser Aufrufer das Objekt löschen darf"""
+        with self._sessions.begin() as session:
+            result = session.execute(
+                update(BlobRecord)
+                .where(BlobRecord.sha256 == sha256, BlobRecord.refcount == 0)
+                .values(refcount=-1)
+            )
+            return result.rowcount > 0
+
+    def claim(self, record: Dict[str, Any]) -> Optional[int]:
+        """
+        Retention: n → -1 unabhängig vom refcount, gibt den bisherigen refcount zurück.
+        Unbekannte Blobs werden als Lösch-Markierung angelegt (0). None: wird bereits gelöscht.
+        """
+        try:
+            with self._sessions.begin() as session:
+                session.add(BlobRecord(
+                    sha256=record["sha256"],
+                    path=record["path"],
+                    size=record["size"],
+                    refcount=-1,
+                    created_at=datetime.fromisoformat(record["created_at"])
+                ))
+            return 0
+        except IntegrityError:
+            pass
+
+        # Bedingtes Update auf den gelesenen Wert - ein paralleles acquire()/incr() lässt es
+        # scheitern, dann mit dem neuen Wert erneut
+        while True:
+            with self._sessions.begin() as session:
+                previous = session.scalar(
+                    select(BlobRecord.refcount).where(BlobRecord.sha256 == record["sha256"])
+                )
+                if previous is None or previous < 0:
+                    return None
+                result = session.execute(
+                    update(BlobRecord)
+                    .where(BlobRecord.sha256 == record["sha256"], BlobRecord.refcount == previous)
+                    .values(refcount=-1)
+                )
+                if result.rowcount > 0:
+                    return previous
+
+    def restore(self, sha256: str, refcount: int) -> None:
+        """Hebt eine Lösch-Markierung aus claim() wieder auf (-1 → refcount)"""
+        with self._sessions.begin() as session:
+            session.execute(
+                update(BlobRecord)
+                .where(BlobRecord.sha256 == sha256, BlobRecord.refcount == -1)
+                .values(refcount=refcount)
+            )
+
+    def remove(self, sha256: str) -> None:
+        with self._sessions.begin() as session:
+            session.execute(delete(BlobRecord).where(BlobRecord.sha256 == sha256))
+
+    def __len__(self) -> int:
+        with self._sessions() as session:
+            return session.scalar(select(func.count()).select_from(BlobRecord))
+
+
+# ============================================
+# STORE
+# ============================================
+
+class MetadataStore:
+    """Bündelt Engine, Sessions und alle Tabellen"""
+
+    def __init__(self, database_url: str, create_tables: bool = True):
+        self.database_url = database_url
+        self.engine = self._create_engine(database_url)
+        self.sessions = sessionmaker(self.engine, expire_on_commit=False)
+
+        if create_tables:
+            Base.metadata.create_all(self.engine)
+
+        self.uploads = RecordTable(
+            self.sessions, UploadRecord, created_key="uploaded_at", indexed=("sha256",)
+        )
+        self.analyses = RecordTable(
+            self.sessions, AnalysisRecord, created_key="analyzed_at", indexed=("abrechnung_id",)
+        )
+        self.reports = RecordTable(self.sessions, ReportRecord, created_key="generated_at")
+        self.forms = RecordTable(self.sessions, FormRecord, indexed=("sha256",))
+        # Gelernte Formular-Vorlagen (services.form_registry)
+        self.form_templates = RecordTable(self.sessions, FormTemplateRecord)
+        # Job-Status ändert sich laufend und wird worker-übergreifend gepollt → kurzer Cache
+        self.jobs = RecordTable(
+            self.sessions, JobRecord, created_key="created_at", indexed=("status",), cache_ttl=0.5
+        )
+        self.blobs = SQLBlobIndex(self.sessions)
+
+    @staticmethod
+    def _create_engine(database_url: str):
+        if database_url.startswith("sqlite"):
+            db_path = database_url.split("///", 1)[-1]
+            if db_path and db_path != ":memory:":
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+            engine = create_engine(database_url, connect_args={"check_same_thread": False})
+
+            @event.listens_for(engine, "connect")
+            def _sqlite_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+                cursor.execute("PRAGMA busy_timeout=5000")
+                cursor.close()
+
+            return engine
+
+        return create_engine(
+            database_url,
+            pool_pre_ping=True,
+            pool_size=int(os.getenv("DATABASE_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+        )
+
+
+# Global Instance
+_metadata_store = None
+
+def get_metadata_store() -> MetadataStore:
+    """Singleton Metadata Store"""
+    global _metadata_store
+    if _metadata_store is None:
+        database_url = os.getenv("DATABASE_URL") or DEFAULT_DATABASE_URL
+        # Tabellen automatisch anlegen; in Production übernimmt Alembic
+        create_tables = os.getenv("METADATA_AUTO_CREATE", "true").lower() == "true"
+        _metadata_store = MetadataStore(database_url, create_tables=create_tables)
+        logger.info(f"✅ Metadata Store initialisiert ({_metadata_store.engine.url.get_backend_name()})")
+    return _metadata_store
@@ -0,0 +1,330 @@
+"""
+Nebenkosten Parser
+Kopfdaten und Kostenpositionen einer Abrechnung in einem einzigen Durchlauf über den Text.
+
+Ein kompilierter Trigger-Ausdruck findet Schlüsselwörter (Titel, Verwalter, Summen) und
+Zahlenfolgen; die Feld-Matcher prüfen von dort aus nur ihre unmittelbare Umgebung (verankerte
+Muster nach vorn, Namen/Straßen per Zeichenklassen rückwärts bis zur vorigen Zahl). Jede
+Textstelle wird so nur konstant oft gelesen - die Laufzeit ist linear in der Textlänge, auch
+bei langen Zeilen ohne Treffer, an denen die früheren Einzel-Regexes quadratisch backtrackten.
+
+Ergebnisse entsprechen den bisherigen Mustern (erstes Muster gewinnt, sonst früheste Stelle):
+    titel:        (Nebenkosten|Betriebskosten|Jahres)abrechnung bis zur letzten Jahreszahl der Zeile
+    zeitraum:     "TT.MM.JJJJ - TT.MM.JJJJ" (auch "–" / "bis"), sonst die erste Jahreszahl
+    verwalter:    Rest der Zeile nach Hausverwaltung / Verwalter / Verwaltung
+    adresse:      "Straße Nr, PLZ Ort"
+    gesamtkosten: Betrag nach Gesamtbetrag / Gesamtkosten / Summe / Nachzahlung
+    positionen:   "Bezeichnung 1.234,56 €" (Beträge über 10 €)
+"""
+import re
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+# (Rang, Wert) - Rang 0 ist der beste Treffer; Ränge sind seitenübergreifend vergleichbar
+Ranked = Optional[Tuple[int, Any]]
+
+KEYWORDS = {
+    "titel": ("nebenkostenabrechnung", "betriebskostenabrechnung", "jahresabrechnung"),
+    "verwalter": ("hausverwaltung", "verwalter", "verwaltung"),
+    "gesamtkosten": ("gesamtbetrag", "gesamtkosten", "summe", "nachzahlung"),
+}
+
+ZEITRAUM_RANGE = 0
+ZEITRAUM_YEAR = 1
+
+# Trigger: Zahlenfolgen oder ein Schlüsselwort (Gruppe "<feld>_<rang>"). Zahlen: erst alle
+# (bis eine Jahreszahl gefunden ist), danach nur noch solche nach Leerraum (Hausnummer, Betrag)
+# bzw. solche, die auf ein Datum enden (Zeitraum)
+_NUMBER_GROUPS = ("num", "num_ws", "num_date")
+_ALTERNATIVES = {
+    "num": r"\d[\d.]*",
+    "num_ws": r"(?<!\S)\.*\d[\d.]*",
+    "num_date": r"(?<![\d.])[\d.]*\d{2}\.\d{2}\.\d{4}(?![\d.])",
+}
+_ALTERNATIVES.update(
+    (f"{field}_{rank}", keyword)
+    for field, keywords in KEYWORDS.items()
+    for rank, keyword in enumerate(keywords)
+)
+_GROUPS = {
+    f"{field}_{rank}": (field, rank)
+    for field, keywords in KEYWORDS.items()
+    for rank in range(len(keywords))
+}
+
+
+@lru_cache(maxsize=None)
+def _trigger(groups: FrozenSet[str]) -> "re.Pattern":
+    """
+    Trigger-Ausdruck nur für die noch gesuchten Gruppen. Der Lookahead auf die möglichen
+    Anfangszeichen lässt die Regex-Engine alle übrigen Stellen schnell überspringen.
+    """
+    names = [name for name in _ALTERNATIVES if name in groups]
+    first = "".join(sorted({
+        "\\d." if name in _NUMBER_GROUPS else _ALTERNATIVES[name][0] for name in names
+    }))
+    body = "|".join(f"(?P<{name}>{_ALTERNATIVES[name]})" for name in names)
+    return re.compile(f"(?=[{first}])(?:{body})", re.IGNORECASE)
+
+# Verankerte Matcher (Start direkt hinter dem Trigger)
+_DATE = re.compile(r"\d{2}\.\d{2}\.\d{4}")
+_RANGE_TAIL = re.compile(r"\s*(?:-|–|bis)\s*(\d{2}\.\d{2}\.\d{4})", re.IGNORECASE)
+_YEAR = re.compile(r"\d{4}")
+_YEAR_RUN = re.compile(r"\d{4,}")
+_LINE_TAIL = re.compile(r"[:\s]*([^\n]+)")
+_BETRAG_TAIL = re.compile(r"[:\s]*([\d.]+,\d{2})\s*€")
+_CENTS_TAIL = re.compile(r",(\d{2})\s*€")
+_ADDRESS_TAIL = re.compile(
+    r"(\d+[a-z]?),?\s+(\d{5})\s+([A-ZÄÖÜ][a-zäöüß\-]+(?:\s+[A-ZÄÖÜ][a-zäöüß\-]+)*)"
+)
+_CONTENT = re.compile(r"\S")
+
+# Zeichenklassen für die Rückwärtssuche
+_UPPER = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÜ")
+_STREET_LOWER = frozenset("abcdefghijklmnopqrstuvwxyzäöüß-")
+_NAME_LOWER = _STREET_LOWER | {"/"}
+
+
+class FieldScan(NamedTuple):
+    titel: Ranked
+    abrechnungszeitraum: Ranked
+    verwalter: Ranked
+    objekt_adresse: Ranked
+    gesamtkosten: Ranked
+    first_line: Optional[str]
+    positionen: List[Dict[str, Any]]
+
+
+def parse_betrag(betrag_str: str) -> float:
+    """"1.234,56" → 1234.56 (0.0 wenn nicht lesbar)"""
+    try:
+        return float(betrag_str.replace(".", "").replace(",", ".").replace("€", "").strip())
+    except ValueError:
+        return 0.0
+
+
+def _skip_space_back(text: str, index: int) -> int:
+    while index >= 0 and text[index].isspace():
+        index -= 1
+    return index
+
+
+def _word_start_back(text: str, end: int, lower: frozenset) -> Tuple[int, int]:
+    """
+    Kleinbuchstaben-Lauf, der bei `end` (exklusiv) endet.
+    Returns: (Start des Laufs, Index des Zeichens davor) - Start == end heißt kein Lauf
+    """
+    index = end - 1
+    while index >= 0 and text[index] in lower:
+        index -= 1
+    return index + 1, index
+
+
+def _position_name_start(text: str, amount_start: int) -> Optional[int]:
+    """
+    Anfang von "[A-ZÄÖÜ][a-zäöüß-/]+ (\\s+[a-zäöüß-/]+)*" direkt vor Leerraum + Betrag
+    (Großgeschriebenes Wort, dann nur noch kleingeschriebene Wörter)
+    """
+    index = _skip_space_back(text, amount_start - 1)
+    while True:
+        run_start, before = _word_start_back(text, index + 1, _NAME_LOWER)
+        if run_start > index:
+            return None
+        if before >= 0 and text[before] in _UPPER:
+            return before
+        if before < 0 or not text[before].isspace():
+            return None
+        index = _skip_space_back(text, before)
+
+
+def _street_start(text: str, number_start: int) -> Optional[int]:
+    """Anfang von "[A-ZÄÖÜ][a-zäöüß-]+ (\\s+[A-ZÄÖÜ][a-zäöüß-]+)*" direkt vor Leerraum + Hausnummer"""
+    start = None
+    index = _skip_space_back(text, number_start - 1)
+    while True:
+        run_start, before = _word_start_back(text, index + 1, _STREET_LOWER)
+        if run_start > index or before < 0 or text[before] not in _UPPER:
+            return start
+        start = before
+        if before == 0 or not text[before - 1].isspace():
+            return start
+        index = _skip_space_back(text, before - 1)
+
+
+class _Scanner:
+    """Zustand eines Durchlaufs (beste Treffer je Feld, Zeilen-Cache für den Titel)"""
+
+    def __init__(self, text: str, max_positionen: Optional[int]):
+        self.text = text
+        self.max_positionen = max_positionen
+        self.best: Dict[str, Tuple[int, Any]] = {}
+        self.verwalter_tried: set = set()
+        self.positionen: List[Dict[str, Any]] = []
+        self.positionen_end = 0
+        self.line_end = -1
+        self.line_year_end = -1
+
+    # --- Felder -------------------------------------------------------------
+
+    def _wants(self, field: str, rank: int) -> bool:
+        return field not in self.best or rank < self.best[field][0]
+
+    def _offer(self, field: str, rank: int, value: Any) -> bool:
+        if self._wants(field, rank):
+            self.best[field] = (rank, value)
+            return True
+        return False
+
+    def _collecting(self) -> bool:
+        return self.max_positionen is None or len(self.positionen) < self.max_positionen
+
+    def wanted(self) -> FrozenSet[str]:
+        """Trigger-Gruppen, die das Ergebnis noch verbessern können"""
+        groups = {
+            name for name, (field, rank) in _GROUPS.items()
+            if self._wants(field, rank) and not (field == "verwalter" and rank in self.verwalter_tried)
+        }
+        if "abrechnungszeitraum" not in self.best:
+            groups.add("num")
+        else:
+            if self._collecting() or "objekt_adresse" not in self.best:
+                groups.add("num_ws")
+            if self._wants("abrechnungszeitraum", ZEITRAUM_RANGE):
+                groups.add("num_date")
+        return frozenset(groups)
+
+    def keyword(self, field: str, rank: int, start: int, end: int) -> bool:
+        if not self._wants(field, rank):
+            return False
+        text = self.text
+
+        if field == "titel":
+            # Schlüsselwort ... letzte Jahreszahl derselben Zeile
+            if start >= self.line_end:
+                self.line_end = text.find("\n", end)
+                if self.line_end < 0:
+                    self.line_end = len(text)
+                self.line_year_end = -1
+                for run in _YEAR_RUN.finditer(text, end, self.line_end):
+                    self.line_year_end = run.end()
+            if self.line_year_end - 4 >= end:
+                return self._offer(field, rank, text[start:self.line_year_end].strip())
+            return False
+
+        if field == "verwalter":
+            # Scheitert nur, wenn danach nur noch Leerraum folgt - ein Versuch je Rang genügt
+            self.verwalter_tried.add(rank)
+            match = _LINE_TAIL.match(text, end)
+            if match:
+                self._offer(field, rank, match.group(1).strip())
+            return True
+
+        match = _BETRAG_TAIL.match(text, end)
+        if match:
+            return self._offer(field, rank, parse_betrag(match.group(1)))
+        return False
+
+    def number(self, start: int, end: int) -> bool:
+        text = self.text
+        changed = False
+        # Punkte vor der ersten Ziffer gehören noch zur Zahl ("[\d.]+")
+        while start > 0 and text[start - 1] == ".":
+            start -= 1
+
+        if "abrechnungszeitraum" not in self.best:
+            year = _YEAR.search(text, start, end)
+            if year:
+                changed = self._offer("abrechnungszeitraum", ZEITRAUM_YEAR, year.group())
+
+        if end - start >= 10 and self._wants("abrechnungszeitraum", ZEITRAUM_RANGE) \
+                and _DATE.fullmatch(text, end - 10, end):
+            tail = _RANGE_TAIL.match(text, end)
+            if tail:
+                changed = self._offer(
+                    "abrechnungszeitraum", ZEITRAUM_RANGE, f"{text[end - 10:end]} - {tail.group(1)}"
+                )
+
+        if start == 0 or not text[start - 1].isspace():
+            return changed
+
+        if "objekt_adresse" not in self.best:
+            tail = _ADDRESS_TAIL.match(text, start)
+            if tail:
+                street = _street_start(text, start)
+                if street is not None:
+                    changed = self._offer(
+                        "objekt_adresse", 0,
+                        f"{text[street:tail.end(1)]}, {tail.group(2)} {tail.group(3)}"
+                    )
+
+        if end < len(text) and text[end] == "," and self._collecting():
+            tail = _CENTS_TAIL.match(text, end)
+            if tail:
+                name_start = _position_name_start(text, start)
+                if name_start is not None and name_start >= self.positionen_end:
+                    self.positionen_end = tail.end()
+                    betrag = parse_betrag(f"{text[start:end]},{tail.group(1)}")
+                    if betrag > 10:  # Filter kleine Beträge
+                        name_end = _skip_space_back(text, start - 1) + 1
+                        self.positionen.append({
+                            "name": text[name_start:name_end].strip(),
+                            "betrag": betrag,
+                            "umlageschluessel": "Nicht angegeben"
+                        })
+                        changed = True
+        return changed
+
+    # --- Durchlauf ----------------------------------------------------------
+
+    def run(self) -> FieldScan:
+        # Sobald ein Feld seinen besten Treffer hat, sucht der Trigger nur noch die übrigen
+        # Gruppen (ab der aktuellen Stelle weiter) - ist nichts mehr offen, endet der Durchlauf
+        pos = 0
+        groups = self.wanted()
+        while groups:
+            for match in _trigger(groups).finditer(self.text, pos):
+                group = match.lastgroup
+                if group in _NUMBER_GROUPS:
+                    changed = self.number(match.start(), match.end())
+                else:
+                    changed = self.keyword(*_GROUPS[group], match.start(), match.end())
+                if changed:
+                    remaining = self.wanted()
+                    if remaining != groups:
+                        groups, pos = remaining, match.end()
+                        break
+            else:
+                break
+
+        best = self.best
+        return FieldScan(
+            titel=best.get("titel"),
+            abrechnungszeitraum=best.get("abrechnungszeitraum"),
+            verwalter=best.get("verwalter"),
+            objekt_adresse=best.get("objekt_adresse"),
+            gesamtkosten=best.get("gesamtkosten"),
+            first_line=first_line(self.text),
+            positionen=self.positionen
+        )
+
+
+def first_line(text: str) -> Optional[str]:
+    """Erste nicht-leere Zeile (ohne den Text in Zeilen aufzuteilen)"""
+    match = _CONTENT.search(text)
+    if not match:
+        return None
+    start = text.rfind("\n", 0, match.start()) + 1
+    end = text.find("\n", match.start())
+    return text[start:end if end >= 0 else len(text)].strip()
+
+
+def scan_fields(text: str, max_positionen: Optional[int] = None) -> FieldScan:
+    """
+    Alle Felder in einem Durchlauf.
+
+    Args:
+        text: Text der Abrechnung (oder einer Seite)
+        max_positionen: Höchstzahl Kostenpositionen aus dem Text (None = alle, 0 = keine) -
+            sind alle Kopfdaten mit bestem Rang gefunden, endet der Durchlauf danach vorzeitig
+    """
+    return _Scanner(text, max_positionen).run()
@@ -0,0 +1,318 @@
+"""
+Object Storage Service
+Austauschbares Storage-Backend: lokale Disk oder S3-kompatibel (AWS, MinIO, moto).
+S3-Downloads landen in einem begrenzten lokalen Scratch-Cache, aus dem Extraktion/Befüllung lesen.
+"""
+import os
+import uuid
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, Optional
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+    from boto3.s3.transfer import TransferConfig
+    HAS_BOTO3 = True
+except ImportError:
+    HAS_BOTO3 = False
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class ObjectStorage:
+    """Basis-Interface: Objekte werden über einen Key (z.B. SHA-256) adressiert"""
+
+    def put_file(self, key: str, local_path: Path) -> str:
+        """Übernimmt local_path als Objekt (die lokale Datei wird verschoben/entfernt)"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Path:
+        """Lokal lesbarer Pfad des Objekts (blockierend - ggf. Download)"""
+        raise NotImplementedError
+
+    def uri(self, key: str) -> str:
+        raise NotImplementedError
+
+    def touch(self, key: str) -> None:
+        """Zugriff markieren (Retention/LRU)"""
+
+    def last_access(self, key: str) -> Optional[float]:
+        """Zeitpunkt des letzten Zugriffs (None = unbekannt/nicht vorhanden)"""
+        return None
+
+
+class LocalDiskStorage(ObjectStorage):
+    """Objekte als Dateien unter <root>/ab/abcdef..."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def put_file(self, key: str, local_path: Path) -> str:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(local_path, path)
+        return str(path)
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key: str) -> Path:
+        path = self._path(key)
+        if not path.exists():
+            raise FileNotFoundError(f"Objekt nicht gefunden: {key}")
+        return path
+
+    def uri(self, key: str) -> str:
+        return str(self._path(key))
+
+    def touch(self, key: str) -> None:
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def last_access(self, key: str) -> Optional[float]:
+        try:
+            st = self._path(key).stat()
+        except FileNotFoundError:
+            return None
+        return max(st.st_atime, st.st_mtime)
+
+
+class ScratchCache:
+    """Begrenzter lokaler LRU-Cache für heruntergeladene Objekte"""
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+        # Bestehende Dateien übernehmen (älteste zuerst)
+        existing = sorted(
+            (p for p in self.directory.iterdir() if p.is_file() and not p.name.startswith(".")),
+            key=lambda p: p.stat().st_mtime
+        )
+        for path in existing:
+            size = path.stat().st_size
+            self._entries[path.name] = size
+            self._total += size
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / key
+
+    def get(self, key: str) -> Optional[Path]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self.path_for(key)
+        return path if path.exists() else None
+
+    def key_lock(self, key: str) -> threading.Lock:
+        """Single-Flight: parallele Requests laden dasselbe Objekt nur einmal"""
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def drop_key_lock(self, key: str, lock: threading.Lock) -> None:
+        """Gibt den Single-Flight-Lock wieder frei - nach jedem Download, auch fehlgeschlagenen"""
+        with self._lock:
+            if self._key_locks.get(key) is lock:
+                del self._key_locks[key]
+
+    def add(self, key: str, staged: Path) -> Path:
+        """Übernimmt eine fertig geschriebene Datei in den Cache und evictet LRU-Einträge"""
+        path = self.path_for(key)
+        size = staged.stat().st_size
+        os.replace(staged, path)
+
+        with self._lock:
+            self._total -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._total += size
+
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._total -= old_size
+                try:
+                    self.path_for(old_key).unlink()
+                except FileNotFoundError:
+                    pass
+        return path
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._total -= self._entries.pop(key, 0)
+        try:
+            self.path_for(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class S3Storage(ObjectStorage):
+    """
+    S3-kompatibles Backend.
+
+    - Gepoolte Connections (ein Client, max_pool_connections)
+    - Multipart-Uploads für große PDFs (TransferConfig)
+    - Streaming-Downloads in den Scratch-Cache
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        scratch: ScratchCache,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        max_pool_connections: int = 20,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        prefix: str = "blobs/",
+        client=None
+    ):
+        if not HAS_BOTO3:
+            raise RuntimeError("boto3 library required for S3 storage")
+
+        self.bucket = bucket
+        self.scratch = scratch
+        self.prefix = prefix
+        self.client = client or boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=BotoConfig(
+                max_pool_connections=max_pool_connections,
+                retries={"max_attempts": 3, "mode": "adaptive"}
+            )
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_threshold,
+            max_concurrency=max(1, max_pool_connections // 2),
+            use_threads=True
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def put_file(self, key: str, local_path: Path) -> str:
+        self.client.upload_file(
+            str(local_path), self.bucket, self._key(key), Config=self.transfer_config
+        )
+        # Lokale Kopie direkt als Cache-Eintrag behalten - die Extraktion folgt meist sofort
+        self.scratch.add(key, Path(local_path))
+        return self.uri(key)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        self.scratch.discard(key)
+
+    def local_path(self, key: str) -> Path:
+        cached = self.scratch.get(key)
+        if cached:
+            return cached
+
+        lock = self.scratch.key_lock(key)
+        try:
+            with lock:
+                cached = self.scratch.get(key)
+                if cached:
+                    return cached
+
+                staged = self.scratch.directory / f".download-{uuid.uuid4().hex}"
+                try:
+                    response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+                except ClientError as e:
+                    if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                        raise FileNotFoundError(f"Objekt nicht gefunden: {key}")
+                    raise
+
+                try:
+                    with open(staged, "wb") as f:
+                        for chunk in response["Body"].iter_chunks(DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                    path = self.scratch.add(key, staged)
+                except BaseException:
+                    staged.unlink(missing_ok=True)
+                    raise
+        finally:
+            self.scratch.drop_key_lock(key, lock)
+
+        logger.info(f"S3 → Scratch-Cache: {key[:12]}")
+        return path
+
+    def uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._key(key)}"
+
+
+# Global Instance
+_object_storage = None
+
+def get_object_storage(local_root: Path) -> ObjectStorage:
+    """
+    Singleton Object Storage (STORAGE_BACKEND=local|s3)
+
+    Args:
+        local_root: Basisverzeichnis für lokale Objekte bzw. den S3-Scratch-Cache
+    """
+    global _object_storage
+    if _object_storage is None:
+        backend = os.getenv("STORAGE_BACKEND", "local").lower()
+
+        if backend == "s3":
+            scratch = ScratchCache(
+                Path(os.getenv("S3_SCRATCH_DIR", str(Path(local_root) / ".scratch"))),
+                max_bytes=int(os.getenv("S3_SCRATCH_MAX_MB", "1024")) * 1024 * 1024
+            )
+            _object_storage = S3Storage(
+                bucket=os.getenv("S3_BUCKET_NAME", "mimicheck-uploads"),
+                scratch=scratch,
+                endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+                region=os.getenv("S3_REGION") or None,
+                access_key=os.getenv("S3_ACCESS_KEY_ID") or None,
+                secret_key=os.getenv("S3_SECRET_ACCESS_KEY") or None,
+                max_pool_connections=int(os.getenv("S3_MAX_POOL_CONNECTIONS", "20")),
+                multipart_threshold=int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8")) * 1024 * 1024
+            )
+        else:
+            _object_storage = LocalDiskStorage(local_root)
+
+        logger.info(f"✅ Object Storage: {backend}")
+    return _object_storage
@@ -0,0 +1,175 @@
+"""
+OCR Engine
+Gemeinsame OCR für PDFExtractionService und PDFExtractor: nur Seiten ohne brauchbare
+Textebene, DPI passend zur Seitengröße, mehrere tesseract-Prozesse parallel.
+"""
+import os
+import re
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ziel: ~3500 px an der langen Seite (= A4 bei 300 dpi), begrenzt auf [OCR_MIN_DPI, OCR_MAX_DPI]
+OCR_TARGET_PIXELS = 3500
+POINTS_PER_INCH = 72
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def choose_dpi(width: float, height: float, min_dpi: int = 150, max_dpi: int = 400) -> int:
+    """DPI für eine Seite mit `width` x `height` Punkten - große Pläne niedriger, Belege höher"""
+    long_side_inches = max(width, height, 1) / POINTS_PER_INCH
+    dpi = int(OCR_TARGET_PIXELS / long_side_inches)
+    return max(min_dpi, min(max_dpi, dpi))
+
+
+class OCREngine:
+    """
+    OCR mit tesseract (pytesseract).
+
+    Rasterisiert wird nacheinander im aufrufenden Thread (pdfium ist nicht threadsicher), die
+    Erkennung läuft in einem Thread-Pool - jeder Aufruf startet einen eigenen tesseract-Prozess,
+    es arbeiten also `workers` Prozesse parallel (OMP_THREAD_LIMIT=1 gegen Überbelegung).
+    Höchstens `workers * 2` Seitenbilder sind gleichzeitig im Speicher.
+    """
+
+    def __init__(
+        self,
+        lang: str = "deu",
+        workers: int = 2,
+        min_chars: int = 25,
+        min_dpi: int = 150,
+        max_dpi: int = 400
+    ):
+        self.lang = lang
+        self.workers = workers
+        self.min_chars = min_chars
+        self.min_dpi = min_dpi
+        self.max_dpi = max_dpi
+        self._slots = threading.BoundedSemaphore(workers * 2)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._pytesseract = None
+        self._import_error: Optional[Exception] = None
+
+    def available(self) -> bool:
+        """
+        Lazy-Load: einige macOS-Builds von numpy/pytesseract segfaulten beim Import.
+        Der Fehler wird gemerkt und nicht erneut versucht.
+        """
+        if self._pytesseract is not None:
+            return True
+        if self._import_error is not None:
+            return False
+        try:
+            import pytesseract  # type: ignore
+            from PIL import Image  # type: ignore  # noqa: F401
+            pytesseract.get_tesseract_version()
+        except Exception as exc:
+            self._import_error = exc
+            logger.warning("pytesseract/tesseract nicht verfügbar - OCR deaktiviert: %s", exc)
+            return False
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        self._pytesseract = pytesseract
+        return True
+
+    def needs_ocr(self, text: Optional[str]) -> bool:
+        """True, wenn die Textebene einer Seite zu wenig Zeichen hat (Scan oder nur Bilder)"""
+        return len(_WHITESPACE.sub("", text or "")) < self.min_chars
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+            return self._pool
+
+    def submit(self, page, lang: Optional[str] = None) -> Future:
+        """
+        Rasterisiert eine pdfplumber-Seite sofort und reiht die Erkennung ein.
+        Blockiert, solange bereits `workers * 2` Seiten in Arbeit sind.
+        """
+        if not self.available():
+            raise RuntimeError(f"OCR nicht verfügbar: {self._import_error}")
+
+        self._slots.acquire()
+        try:
+            dpi = choose_dpi(page.width, page.height, self.min_dpi, self.max_dpi)
+            image = page.to_image(resolution=dpi).original.convert("L")
+            future = self.pool.submit(self._recognize, image, lang or self.lang)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _recognize(self, image, lang: str) -> str:
+        try:
+            return self._pytesseract.image_to_string(image, lang=lang)
+        finally:
+            image.close()
+
+    def ocr_pages(
+        self,
+        pdf_path: str,
+        page_indices: Optional[Iterable[int]] = None,
+        lang: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        OCR der Seiten `page_indices` (0-basiert, Default: alle).
+        Liefert (index, text) in Seitenreihenfolge, sobald die jeweils nächste Seite fertig ist.
+        """
+        import pdfplumber
+
+        pending = deque()
+        done = 0
+        with pdfplumber.open(pdf_path) as pdf:
+            count = len(pdf.pages)
+            indices = range(count) if page_indices is None else [i for i in page_indices if i < count]
+            total = len(indices)
+            try:
+                for index in indices:
+                    page = pdf.pages[index]
+                    try:
+                        pending.append((index, self.submit(page, lang)))
+                    finally:
+                        page.close()
+                    while pending and pending[0][1].done():
+                        done += 1
+                        yield self._finish(pending.popleft(), done, total, progress)
+                while pending:
+                    done += 1
+                    yield self._finish(pending.popleft(), done, total, progress)
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def _finish(self, item, done: int, total: int, progress) -> Tuple[int, str]:
+        index, future = item
+        text = future.result()
+        logger.info(f"OCR Seite {index + 1}: {len(text)} Zeichen ({done}/{total})")
+        if progress:
+            progress(done, total)
+        return index, text
+
+
+# Global Instance
+_ocr_engine = None
+
+def get_ocr_engine() -> OCREngine:
+    """Singleton OCR Engine (OCR_LANG, OCR_WORKERS, OCR_MIN_CHARS, OCR_MIN_DPI, OCR_MAX_DPI)"""
+    global _ocr_engine
+    if _ocr_engine is None:
+        _ocr_engine = OCREngine(
+            lang=os.getenv("OCR_LANG", "deu"),
+            workers=int(os.getenv("OCR_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))),
+            min_chars=int(os.getenv("OCR_MIN_CHARS", "25")),
+            min_dpi=int(os.getenv("OCR_MIN_DPI", "150")),
+            max_dpi=int(os.getenv("OCR_MAX_DPI", "400"))
+        )
+    return _ocr_engine
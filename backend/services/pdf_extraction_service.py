@@ -2,10 +2,10 @@
 PDF Extraction Service
 Extrahiert ECHTE Daten aus Nebenkostenabrechnungen (kein Mock!)
 """
+import os
 import logging
-import re
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, NamedTuple, Tuple
 from datetime import datetime
 
 try:
@@ -22,13 +22,34 @@ except ImportError:
     HAS_PDFMINER = False
     logging.warning("pdfminer.six nicht installiert")
 
-# OCR-Module nur bei Bedarf laden, weil einige macOS-Builds von numpy/pytesseract
-# beim Import segfaulten. Wir merken uns den Fehler und versuchen es später nicht erneut.
-HAS_OCR = False
-_OCR_IMPORT_ERROR: Optional[Exception] = None
+# OCR-Module lädt die OCR Engine erst bei Bedarf (Import-Segfaults auf einigen macOS-Builds)
+from services.ocr_engine import get_ocr_engine
+from services.pdf_triage import PIPELINE_NONE, PIPELINE_OCR
+from services.nebenkosten_parser import scan_fields
+from services.layout_table import extract_positionen
 
 logger = logging.getLogger(__name__)
 
+# progress(seite, seiten_gesamt) - z.B. für Job-Fortschritt
+ProgressCallback = Callable[[int, int], None]
+
+MAX_POSITIONEN = int(os.getenv("MAX_POSITIONEN", "200"))
+
+# Bei jeder Änderung am Ergebnis erhöhen - gecachte Ergebnisse (services.result_cache) verfallen
+EXTRACTOR_VERSION = "3"
+
+
+class ExtractedPages(NamedTuple):
+    """Roh-Inhalt eines Seitenbereichs (Text + Tabellen-Positionen je Seite), in Seitenreihenfolge"""
+    texts: List[str]
+    page_positionen: List[List[Dict[str, Any]]]
+    ocr_pages: Tuple[int, ...] = ()  # 1-basierte Seitennummern, deren Text per OCR erkannt wurde
+    
+    @property
+    def positionen(self) -> List[Dict[str, Any]]:
+        return [position for positionen in self.page_positionen for position in positionen]
+
+
 class PDFExtractionService:
     """Extrahiert echte Daten aus Nebenkostenabrechnung-PDFs"""
     
@@ -39,13 +60,25 @@ class PDFExtractionService:
         if HAS_PDFMINER:
             self.extraction_methods.append(self._extract_with_pdfminer)
     
-    def extract_from_pdf(self, pdf_path: str, use_ocr: bool = False) -> Dict[str, Any]:
+    def extract_from_pdf(
+        self,
+        pdf_path: str,
+        use_ocr: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        extracted: Optional[ExtractedPages] = None,
+        pipeline: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Extrahiert Daten aus PDF-Nebenkostenabrechnung
         
         Args:
             pdf_path: Pfad zur PDF-Datei
-            use_ocr: OCR für Scans nutzen
+            use_ocr: OCR für Seiten ohne Textebene (Scans, gemischte Abrechnungen)
+            progress: Optionaler Callback pro verarbeiteter Seite
+            extracted: Bereits extrahierte Seiten (z.B. parallel pro Seitenbereich) -
+                pdfplumber wird dann nicht erneut ausgeführt
+            pipeline: Vorab gewählte Pipeline aus der Triage (services.pdf_triage.choose_pipeline);
+                None = volle Kette pdfplumber → pdfminer → OCR
             
         Returns:
             {
@@ -68,30 +101,56 @@ class PDFExtractionService:
         
         logger.info(f"📄 Extrahiere Daten aus: {pdf_path.name}")
         
-        # Versuch 1: pdfplumber (beste Strukturierung)
-        if HAS_PDFPLUMBER:
+        if pipeline == PIPELINE_NONE:
+            logger.info("⏭️ Triage: keine Textebene bzw. verschlüsselt - Extraktion übersprungen")
+            return self._get_fallback_data(
+                pdf_path, error="Keine Textebene (Scan ohne OCR) oder verschlüsseltes PDF"
+            )
+        
+        ocr = use_ocr and self._ensure_ocr_available()
+        
+        # Scan laut Triage: Textebenen-Strategien würden nur leer durchlaufen
+        if pipeline == PIPELINE_OCR and ocr and extracted is None:
             try:
-                result = self._extract_with_pdfplumber(pdf_path)
+                result = self._extract_with_ocr(pdf_path, progress)
+                if result.get("success"):
+                    logger.info("✅ Extraktion mit OCR erfolgreich")
+                    return result["data"]
+            except Exception as e:
+                logger.warning(f"OCR fehlgeschlagen: {e}")
+            return self._get_fallback_data(pdf_path)
+        
+        # Versuch 1: pdfplumber (beste Strukturierung), Seiten ohne Textebene per OCR
+        # Liefert auch ohne Erfolg den Text der Seiten - pdfminer muss dann nicht neu parsen
+        plumber_text: Optional[str] = None
+        if HAS_PDFPLUMBER or extracted is not None:
+            try:
+                if extracted is not None:
+                    result = self._parse_pages(extracted)
+                else:
+                    result = self._extract_with_pdfplumber(pdf_path, progress, ocr=ocr)
                 if result.get("success"):
                     logger.info("✅ Extraktion mit pdfplumber erfolgreich")
                     return result["data"]
+                plumber_text = result.get("text")
             except Exception as e:
                 logger.warning(f"pdfplumber fehlgeschlagen: {e}")
         
-        # Versuch 2: pdfminer (Fallback)
-        if HAS_PDFMINER:
+        # Versuch 2: pdfminer (Fallback, nur Text)
+        # Leerer Text aus pdfplumber = keine Textebene; pdfminer fände dasselbe
+        if HAS_PDFMINER and plumber_text != "":
             try:
-                result = self._extract_with_pdfminer(pdf_path)
+                result = self._extract_with_pdfminer(pdf_path, text=plumber_text)
                 if result.get("success"):
                     logger.info("✅ Extraktion mit pdfminer erfolgreich")
                     return result["data"]
             except Exception as e:
                 logger.warning(f"pdfminer fehlgeschlagen: {e}")
         
-        # Versuch 3: OCR (für Scans)
-        if use_ocr and self._ensure_ocr_available():
+        # Versuch 3: OCR aller Seiten - nur wenn pdfplumber (inkl. OCR) nicht durchlief
+        if ocr and plumber_text is None:
             try:
-                result = self._extract_with_ocr(pdf_path)
+                result = self._extract_with_ocr(pdf_path, progress)
                 if result.get("success"):
                     logger.info("✅ Extraktion mit OCR erfolgreich")
                     return result["data"]
@@ -102,213 +161,190 @@ class PDFExtractionService:
         logger.warning("⚠️ Keine Extraktion erfolgreich - Basis-Daten")
         return self._get_fallback_data(pdf_path)
     
-    def _extract_with_pdfplumber(self, pdf_path: Path) -> Dict[str, Any]:
-        """Extrahiert mit pdfplumber (strukturiert)"""
+    def _extract_with_pdfplumber(
+        self,
+        pdf_path: Path,
+        progress: Optional[ProgressCallback] = None,
+        ocr: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Extrahiert mit pdfplumber (strukturiert) in einem Durchlauf pro Seite.
+        
+        Text und Tabellen-Positionen nutzen dieselben gecachten chars der Seite,
+        danach wird der Seiten-Cache freigegeben - der Speicher wächst nicht mit der Seitenzahl.
+        Mit `ocr` werden Seiten ohne brauchbare Textebene parallel zum Weiterlesen erkannt.
+        
+        Returns:
+            Siehe _parse_pages
+        """
         import pdfplumber
         
         with pdfplumber.open(pdf_path) as pdf:
-            # Alle Seiten text
-            full_text = "\n".join(page.extract_text() or "" for page in pdf.pages)
-            
-            # Tabellen extrahieren
-            tables = []
-            for page in pdf.pages:
-                page_tables = page.extract_tables()
-                if page_tables:
-                    tables.extend(page_tables)
-            
-            # Daten parsen
-            data = self._parse_text(full_text, tables)
-            data["extraction_method"] = "pdfplumber"
-            data["raw_text"] = full_text[:1000]  # Ersten 1000 Zeichen
-            
-            return {"success": True, "data": data}
-    
-    def _extract_with_pdfminer(self, pdf_path: Path) -> Dict[str, Any]:
-        """Extrahiert mit pdfminer (Fallback)"""
-        text = pdfminer_extract(str(pdf_path))
+            extracted = self._extract_pages(pdf, range(len(pdf.pages)), progress, ocr=ocr)
         
-        data = self._parse_text(text, [])
-        data["extraction_method"] = "pdfminer"
-        data["raw_text"] = text[:1000]
-        
-        return {"success": True, "data": data}
+        return self._parse_pages(extracted)
     
-    def _ensure_ocr_available(self) -> bool:
-        """Lazy-Load OCR Dependencies to avoid crashes on import."""
-        global HAS_OCR, _OCR_IMPORT_ERROR
-
-        if HAS_OCR:
-            return True
-        if _OCR_IMPORT_ERROR:
-            logger.warning("OCR deaktiviert: %s", _OCR_IMPORT_ERROR)
-            return False
-
-        try:
-            import pytesseract  # type: ignore
-            from PIL import Image  # type: ignore
-        except Exception as exc:
-            _OCR_IMPORT_ERROR = exc
-            logger.warning("pytesseract/PIL nicht verfügbar - OCR deaktiviert: %s", exc)
-            return False
-
-        # Module global bereitstellen, damit _extract_with_ocr darauf zugreifen kann.
-        globals()["pytesseract"] = pytesseract
-        globals()["Image"] = Image
-        HAS_OCR = True
-        return True
-
-    def _extract_with_ocr(self, pdf_path: Path) -> Dict[str, Any]:
-        """Extrahiert mit OCR (für Scans)"""
-        # TODO: PDF → Image → OCR
-        # Für Sprint 1: Not implemented
-        logger.warning("OCR noch nicht implementiert")
-        return {"success": False}
-    
-    def _parse_text(self, text: str, tables: List[List[List[str]]]) -> Dict[str, Any]:
+    def _extract_pages(
+        self,
+        pdf,
+        page_indices: range,
+        progress: Optional[ProgressCallback] = None,
+        ocr: bool = False
+    ) -> ExtractedPages:
         """
-        Parst extrahierten Text und extrahiert Nebenkosten-Daten
+        Text + Tabellen-Positionen (services.layout_table) der Seiten `page_indices` (0-basiert)
+        eines geöffneten pdfplumber-PDFs.
+        Mit `ocr` werden Seiten ohne brauchbare Textebene an die OCR Engine übergeben;
+        deren Ergebnis wird am Ende an der richtigen Stelle eingesetzt.
         """
-        data = {
-            "titel": self._extract_titel(text),
-            "abrechnungszeitraum": self._extract_zeitraum(text),
-            "verwalter": self._extract_verwalter(text),
-            "objekt_adresse": self._extract_adresse(text),
-            "gesamtkosten": self._extract_gesamtkosten(text),
-            "positionen": self._extract_positionen(text, tables)
-        }
+        engine = get_ocr_engine() if ocr else None
+        page_texts: List[str] = []
+        page_positionen: List[List[Dict[str, Any]]] = []
+        ocr_futures = {}
+        total = len(page_indices)
+        done = 0
         
-        return data
-    
-    def _extract_titel(self, text: str) -> str:
-        """Extrahiert Titel/Überschrift"""
-        # Suche nach "Nebenkostenabrechnung", "Betriebskostenabrechnung" etc.
-        patterns = [
-            r"(Nebenkostenabrechnung.*\d{4})",
-            r"(Betriebskostenabrechnung.*\d{4})",
-            r"(Jahresabrechnung.*\d{4})",
-        ]
+        for index in page_indices:
+            page = pdf.pages[index]
+            positionen = []
+            needs_ocr = False
+            try:
+                text = page.extract_text() or ""
+                needs_ocr = engine is not None and engine.needs_ocr(text)
+                if needs_ocr:
+                    ocr_futures[len(page_texts)] = (index, engine.submit(page))
+                else:
+                    try:
+                        positionen = extract_positionen(page)
+                    except Exception as e:
+                        logger.warning(f"Tabellen auf Seite {index + 1} übersprungen: {e}")
+            finally:
+                page.close()
+            page_texts.append(text)
+            page_positionen.append(positionen)
+            if not needs_ocr:
+                done += 1
+                if progress:
+                    progress(done, total)
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
+        ocr_pages = []
+        for slot, (index, future) in ocr_futures.items():
+            try:
+                page_texts[slot] = future.result()
+                ocr_pages.append(index + 1)
+            except Exception as e:
+                logger.warning(f"OCR Seite {index + 1} fehlgeschlagen: {e}")
+            done += 1
+            if progress:
+                progress(done, total)
         
-        # Fallback: Erste Zeile
-        lines = [l.strip() for l in text.split("\n") if l.strip()]
-        return lines[0] if lines else "Nebenkostenabrechnung"
+        return ExtractedPages(page_texts, page_positionen, tuple(ocr_pages))
     
-    def _extract_zeitraum(self, text: str) -> str:
-        """Extrahiert Abrechnungszeitraum"""
-        # Pattern: "01.01.2023 - 31.12.2023" oder "2023"
-        patterns = [
-            r"(\d{2}\.\d{2}\.\d{4})\s*[-–bis]\s*(\d{2}\.\d{2}\.\d{4})",
-            r"Abrechnungszeitraum[:\s]*(\d{2}\.\d{2}\.\d{4})\s*[-–bis]\s*(\d{2}\.\d{2}\.\d{4})",
-            r"Zeitraum[:\s]*(\d{2}\.\d{2}\.\d{4})\s*[-–bis]\s*(\d{2}\.\d{2}\.\d{4})",
-            r"(\d{4})",  # Nur Jahr
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                if len(match.groups()) >= 2:
-                    return f"{match.group(1)} - {match.group(2)}"
-                return match.group(1)
+    def _parse_pages(self, extracted: ExtractedPages) -> Dict[str, Any]:
+        """
+        Parst extrahierte Seiten.
         
-        # Fallback: Aktuelles Jahr
-        return str(datetime.now().year)
-    
-    def _extract_verwalter(self, text: str) -> str:
-        """Extrahiert Verwalter/Hausverwaltung"""
-        patterns = [
-            r"Hausverwaltung[:\s]*([^\n]+)",
-            r"Verwalter[:\s]*([^\n]+)",
-            r"Verwaltung[:\s]*([^\n]+)",
-        ]
+        Returns:
+            {"success": True, "data": ...} oder {"success": False, "text": str}, wenn
+            der Text allein weiterverwendet werden soll (leer = keine Textebene)
+        """
+        full_text = "\n".join(extracted.texts)
+        if not full_text.strip():
+            logger.info("Keine Textebene gefunden (pdfplumber)")
+            return {"success": False, "text": ""}
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
+        # Daten parsen
+        try:
+            data = self._parse_text(full_text, extracted.positionen)
+        except Exception as e:
+            logger.warning(f"Tabellen-Auswertung fehlgeschlagen, nur Text: {e}")
+            return {"success": False, "text": full_text}
+        data["extraction_method"] = "pdfplumber+ocr" if extracted.ocr_pages else "pdfplumber"
+        data["raw_text"] = full_text[:1000]  # Ersten 1000 Zeichen
+        if extracted.ocr_pages:
+            data["ocr_pages"] = list(extracted.ocr_pages)
         
-        return "Nicht erkannt"
+        return {"success": True, "data": data}
     
-    def _extract_adresse(self, text: str) -> str:
-        """Extrahiert Objekt-Adresse"""
-        # Pattern: Straße Nr, PLZ Ort
-        pattern = r"([A-ZÄÖÜ][a-zäöüß\-]+(?:\s+[A-ZÄÖÜ][a-zäöüß\-]+)*\s+\d+[a-z]?),?\s+(\d{5})\s+([A-ZÄÖÜ][a-zäöüß\-]+(?:\s+[A-ZÄÖÜ][a-zäöüß\-]+)*)"
+    def _extract_with_pdfminer(self, pdf_path: Path, text: Optional[str] = None) -> Dict[str, Any]:
+        """Extrahiert mit pdfminer (Fallback); bereits extrahierter Text wird wiederverwendet"""
+        if text is None:
+            text = pdfminer_extract(str(pdf_path))
         
-        match = re.search(pattern, text)
-        if match:
-            return f"{match.group(1)}, {match.group(2)} {match.group(3)}"
+        data = self._parse_text(text, [])
+        data["extraction_method"] = "pdfminer"
+        data["raw_text"] = text[:1000]
         
-        return "Nicht erkannt"
+        return {"success": True, "data": data}
     
-    def _extract_gesamtkosten(self, text: str) -> float:
-        """Extrahiert Gesamtkosten"""
-        patterns = [
-            r"Gesamtbetrag[:\s]*([\d\.]+,\d{2})\s*€",
-            r"Gesamtkosten[:\s]*([\d\.]+,\d{2})\s*€",
-            r"Summe[:\s]*([\d\.]+,\d{2})\s*€",
-            r"Nachzahlung[:\s]*([\d\.]+,\d{2})\s*€",
-        ]
+    def _ensure_ocr_available(self) -> bool:
+        """OCR nur, wenn pytesseract + tesseract vorhanden sind (lazy, siehe OCREngine.available)"""
+        return get_ocr_engine().available()
+
+    def _extract_with_ocr(
+        self,
+        pdf_path: Path,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """Extrahiert mit OCR (alle Seiten, z.B. wenn pdfplumber die Datei nicht lesen kann)"""
+        texts = [text for _, text in get_ocr_engine().ocr_pages(str(pdf_path), progress=progress)]
+        full_text = "\n".join(texts)
+        if not full_text.strip():
+            return {"success": False}
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                betrag_str = match.group(1).replace(".", "").replace(",", ".")
-                return float(betrag_str)
+        data = self._parse_text(full_text, [])
+        data["extraction_method"] = "ocr"
+        data["raw_text"] = full_text[:1000]
+        data["ocr_pages"] = list(range(1, len(texts) + 1))
         
-        return 0.0
+        return {"success": True, "data": data}
     
-    def _extract_positionen(self, text: str, tables: List[List[List[str]]]) -> List[Dict[str, Any]]:
-        """Extrahiert einzelne Kostenpositionen"""
-        positionen = []
-        
-        # Aus Tabellen extrahieren (wenn vorhanden)
-        if tables:
-            for table in tables:
-                for row in table[1:]:  # Skip header
-                    if len(row) >= 2:
-                        name = str(row[0]).strip()
-                        betrag_str = str(row[-1]).strip()  # Letzter Wert = Betrag
-                        
-                        # Parse Betrag
-                        betrag = self._parse_betrag(betrag_str)
-                        if betrag > 0:
-                            positionen.append({
-                                "name": name,
-                                "betrag": betrag,
-                                "umlageschluessel": row[1] if len(row) > 2 else "Nicht angegeben"
-                            })
+    def _parse_text(self, text: str, table_positionen: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Parst extrahierten Text und extrahiert Nebenkosten-Daten (ein Durchlauf, siehe
+        services.nebenkosten_parser). Positionen aus Tabellen haben Vorrang vor Treffern im Text.
+        """
+        scan = scan_fields(text, max_positionen=0 if table_positionen else MAX_POSITIONEN)
         
-        # Aus Text extrahieren (Fallback)
-        if not positionen:
-            # Pattern: "Heizkosten 450,00 €"
-            pattern = r"([A-ZÄÖÜ][a-zäöüß\-/]+(?:\s+[a-zäöüß\-/]+)*)\s+([\d\.]+,\d{2})\s*€"
-            matches = re.findall(pattern, text)
-            
-            for name, betrag_str in matches:
-                betrag = self._parse_betrag(betrag_str)
-                if betrag > 10:  # Filter kleine Beträge
-                    positionen.append({
-                        "name": name.strip(),
-                        "betrag": betrag,
-                        "umlageschluessel": "Nicht angegeben"
-                    })
+        data = {
+            "titel": scan.titel[1] if scan.titel else scan.first_line or "Nebenkostenabrechnung",
+            "abrechnungszeitraum": (
+                scan.abrechnungszeitraum[1] if scan.abrechnungszeitraum else str(datetime.now().year)
+            ),
+            "verwalter": scan.verwalter[1] if scan.verwalter else "Nicht erkannt",
+            "objekt_adresse": scan.objekt_adresse[1] if scan.objekt_adresse else "Nicht erkannt",
+            "gesamtkosten": scan.gesamtkosten[1] if scan.gesamtkosten else 0.0,
+            "positionen": (table_positionen or scan.positionen)[:MAX_POSITIONEN]
+        }
         
-        return positionen[:20]  # Max 20 Positionen
+        return data
     
-    def _parse_betrag(self, betrag_str: str) -> float:
-        """Parst Betrag-String zu Float"""
-        try:
-            # "1.234,56" → 1234.56
-            clean = betrag_str.replace(".", "").replace(",", ".").replace("€", "").strip()
-            return float(clean)
-        except ValueError:
-            return 0.0
+    def _scan_page(
+        self,
+        page_number: int,
+        text: str,
+        table_positionen: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Befunde einer einzelnen Seite (für das seitenweise Streaming, ohne Gesamttext).
+        Kopfdaten als (Rang, Wert) - Rang 0 ist der beste Treffer, vergleichbar über Seiten hinweg.
+        """
+        scan = scan_fields(text, max_positionen=0 if table_positionen else MAX_POSITIONEN)
+        return {
+            "page": page_number,
+            "has_text": bool(text.strip()),
+            "first_line": scan.first_line,
+            "text_head": text[:1000],
+            "titel": scan.titel,
+            "abrechnungszeitraum": scan.abrechnungszeitraum,
+            "verwalter": scan.verwalter,
+            "objekt_adresse": scan.objekt_adresse,
+            "gesamtkosten": scan.gesamtkosten,
+            "table_positionen": table_positionen,
+            "text_positionen": scan.positionen,
+        }
     
-    def _get_fallback_data(self, pdf_path: Path) -> Dict[str, Any]:
+    def _get_fallback_data(self, pdf_path: Path, error: Optional[str] = None) -> Dict[str, Any]:
         """Fallback-Daten wenn Extraktion fehlschlägt"""
         return {
             "titel": f"Abrechnung - {pdf_path.stem}",
@@ -318,7 +354,7 @@ class PDFExtractionService:
             "gesamtkosten": 0.0,
             "positionen": [],
             "extraction_method": "fallback",
-            "error": "Keine Extraktionsmethode erfolgreich"
+            "error": error or "Keine Extraktionsmethode erfolgreich"
         }
 
 # Global Instance
@@ -330,3 +366,49 @@ def get_extraction_service() -> PDFExtractionService:
     if _extraction_service is None:
         _extraction_service = PDFExtractionService()
     return _extraction_service
+
+
+def extract_pdf_data(
+    pdf_path: str,
+    use_ocr: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    extracted: Optional[ExtractedPages] = None,
+    pipeline: Optional[str] = None
+) -> Dict[str, Any]:
+    """Top-Level-Einstieg für den Prozess-Pool (eine Service-Instanz pro Worker)"""
+    return get_extraction_service().extract_from_pdf(
+        pdf_path, use_ocr=use_ocr, progress=progress, extracted=extracted, pipeline=pipeline
+    )
+
+
+def extraction_cache_options(use_ocr: bool = False, pipeline: Optional[str] = None) -> Dict[str, Any]:
+    """Optionen, die das Ergebnis von extract_pdf_data bestimmen (Teil des Cache-Schlüssels)"""
+    return {"use_ocr": use_ocr, "pipeline": pipeline, "ocr_lang": get_ocr_engine().lang if use_ocr else None}
+
+
+def scan_page_range(pdf_path: str, first: int, last: int, use_ocr: bool = False) -> List[Dict[str, Any]]:
+    """Seitenbefunde für [first, last) (0-basiert) - nur Treffer, kein Seitentext zurück an den Aufrufer"""
+    import pdfplumber
+    
+    service = get_extraction_service()
+    ocr = use_ocr and service._ensure_ocr_available()
+    with pdfplumber.open(pdf_path) as pdf:
+        indices = range(first, min(last, len(pdf.pages)))
+        extracted = service._extract_pages(pdf, indices, ocr=ocr)
+    return [
+        dict(
+            service._scan_page(index + 1, text, positionen),
+            ocr=index + 1 in extracted.ocr_pages
+        )
+        for index, text, positionen in zip(indices, extracted.texts, extracted.page_positionen)
+    ]
+
+
+def extract_page_range(pdf_path: str, first: int, last: int, use_ocr: bool = False) -> ExtractedPages:
+    """Extrahiert nur die Seiten [first, last) (0-basiert) - ein Shard der parallelen Extraktion"""
+    import pdfplumber
+    
+    service = get_extraction_service()
+    ocr = use_ocr and service._ensure_ocr_available()
+    with pdfplumber.open(pdf_path) as pdf:
+        return service._extract_pages(pdf, range(first, min(last, len(pdf.pages))), ocr=ocr)
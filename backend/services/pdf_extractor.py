@@ -2,13 +2,108 @@
 PDF Extractor Service
 Extrahiert Text und Formularfelder aus PDFs (digital + OCR).
 """
-import re
+import os
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from pathlib import Path
 
+from services.ocr_engine import get_ocr_engine
+from services.field_guesser import guess_fields, normalize_field_id
+from services.form_layout_detector import HAS_PDFPLUMBER, detect_form_layout
+from services.pdf_triage import KIND_ENCRYPTED, KIND_SCANNED
+
+try:
+    import pikepdf
+    HAS_PIKEPDF = True
+except ImportError:
+    HAS_PIKEPDF = False
+    logging.warning("pikepdf nicht installiert - AcroForm-Extraktion deaktiviert")
+
 logger = logging.getLogger(__name__)
 
+# Bei jeder Änderung am FormSchema erhöhen - gecachte Ergebnisse (services.result_cache) verfallen
+EXTRACTOR_VERSION = "5"
+
+# Eingabefelder flacher PDFs aus Kästchen/Linien erkennen (services.form_layout_detector)
+FORM_LAYOUT_DETECTION = os.getenv("FORM_LAYOUT_DETECTION", "true").lower() in ("1", "true", "yes")
+
+# FT = Field Type
+FIELD_TYPES = {
+    "/Tx": "string",      # Text
+    "/Btn": "checkbox",   # Button/Checkbox
+    "/Ch": "select",      # Choice
+    "/Sig": "signature"   # Signature
+}
+
+# Von Eltern-Feldern geerbte Attribute (PDF 1.7, 12.7.3.1)
+INHERITABLE = ("/FT", "/Ff", "/V")
+
+FLAG_REQUIRED = 2  # Ff Bit 2
+
+
+def _field_value(value: Any) -> Any:
+    """/V als Python-Wert: Text, Name ohne "/" (z.B. "Yes"), Liste bei Mehrfachauswahl"""
+    if value is None:
+        return None
+    if isinstance(value, pikepdf.Name):
+        return str(value)[1:]
+    if isinstance(value, pikepdf.Array):
+        return [_field_value(item) for item in value]
+    return str(value)
+
+
+def _walk_fields(
+    nodes,
+    parent_name: Optional[str],
+    inherited: Dict[str, Any],
+    fields: List[Dict[str, Any]],
+    seen: set
+) -> None:
+    """
+    Feldbaum (/Fields → /Kids) in Dokumentreihenfolge. Endfelder sind Knoten ohne Kinder mit
+    eigenem /T - deren /Kids sind nur Widgets (z.B. die Knöpfe einer Radio-Gruppe).
+    Feld-ID = voll qualifizierter Name ("eltern.kind"), /FT, /Ff und /V werden vererbt.
+    """
+    for node in nodes:
+        if not isinstance(node, pikepdf.Dictionary):
+            continue
+        if node.is_indirect:
+            if node.objgen in seen:  # Zyklen in defekten Dateien
+                continue
+            seen.add(node.objgen)
+        
+        partial = str(node.T) if "/T" in node else None
+        if partial is None and parent_name is None:
+            continue  # Widget ohne Feldnamen
+        name = f"{parent_name}.{partial}" if parent_name and partial else (partial or parent_name)
+        attributes = dict(inherited)
+        for key in INHERITABLE:
+            if key in node:
+                attributes[key] = node[key]
+        
+        kids = [kid for kid in node.get("/Kids", []) if isinstance(kid, pikepdf.Dictionary) and "/T" in kid]
+        if kids:
+            _walk_fields(kids, name, attributes, fields, seen)
+            continue
+        
+        flags = int(attributes.get("/Ff", 0))
+        fields.append({
+            "id": name,
+            "label": str(node.TU) if "/TU" in node else partial or name,
+            "type": FIELD_TYPES.get(str(attributes.get("/FT", "/Tx")), "string"),
+            "value": _field_value(attributes.get("/V")),
+            "required": (flags & FLAG_REQUIRED) != 0
+        })
+
+
+def acroform_fields(pdf) -> List[Dict[str, Any]]:
+    """AcroForm-Felder eines geöffneten pikepdf-PDFs (leer, wenn es kein AcroForm hat)"""
+    fields: List[Dict[str, Any]] = []
+    acroform = pdf.Root.get("/AcroForm")
+    if acroform is not None and "/Fields" in acroform:
+        _walk_fields(acroform.Fields, None, {}, fields, set())
+    return fields
+
 class PDFExtractor:
     """Extrahiert FormSchema aus PDF-Dateien"""
     
@@ -16,214 +111,184 @@ class PDFExtractor:
         self.ocr_enabled = ocr_enabled
         self.ocr_lang = ocr_lang
         
-    def extract_text(self, pdf_path: str) -> str:
+    def extract_text(
+        self,
+        pdf_path: str,
+        progress: Optional[Callable[[int, int], None]] = None,
+        page_numbers: Optional[range] = None
+    ) -> str:
         """
         Extrahiert Text aus PDF (digital oder OCR).
         
         Args:
             pdf_path: Pfad zur PDF-Datei
+            progress: Optionaler Callback (seite, seiten_gesamt) für die OCR-Schleife
+            page_numbers: Nur diese Seiten (0-basiert), z.B. ein Shard der parallelen Extraktion
             
         Returns:
             Extrahierter Text
         """
+        text = ""
         try:
             # Versuch 1: Digitales PDF mit pdfminer
             from pdfminer.high_level import extract_text
-            text = extract_text(pdf_path)
+            text = extract_text(pdf_path, page_numbers=page_numbers)
             
             if text.strip():
                 logger.info(f"Digital PDF text extracted: {len(text)} chars")
-                return text
                 
         except Exception as e:
             logger.warning(f"pdfminer extraction failed: {e}")
         
-        # Versuch 2: OCR mit pytesseract + pdfplumber
-        if self.ocr_enabled:
+        # Versuch 2: OCR mit pytesseract - nur Seiten ohne brauchbare Textebene
+        if self.ocr_enabled and get_ocr_engine().available():
             try:
-                return self._extract_with_ocr(pdf_path)
+                return self._ocr_missing_pages(pdf_path, text, progress, page_numbers)
             except Exception as e:
                 logger.error(f"OCR extraction failed: {e}")
                 
-        return ""
+        return text
     
-    def _extract_with_ocr(self, pdf_path: str) -> str:
-        """OCR-Fallback für Scans"""
-        try:
-            import pytesseract
-            import pdfplumber
-            
-            pages = []
-            with pdfplumber.open(pdf_path) as pdf:
-                for i, page in enumerate(pdf.pages):
-                    logger.info(f"OCR processing page {i+1}/{len(pdf.pages)}")
-                    img = page.to_image(resolution=300).original
-                    text = pytesseract.image_to_string(img, lang=self.ocr_lang)
-                    pages.append(text)
-                    
-            full_text = "\n\n".join(pages)
-            logger.info(f"OCR completed: {len(full_text)} chars")
-            return full_text
-            
-        except ImportError:
-            logger.warning("pytesseract or pdfplumber not installed, OCR disabled")
-            return ""
+    def _ocr_missing_pages(
+        self,
+        pdf_path: str,
+        text: str,
+        progress: Optional[Callable[[int, int], None]] = None,
+        page_numbers: Optional[range] = None
+    ) -> str:
+        """
+        Ersetzt Seiten ohne Textebene im pdfminer-Text durch OCR.
+        pdfminer beendet jede Seite mit Form Feed - darüber werden Seiten zugeordnet.
+        """
+        engine = get_ocr_engine()
+        if not text.strip():
+            return self._extract_with_ocr(pdf_path, progress, page_numbers)
+        
+        parts = text.split("\f")
+        if parts and not parts[-1].strip():
+            parts.pop()
+        indices = list(page_numbers) if page_numbers is not None else list(range(len(parts)))
+        missing = {
+            indices[slot]: slot for slot, part in enumerate(parts[:len(indices)]) if engine.needs_ocr(part)
+        }
+        if not missing:
+            return text
+        
+        for index, ocr_text in engine.ocr_pages(pdf_path, missing, lang=self.ocr_lang, progress=progress):
+            parts[missing[index]] = ocr_text
+        
+        logger.info(f"OCR für {len(missing)} von {len(parts)} Seiten ohne Textebene")
+        return "\f".join(parts) + "\f"
+    
+    def _extract_with_ocr(
+        self,
+        pdf_path: str,
+        progress: Optional[Callable[[int, int], None]] = None,
+        page_numbers: Optional[range] = None
+    ) -> str:
+        """OCR-Fallback für Scans (alle Seiten, parallel über die OCR Engine)"""
+        pages = [
+            text for _, text in get_ocr_engine().ocr_pages(
+                pdf_path, page_numbers, lang=self.ocr_lang, progress=progress
+            )
+        ]
+        full_text = "\n\n".join(pages)
+        logger.info(f"OCR completed: {len(full_text)} chars")
+        return full_text
     
     def extract_acroform_fields(self, pdf_path: str) -> List[Dict[str, Any]]:
         """
-        Extrahiert AcroForm-Felder aus PDF.
+        Extrahiert AcroForm-Felder direkt aus /AcroForm /Fields (ein pikepdf-open, ohne die
+        Seiten zu parsen).
         
         Returns:
-            Liste von Feldern mit id, label, type, required
+            Liste von Feldern mit id, label, type, value, required
         """
-        fields = []
+        if not HAS_PIKEPDF:
+            return []
         
+        fields: List[Dict[str, Any]] = []
         try:
-            from pdfrw import PdfReader
+            with pikepdf.open(pdf_path) as pdf:
+                fields = acroform_fields(pdf)
             
-            pdf = PdfReader(pdf_path)
+            if fields:
+                logger.info(f"Extracted {len(fields)} AcroForm fields")
             
-            for page in pdf.pages:
-                if not page.Annots:
-                    continue
-                    
-                for annot in page.Annots:
-                    if not annot.T:  # Kein Feldname
-                        continue
-                        
-                    field_name = annot.T[1:-1] if annot.T.startswith('(') else annot.T
-                    field_type = self._get_field_type(annot)
-                    field_value = annot.V if hasattr(annot, 'V') else None
-                    
-                    # Optional: Label aus TU (Tooltip/Alternative Description)
-                    field_label = annot.TU[1:-1] if hasattr(annot, 'TU') and annot.TU else field_name
-                    
-                    fields.append({
-                        "id": field_name,
-                        "label": field_label,
-                        "type": field_type,
-                        "value": field_value,
-                        "required": hasattr(annot, 'Ff') and (int(annot.Ff) & 2) != 0  # Bit 2 = Required
-                    })
-                    
-            logger.info(f"Extracted {len(fields)} AcroForm fields")
-            
-        except ImportError:
-            logger.warning("pdfrw not installed, AcroForm extraction disabled")
+        except pikepdf.PasswordError:
+            logger.warning("AcroForm extraction skipped: PDF is encrypted")
         except Exception as e:
             logger.error(f"AcroForm extraction failed: {e}")
             
         return fields
     
-    def _get_field_type(self, annot) -> str:
-        """Bestimmt Feldtyp aus AcroForm Annotation"""
-        # FT = Field Type
-        if not hasattr(annot, 'FT'):
-            return "string"
-            
-        ft = annot.FT[1:] if annot.FT.startswith('/') else annot.FT
-        
-        type_map = {
-            "Tx": "string",      # Text
-            "Btn": "checkbox",   # Button/Checkbox
-            "Ch": "select",      # Choice
-            "Sig": "signature"   # Signature
-        }
+    def _extract_layout(
+        self,
+        pdf_path: str,
+        progress: Optional[Callable[[int, int], None]] = None,
+        with_text: bool = True,
+        page_numbers: Optional[range] = None
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        (Layout-Felder, Text) aus einem pdfplumber-Durchlauf. Seiten ohne Textebene werden wie
+        in extract_text per OCR ergänzt; schlägt pdfplumber fehl, bleibt es bei extract_text.
+        """
+        try:
+            layout = detect_form_layout(
+                pdf_path, page_numbers=page_numbers, with_text=with_text, progress=progress
+            )
+        except Exception as e:
+            logger.warning(f"Layout field detection failed: {e}")
+            return [], self.extract_text(pdf_path, progress, page_numbers) if with_text else ""
+        if not with_text:
+            return layout.fields, ""
         
-        return type_map.get(ft, "string")
+        # Seiten wie bei pdfminer mit Form Feed abschließen (siehe _ocr_missing_pages)
+        text = "".join(page_text + "\f" for page_text in layout.texts)
+        if self.ocr_enabled and get_ocr_engine().available():
+            try:
+                text = self._ocr_missing_pages(pdf_path, text, progress, page_numbers)
+            except Exception as e:
+                logger.error(f"OCR extraction failed: {e}")
+        return layout.fields, text
     
     def guess_fields_from_text(self, text: str) -> List[Dict[str, Any]]:
         """
         Heuristik: Erkennt Felder aus Text-Pattern (für nicht-AcroForm PDFs).
         
-        Pattern: 
+        Pattern (siehe services.field_guesser):
         - "Label: _______"
         - "Label [______]"
-        - "Label ☐"
+        - "☐ Label" / "[ ] Label"
         """
-        fields = []
-        
-        # Pattern 1: Label: ______ oder Label [____]
-        pattern1 = re.compile(
-            r'([A-ZÄÖÜa-zäöüß\s/()\-\.]+):\s*_{3,}|'
-            r'([A-ZÄÖÜa-zäöüß\s/()\-\.]+)\s*\[.{3,}\]'
-        )
-        
-        for match in pattern1.finditer(text):
-            label = (match.group(1) or match.group(2) or '').strip()
-            if len(label) < 2 or len(label) > 100:
-                continue
-                
-            field_id = self._normalize_field_id(label)
-            field_type = self._guess_field_type(label)
-            
-            fields.append({
-                "id": field_id,
-                "label": label,
-                "type": field_type,
-                "required": False,
-                "confidence": 0.6
-            })
-        
-        # Pattern 2: Checkbox-Felder  "☐ Label" oder "[ ] Label"
-        pattern2 = re.compile(r'[☐\[\]]\s+([A-ZÄÖÜa-zäöüß\s/()\-\.]{3,50})')
-        
-        for match in pattern2.finditer(text):
-            label = match.group(1).strip()
-            field_id = self._normalize_field_id(label)
-            
-            fields.append({
-                "id": field_id,
-                "label": label,
-                "type": "checkbox",
-                "required": False,
-                "confidence": 0.7
-            })
-        
+        fields = guess_fields(text)
         logger.info(f"Guessed {len(fields)} fields from text patterns")
         return fields
     
-    def _normalize_field_id(self, label: str) -> str:
-        """Normalisiert Label zu field_id: 'Vorname' -> 'vorname'"""
-        # Sonderzeichen entfernen, Leerzeichen durch Underscore
-        field_id = re.sub(r'[^\w\s]', '', label)
-        field_id = field_id.lower().strip().replace(' ', '_')
-        return field_id
-    
-    def _guess_field_type(self, label: str) -> str:
-        """Rät Feldtyp aus Label-Text"""
-        label_lower = label.lower()
-        
-        # Datum
-        if any(word in label_lower for word in ['datum', 'geburt', 'date', 'von', 'bis']):
-            return "date"
-        
-        # Telefon
-        if any(word in label_lower for word in ['telefon', 'tel.', 'mobil', 'handy', 'phone']):
-            return "tel"
-        
-        # Email
-        if 'mail' in label_lower:
-            return "email"
-        
-        # IBAN
-        if 'iban' in label_lower or 'kontoverbindung' in label_lower:
-            return "iban"
-        
-        # PLZ
-        if 'plz' in label_lower or 'postleitzahl' in label_lower:
-            return "plz"
-        
-        # Number
-        if any(word in label_lower for word in ['anzahl', 'betrag', 'summe', 'höhe', 'zahl', 'nummer']):
-            return "number"
-        
-        return "string"
-    
-    def extract_form_schema(self, pdf_path: str, form_id: Optional[str] = None) -> Dict[str, Any]:
+    def extract_form_schema(
+        self,
+        pdf_path: str,
+        form_id: Optional[str] = None,
+        filename: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        text: Optional[str] = None,
+        triage: Optional[Dict[str, Any]] = None,
+        layout_fields: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
         """
         Hauptmethode: Extrahiert vollständiges FormSchema.
         
+        Args:
+            pdf_path: Pfad zur PDF-Datei
+            form_id: Optionale Form-ID
+            filename: Original-Dateiname (Blobs liegen unter ihrem Hash auf Disk)
+            progress: Optionaler Callback (seite, seiten_gesamt) für OCR-Fortschritt
+            text: Bereits extrahierter Text (z.B. parallel pro Seitenbereich)
+            triage: Ergebnis von PDFTriageService.triage (als dict) - überspringt Strategien,
+                die laut Dokumentstruktur nichts liefern können
+            layout_fields: Bereits erkannte Layout-Felder (zusammen mit `text` pro Seitenbereich
+                extrahiert) - dann keine eigene Layout-Erkennung
+        
         Returns:
             {
                 "form_id": str,
@@ -233,24 +298,38 @@ class PDFExtractor:
             }
         """
         path = Path(pdf_path)
+        display_name = Path(filename).name if filename else path.name
+        
+        kind = triage["kind"] if triage else None
         
-        # 1. Text extrahieren
-        text = self.extract_text(pdf_path)
+        # 1. AcroForm-Felder (falls vorhanden) - vor dem Text, der dann nicht mehr gebraucht wird
+        if triage is None or triage["acroform_fields"]:
+            acro_fields = self.extract_acroform_fields(pdf_path)
+        else:
+            acro_fields = []
         
-        # 2. AcroForm-Felder (falls vorhanden)
-        acro_fields = self.extract_acroform_fields(pdf_path)
+        # 2. Text extrahieren - bei flachen PDFs zusammen mit den Layout-Feldern (ein pdfplumber-
+        #    Durchlauf); Scans haben keine Vektorgrafik
+        detect_layout = layout_fields is None and not acro_fields and uses_layout_detection(triage)
+        layout_fields = layout_fields if layout_fields is not None and not acro_fields else []
+        if text is None:
+            if acro_fields:
+                # Felder kommen aus dem AcroForm - Text nur für den Titel (Seite 1)
+                text = self.extract_text(pdf_path, page_numbers=[0])
+            elif kind == KIND_ENCRYPTED or (kind == KIND_SCANNED and not self.ocr_enabled):
+                text = ""
+            elif detect_layout:
+                layout_fields, text = self._extract_layout(pdf_path, progress)
+            else:
+                text = self.extract_text(pdf_path, progress)
+        elif detect_layout:
+            layout_fields = self._extract_layout(pdf_path, with_text=False)[0]
         
-        # 3. Text-basierte Felder (Fallback)
-        text_fields = self.guess_fields_from_text(text) if not acro_fields else []
+        # 3. Text-basierte Felder ("Label: ____" ohne Vektorgrafik) - ergänzen die Layout-Felder
+        text_fields = _new_fields(layout_fields, self.guess_fields_from_text(text)) if not acro_fields else []
         
-        # 4. Titel aus Filename oder erstem Text
-        title = path.stem.replace('_', ' ').title()
-        if text:
-            first_lines = text.split('\n')[:5]
-            for line in first_lines:
-                if len(line) > 10 and len(line) < 100:
-                    title = line.strip()
-                    break
+        # 4. Titel aus erstem Text oder Filename
+        title = _title_from_text(text) or _title_from_filename(display_name)
         
         # 5. Form-ID generieren
         if not form_id:
@@ -259,21 +338,104 @@ class PDFExtractor:
         return {
             "form_id": form_id,
             "title": title,
-            "fields": acro_fields if acro_fields else text_fields,
+            "fields": acro_fields or layout_fields + text_fields,
             "source": {
-                "file": path.name,
+                "file": display_name,
                 "path": str(path.absolute()),
-                "has_acroform": len(acro_fields) > 0
+                "has_acroform": len(acro_fields) > 0,
+                "kind": kind
             },
             "stats": {
                 "text_length": len(text),
-                "field_count": len(acro_fields) + len(text_fields)
+                "field_count": len(acro_fields) + len(layout_fields) + len(text_fields),
+                "layout_fields": len(layout_fields)
             }
         }
 
 
-# Convenience function
-def extract_form(pdf_path: str, ocr_enabled: bool = True) -> Dict[str, Any]:
+def _new_fields(known: List[Dict[str, Any]], fields: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Felder, die in `known` weder mit gleicher ID noch mit gleichem Label vorkommen"""
+    taken = {field["id"] for field in known} | {normalize_field_id(field["label"]) for field in known}
+    return [
+        field for field in fields
+        if field["id"] not in taken and normalize_field_id(field["label"]) not in taken
+    ]
+
+
+def _title_from_filename(filename: str) -> str:
+    return Path(filename).stem.replace('_', ' ').title()
+
+
+def _title_from_text(text: str) -> Optional[str]:
+    """Erste Zeile passender Länge unter den ersten fünf"""
+    for line in text.split('\n')[:5]:
+        if len(line) > 10 and len(line) < 100:
+            return line.strip()
+    return None
+
+
+# Convenience function (Top-Level → auch als Job im Prozess-Pool nutzbar)
+def extract_form(
+    pdf_path: str,
+    ocr_enabled: bool = True,
+    form_id: Optional[str] = None,
+    filename: Optional[str] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    text: Optional[str] = None,
+    triage: Optional[Dict[str, Any]] = None,
+    layout_fields: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
     """Schnelle Extraktion ohne Instanziierung"""
     extractor = PDFExtractor(ocr_enabled=ocr_enabled)
-    return extractor.extract_form_schema(pdf_path)
+    return extractor.extract_form_schema(
+        pdf_path, form_id=form_id, filename=filename, progress=progress, text=text, triage=triage,
+        layout_fields=layout_fields
+    )
+
+
+def uses_layout_detection(triage: Optional[Dict[str, Any]] = None) -> bool:
+    """Ob flache Seiten die Layout-Erkennung durchlaufen (Scans haben keine Vektorgrafik)"""
+    kind = triage["kind"] if triage else None
+    return FORM_LAYOUT_DETECTION and HAS_PDFPLUMBER and kind not in (KIND_ENCRYPTED, KIND_SCANNED)
+
+
+def extract_layout_range(
+    pdf_path: str, first: int, last: int, ocr_enabled: bool = True
+) -> Tuple[List[Dict[str, Any]], str]:
+    """(Layout-Felder, Text) der Seiten [first, last) (0-basiert) - ein Shard der parallelen Extraktion"""
+    return PDFExtractor(ocr_enabled=ocr_enabled)._extract_layout(pdf_path, page_numbers=range(first, last))
+
+
+def extract_text_range(pdf_path: str, first: int, last: int, ocr_enabled: bool = True) -> str:
+    """Text der Seiten [first, last) (0-basiert) - ein Shard der parallelen Extraktion"""
+    return PDFExtractor(ocr_enabled=ocr_enabled).extract_text(pdf_path, page_numbers=range(first, last))
+
+
+def form_cache_options(ocr_enabled: bool = True, triage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Optionen, die das FormSchema bestimmen (Teil des Cache-Schlüssels)"""
+    return {
+        "ocr_enabled": ocr_enabled,
+        "ocr_lang": PDFExtractor(ocr_enabled=ocr_enabled).ocr_lang if ocr_enabled else None,
+        "kind": triage["kind"] if triage else None,
+        "layout": FORM_LAYOUT_DETECTION
+    }
+
+
+def rebind_form_schema(
+    schema: Dict[str, Any],
+    form_id: str,
+    filename: Optional[str],
+    pdf_path: str
+) -> Dict[str, Any]:
+    """
+    Gecachtes FormSchema (gleicher Inhalt, anderer Upload) auf den neuen Upload umschreiben:
+    Form-ID, Dateiname/Pfad und - falls er aus dem alten Dateinamen stammt - der Titel.
+    """
+    path = Path(pdf_path)
+    display_name = Path(filename).name if filename else path.name
+    source = schema["source"]
+    if schema["title"] == _title_from_filename(source["file"]):
+        schema["title"] = _title_from_filename(display_name)
+    schema["form_id"] = form_id
+    schema["source"] = {**source, "file": display_name, "path": str(path.absolute())}
+    return schema
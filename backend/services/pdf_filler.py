@@ -1,14 +1,48 @@
 """
 PDF Filler Service
-Befüllt PDF-Formulare (AcroForm oder HTML-Template).
+Befüllt PDF-Formulare (AcroForm, Overlay auf flachen PDFs oder HTML-Template).
 """
+import io
 import logging
+from collections import defaultdict
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 import tempfile
 
 logger = logging.getLogger(__name__)
 
+# Overlay-Befüllung (flache PDFs): Schrift für die eingesetzten Werte
+OVERLAY_FONT = "Helvetica"
+OVERLAY_FONT_SIZE = 10.0
+OVERLAY_MIN_FONT_SIZE = 5.0
+OVERLAY_PADDING = 2.0
+CHECKBOX_CHECKED = frozenset({"true", "1", "ja", "yes", "x", "on"})
+
+
+def _pdf_string(value) -> str:
+    """Text eines pdfrw-Strings ohne Escapes/Kodierung - so liefert ihn auch pikepdf (Feld-IDs)"""
+    decode = getattr(value, "to_unicode", None)
+    return decode() if decode else str(value)
+
+
+def _qualified_name(annot) -> str:
+    """Feldname inkl. der Namen aller Eltern-Felder (/Parent-Kette), durch "." getrennt"""
+    names = []
+    node, seen = annot, set()
+    while node is not None and id(node) not in seen:
+        seen.add(id(node))
+        if node.T:
+            names.append(_pdf_string(node.T))
+        node = node.Parent
+    return ".".join(reversed(names))
+
+
+def _checked(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in CHECKBOX_CHECKED
+
+
 class PDFFiller:
     """Befüllt PDF-Formulare mit Daten"""
     
@@ -21,7 +55,7 @@ class PDFFiller:
         dst_path: str, 
         mappings: List[Dict[str, Any]],
         flatten: bool = True
-    ) -> str:
+    ) -> int:
         """
         Befüllt AcroForm-PDF mit Werten.
         
@@ -32,15 +66,16 @@ class PDFFiller:
             flatten: Felder schreibgeschützt machen
             
         Returns:
-            Pfad zur befüllten Datei
+            Anzahl eingesetzter Werte
         """
         try:
-            from pdfrw import PdfReader, PdfWriter, PdfDict, PdfName
+            from pdfrw import PdfReader, PdfWriter, PdfName, PdfString
             
             # PDF laden
             pdf = PdfReader(src_path)
             
-            # Felder sammeln
+            # Felder sammeln - unter dem voll qualifizierten Namen ("eltern.kind", wie
+            # PDFExtractor.extract_acroform_fields) und dem eigenen Namen des Widgets
             fields = {}
             for page in pdf.pages:
                 if not page.Annots:
@@ -48,10 +83,13 @@ class PDFFiller:
                 for annot in page.Annots:
                     if not annot.T:
                         continue
-                    field_name = annot.T[1:-1] if annot.T.startswith('(') else annot.T
-                    fields[field_name] = annot
+                    field_name = _pdf_string(annot.T)
+                    fields[_qualified_name(annot)] = annot
+                    fields.setdefault(field_name, annot)
             
             logger.info(f"Found {len(fields)} fillable fields")
+            if not fields:
+                raise ValueError("PDF enthält keine AcroForm-Felder")
             
             # Mappings anwenden
             filled_count = 0
@@ -72,7 +110,7 @@ class PDFFiller:
                         annot.AS = PdfName.Yes if value else PdfName.Off
                     else:
                         # Text
-                        annot.V = f'({str(value)})'
+                        annot.V = PdfString.encode(str(value))
                     
                     # Appearance zurücksetzen (wichtig für Rendering)
                     annot.AP = None
@@ -89,7 +127,7 @@ class PDFFiller:
             # PDF speichern
             PdfWriter().write(dst_path, pdf)
             
-            return dst_path
+            return filled_count
             
         except ImportError:
             logger.error("pdfrw not installed")
@@ -98,6 +136,99 @@ class PDFFiller:
             logger.error(f"AcroForm filling failed: {e}")
             raise
     
+    def fill_overlay(
+        self,
+        src_path: str,
+        dst_path: str,
+        mappings: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Befüllt flaches PDF (ohne AcroForm) über Koordinaten: die Werte werden mit reportlab auf
+        eine transparente Ebene gezeichnet, die pikepdf über die Originalseiten legt - das
+        Formular der Behörde bleibt unverändert erhalten.
+        
+        Args:
+            src_path: Quell-PDF
+            dst_path: Ziel-PDF
+            mappings: Liste von {field_id, value, page, bbox[, type]} - page 1-basiert, bbox wie
+                      bei der Layout-Erkennung [x0, top, x1, bottom] in Punkten, Ursprung oben links
+            
+        Returns:
+            Anzahl eingesetzter Werte
+        """
+        try:
+            import pikepdf
+            from reportlab.pdfgen import canvas
+        except ImportError:
+            logger.error("pikepdf or reportlab not installed")
+            raise RuntimeError("pikepdf and reportlab required for overlay filling")
+        
+        by_page = defaultdict(list)
+        for mapping in mappings:
+            if mapping.get("value") is None or not mapping.get("page") or not mapping.get("bbox"):
+                continue
+            by_page[int(mapping["page"]) - 1].append(mapping)
+        if not by_page:
+            raise ValueError("Keine Felder mit Position (page, bbox)")
+        
+        with pikepdf.open(src_path) as pdf:
+            pages = [index for index in sorted(by_page) if 0 <= index < len(pdf.pages)]
+            
+            # Eine Ebene pro befüllter Seite, so groß wie deren sichtbare Seite (MediaBox, gedreht)
+            buffer = io.BytesIO()
+            layer = canvas.Canvas(buffer)
+            filled_count = 0
+            for index in pages:
+                page = pdf.pages[index]
+                x0, y0, x1, y1 = (float(value) for value in page.mediabox)
+                width, height = x1 - x0, y1 - y0
+                # pdfplumber verschiebt die Koordinaten um den Ursprung der (gedrehten) MediaBox,
+                # die Ebene beginnt an deren linker unterer Ecke
+                if int(page.obj.get("/Rotate", 0)) % 180 == 90:
+                    width, height, x0, y0 = height, width, y0, x0
+                layer.setPageSize((width, height))
+                layer.translate(-x0, -y0)
+                for mapping in by_page[index]:
+                    filled_count += self._draw_value(layer, mapping, height)
+                layer.showPage()
+            layer.save()
+            
+            with pikepdf.open(io.BytesIO(buffer.getvalue())) as overlay:
+                for index, overlay_page in zip(pages, overlay.pages):
+                    page = pdf.pages[index]
+                    page.add_overlay(overlay_page, pikepdf.Rectangle(page.mediabox))
+                pdf.save(dst_path)
+        
+        logger.info(f"Overlay-filled {filled_count}/{len(mappings)} fields on {len(pages)} pages")
+        return filled_count
+    
+    def _draw_value(self, layer, mapping: Dict[str, Any], page_height: float) -> bool:
+        """Einen Wert in seine bbox zeichnen (Checkbox: "X", sonst Text, bei Bedarf kleiner)"""
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        
+        x0, top, x1, bottom = (float(value) for value in mapping["bbox"])
+        width, height = x1 - x0, bottom - top
+        baseline = page_height - bottom
+        value = mapping["value"]
+        
+        if mapping.get("type") == "checkbox":
+            if not _checked(value):
+                return False
+            size = min(width, height)
+            layer.setFont(OVERLAY_FONT, size)
+            layer.drawCentredString(x0 + width / 2, baseline + size * 0.15, "X")
+            return True
+        
+        text = str(value)
+        size = min(OVERLAY_FONT_SIZE, height * 0.6)
+        available = width - 2 * OVERLAY_PADDING
+        text_width = stringWidth(text, OVERLAY_FONT, size)
+        if text_width > available > 0:
+            size = max(OVERLAY_MIN_FONT_SIZE, size * available / text_width)
+        layer.setFont(OVERLAY_FONT, size)
+        layer.drawString(x0 + OVERLAY_PADDING, baseline + OVERLAY_PADDING, text)
+        return True
+    
     def fill_html_template(
         self,
         template_path: str,
@@ -242,53 +373,70 @@ class PDFFiller:
         fallback_to_simple: bool = True
     ) -> Dict[str, Any]:
         """
-        Intelligentes Befüllen: Versucht AcroForm, fällt zurück auf Simple PDF.
+        Intelligentes Befüllen: Versucht AcroForm, dann Overlay (Felder mit page/bbox aus der
+        Layout-Erkennung), fällt zurück auf Simple PDF.
         
         Returns:
             {
                 "output_path": str,
-                "method": "acroform" | "simple",
+                "method": "acroform" | "overlay" | "simple",
                 "filled_count": int
             }
         """
         try:
             # Versuch 1: AcroForm
-            result_path = self.fill_acroform(src_pdf_path, output_path, mappings)
+            filled_count = self.fill_acroform(src_pdf_path, output_path, mappings)
             
             return {
-                "output_path": result_path,
+                "output_path": output_path,
                 "method": "acroform",
-                "filled_count": len([m for m in mappings if m.get("value") is not None])
+                "filled_count": filled_count
             }
             
         except Exception as e:
             logger.warning(f"AcroForm filling failed: {e}")
-            
-            if not fallback_to_simple:
-                raise
-            
-            # Versuch 2: Simple PDF
-            logger.info("Falling back to simple PDF generation")
-            
-            fields_dict = {
-                m.get("label", m.get("field_id")): m.get("value")
-                for m in mappings
-                if m.get("value") is not None
-            }
-            
-            if not title:
-                title = Path(src_pdf_path).stem.replace('_', ' ').title()
-            
-            result_path = self.create_simple_form_pdf(output_path, title, fields_dict)
-            
-            return {
-                "output_path": result_path,
-                "method": "simple",
-                "filled_count": len(fields_dict)
-            }
+            error = e
+        
+        if any(m.get("bbox") and m.get("page") for m in mappings):
+            try:
+                # Versuch 2: Werte an ihre Position im Original-PDF schreiben
+                filled_count = self.fill_overlay(src_pdf_path, output_path, mappings)
+                
+                return {
+                    "output_path": output_path,
+                    "method": "overlay",
+                    "filled_count": filled_count
+                }
+                
+            except Exception as e:
+                logger.warning(f"Overlay filling failed: {e}")
+                error = e
+        
+        if not fallback_to_simple:
+            raise error
+        
+        # Versuch 3: Simple PDF
+        logger.info("Falling back to simple PDF generation")
+        
+        fields_dict = {
+            m.get("label", m.get("field_id")): m.get("value")
+            for m in mappings
+            if m.get("value") is not None
+        }
+        
+        if not title:
+            title = Path(src_pdf_path).stem.replace('_', ' ').title()
+        
+        result_path = self.create_simple_form_pdf(output_path, title, fields_dict)
+        
+        return {
+            "output_path": result_path,
+            "method": "simple",
+            "filled_count": len(fields_dict)
+        }
 
 
-# Convenience function
+# Convenience function (Top-Level → auch als Job im Prozess-Pool nutzbar)
 def fill_pdf(
     src_path: str,
     dst_path: str,
@@ -0,0 +1,234 @@
+"""
+PDF Triage Service
+Schnelle Vorab-Klassifizierung eines PDFs anhand der Objektstruktur (pikepdf, ohne Layout-
+Analyse): AcroForm, digitaler Text, Scan oder gemischt - plus Seitenzahl, Größe, Verschlüsselung.
+Das Ergebnis wählt die Extraktions-Pipeline, bevor teure Strategien anlaufen.
+"""
+import os
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from services.ocr_engine import get_ocr_engine
+
+try:
+    import pikepdf
+    HAS_PIKEPDF = True
+except ImportError:
+    HAS_PIKEPDF = False
+    logging.warning("pikepdf nicht installiert - PDF-Triage deaktiviert")
+
+logger = logging.getLogger(__name__)
+
+# Textanzeige-Operatoren in Content Streams
+TEXT_OPERATORS = {"Tj", "TJ", "'", '"'}
+
+KIND_ACROFORM = "acroform"
+KIND_DIGITAL = "digital"
+KIND_SCANNED = "scanned"
+KIND_MIXED = "mixed"
+KIND_ENCRYPTED = "encrypted"   # Benutzerpasswort nötig - nicht lesbar
+KIND_UNKNOWN = "unknown"       # Struktur nicht lesbar oder weder Text noch Bilder - volle Kette
+
+# Pipelines für PDFExtractionService.extract_from_pdf
+PIPELINE_TEXT = "text"         # pdfplumber → pdfminer (OCR nur für Seiten ohne Textebene)
+PIPELINE_OCR = "ocr"           # direkt OCR aller Seiten
+PIPELINE_NONE = "none"         # nichts Extrahierbares (Scan ohne OCR, verschlüsselt)
+
+
+class PDFTriage(NamedTuple):
+    kind: str
+    pages: int
+    size_bytes: int
+    encrypted: bool
+    acroform_fields: int
+    sampled_pages: List[int]     # 1-basiert
+    text_pages: List[int]        # davon mit Textebene
+    image_pages: List[int]       # davon mit Bildern (typisch für Scans)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+def _sample_indices(pages: int, sample_size: int) -> List[int]:
+    """Erste, letzte und gleichmäßig verteilte Seiten dazwischen (0-basiert)"""
+    if pages <= sample_size:
+        return list(range(pages))
+    step = (pages - 1) / (sample_size - 1)
+    return sorted({round(i * step) for i in range(sample_size)})
+
+
+def _scan_stream(stream_owner) -> Tuple[int, bool]:
+    """(angezeigte Zeichen in Bytes, enthält Inline-Bilder) eines Content Streams"""
+    chars = 0
+    inline_images = False
+    for instruction in pikepdf.parse_content_stream(stream_owner):
+        if isinstance(instruction, pikepdf.ContentStreamInlineImage):
+            inline_images = True
+            continue
+        if str(instruction.operator) not in TEXT_OPERATORS:
+            continue
+        for operand in instruction.operands:
+            if isinstance(operand, pikepdf.Array):
+                chars += sum(len(bytes(item)) for item in operand if isinstance(item, pikepdf.String))
+            elif isinstance(operand, pikepdf.String):
+                chars += len(bytes(operand))
+    return chars, inline_images
+
+
+def _inspect_xobjects(owner, seen: set) -> Tuple[int, bool]:
+    """(Zeichen, Bilder) der XObjects aus den /Resources von owner - Form-XObjects rekursiv"""
+    resources = owner.get("/Resources")
+    xobjects = resources.get("/XObject") if resources is not None else None
+    if xobjects is None:
+        return 0, False
+
+    chars = 0
+    has_images = False
+    for _, xobject in xobjects.items():
+        subtype = xobject.get("/Subtype")
+        if subtype == "/Image":
+            has_images = True
+        elif subtype == "/Form":
+            # Zyklen (Form zeichnet sich selbst/gegenseitig) und mehrfach genutzte Forms nur einmal
+            if xobject.objgen in seen:
+                continue
+            seen.add(xobject.objgen)
+            form_chars, form_inline_images = _scan_stream(xobject)
+            nested_chars, nested_images = _inspect_xobjects(xobject, seen)
+            chars += form_chars + nested_chars
+            has_images = has_images or form_inline_images or nested_images
+    return chars, has_images
+
+
+def _inspect_page(page) -> Dict[str, Any]:
+    """Text-Zeichen und Bilder einer Seite inkl. verschachtelter Form-XObjects"""
+    chars, has_images = _scan_stream(page)
+    xobject_chars, xobject_images = _inspect_xobjects(page.obj, set())
+    return {"chars": chars + xobject_chars, "images": has_images or xobject_images}
+
+
+def _count_acroform_fields(pdf) -> int:
+    acroform = pdf.Root.get("/AcroForm")
+    if acroform is None:
+        return 0
+    fields = acroform.get("/Fields")
+    return len(fields) if fields is not None else 0
+
+
+class PDFTriageService:
+    """Triage mit LRU-Cache pro Content-Hash (Blobs ändern sich nie)"""
+
+    def __init__(self, sample_pages: int = 5, cache_size: int = 1024):
+        self.sample_pages = sample_pages
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, PDFTriage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def triage(self, pdf_path: Path, sha256: Optional[str] = None) -> Optional[PDFTriage]:
+        """
+        Klassifiziert das PDF; None, wenn pikepdf fehlt (dann volle Extraktionskette).
+        Blockierend - aus async Code über run_in_threadpool aufrufen.
+        """
+        if not HAS_PIKEPDF:
+            return None
+
+        if sha256:
+            with self._lock:
+                cached = self._cache.get(sha256)
+                if cached is not None:
+                    self._cache.move_to_end(sha256)
+                    return cached
+
+        result = self._triage(Path(pdf_path))
+
+        if sha256:
+            with self._lock:
+                self._cache[sha256] = result
+                self._cache.move_to_end(sha256)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def _triage(self, pdf_path: Path) -> PDFTriage:
+        size = pdf_path.stat().st_size
+        try:
+            pdf = pikepdf.open(pdf_path)
+        except pikepdf.PasswordError:
+            return PDFTriage(KIND_ENCRYPTED, 0, size, True, 0, [], [], [])
+        except Exception as e:
+            logger.warning(f"Triage: PDF-Struktur nicht lesbar ({pdf_path.name}): {e}")
+            return PDFTriage(KIND_UNKNOWN, 0, size, False, 0, [], [], [])
+
+        with pdf:
+            pages = len(pdf.pages)
+            acroform_fields = _count_acroform_fields(pdf)
+            min_chars = get_ocr_engine().min_chars
+            sampled, text_pages, image_pages = [], [], []
+            for index in _sample_indices(pages, self.sample_pages):
+                sampled.append(index + 1)
+                try:
+                    info = _inspect_page(pdf.pages[index])
+                except Exception as e:
+                    logger.debug(f"Triage: Seite {index + 1} nicht prüfbar: {e}")
+                    continue
+                if info["chars"] >= min_chars:
+                    text_pages.append(index + 1)
+                if info["images"]:
+                    image_pages.append(index + 1)
+            encrypted = pdf.is_encrypted
+
+        # Leere Seiten (weder Text noch Bild) zählen nicht als Scan - ohne Bildseiten ist ein
+        # Dokument ohne erkannten Text kein Beleg für einen Scan (volle Kette statt PIPELINE_NONE)
+        scan_pages = [page for page in image_pages if page not in text_pages]
+        if acroform_fields:
+            kind = KIND_ACROFORM
+        elif not sampled or not (text_pages or scan_pages):
+            kind = KIND_UNKNOWN
+        elif not text_pages:
+            kind = KIND_SCANNED
+        elif scan_pages:
+            kind = KIND_MIXED
+        else:
+            kind = KIND_DIGITAL
+
+        result = PDFTriage(kind, pages, size, encrypted, acroform_fields, sampled, text_pages, image_pages)
+        logger.info(f"🔎 Triage {pdf_path.name}: {kind}, {pages} Seiten")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"cached": len(self._cache), "cache_size": self.cache_size}
+
+
+def choose_pipeline(triage: Optional[PDFTriage], use_ocr: bool) -> str:
+    """Günstigste Pipeline für PDFExtractionService.extract_from_pdf"""
+    if triage is None or triage.kind == KIND_UNKNOWN:
+        return PIPELINE_TEXT
+    if triage.kind == KIND_ENCRYPTED:
+        return PIPELINE_NONE
+    if triage.kind == KIND_SCANNED:
+        return PIPELINE_OCR if use_ocr else PIPELINE_NONE
+    return PIPELINE_TEXT
+
+
+def needs_ocr(triage: Optional[PDFTriage], use_ocr: bool) -> bool:
+    """Ob mit OCR-Kosten zu rechnen ist (digitale PDFs/Formulare kommen ohne aus)"""
+    if not use_ocr:
+        return False
+    return triage is None or triage.kind in (KIND_SCANNED, KIND_MIXED, KIND_UNKNOWN)
+
+
+# Global Instance
+_triage_service = None
+
+def get_triage_service() -> PDFTriageService:
+    """Singleton PDF Triage (TRIAGE_SAMPLE_PAGES, TRIAGE_CACHE_SIZE)"""
+    global _triage_service
+    if _triage_service is None:
+        _triage_service = PDFTriageService(
+            sample_pages=int(os.getenv("TRIAGE_SAMPLE_PAGES", "5")),
+            cache_size=int(os.getenv("TRIAGE_CACHE_SIZE", "1024"))
+        )
+    return _triage_service
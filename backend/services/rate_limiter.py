@@ -0,0 +1,264 @@
+"""
+Rate Limiter Service
+Token-Bucket pro Client mit O(1) Arbeit pro Request und LRU-begrenztem Speicher.
+Optional in Redis (ein Lua-Script pro Request), damit alle Worker/Replicas ein Budget teilen.
+"""
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Callable
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+    class RedisError(Exception):
+        pass
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_KEYS = 100_000
+
+# Atomarer Token-Bucket in Redis.
+# KEYS[1] = Bucket, ARGV = capacity, refill_rate (Tokens/s), cost, ttl_ms
+# Serverzeit (TIME) statt Client-Uhr - keine Drift zwischen Replicas.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local ttl_ms = tonumber(ARGV[4])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], ttl_ms)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float   # Sekunden bis genug Tokens da sind (0 wenn erlaubt)
+    reset_after: float   # Sekunden bis der Bucket wieder voll ist
+
+
+class TokenBucketLimiter:
+    """
+    Token-Bucket: `capacity` Requests Burst, danach `capacity / window` Requests pro Sekunde.
+
+    Pro Key werden nur zwei Zahlen gehalten (Tokens, letzter Zeitpunkt). Die Keys liegen in
+    einer OrderedDict in LRU-Reihenfolge - über `max_keys` wird der am längsten inaktive
+    Client verworfen. Ein verworfener Client startet wieder mit vollem Bucket; bei
+    ausreichend großem `max_keys` betrifft das nur Clients, deren Bucket ohnehin voll wäre.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        window_seconds: float,
+        max_keys: int = DEFAULT_MAX_KEYS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if capacity <= 0 or window_seconds <= 0:
+            raise ValueError("capacity und window_seconds müssen > 0 sein")
+
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self.refill_rate = capacity / window_seconds  # Tokens pro Sekunde
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: OrderedDict = OrderedDict()  # key → [tokens, letzte Auffüllung], LRU-Reihenfolge
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def hit(self, key: str, cost: float = 1) -> RateLimitResult:
+        """Verbraucht `cost` Tokens für `key`, falls verfügbar"""
+        now = self._clock()
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.capacity), now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill_rate)
+                bucket[1] = now
+
+            tokens = bucket[0]
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+                bucket[0] = tokens
+
+        missing = self.capacity - tokens
+        return RateLimitResult(
+            allowed=allowed,
+            limit=self.capacity,
+            remaining=int(tokens),
+            retry_after=0.0 if allowed else (cost - tokens) / self.refill_rate,
+            reset_after=missing / self.refill_rate
+        )
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def stats(self) -> dict:
+        return {
+            "tracked_keys": len(self._buckets),
+            "max_keys": self.max_keys,
+            "evictions": self.evictions,
+            "capacity": self.capacity,
+            "window_seconds": self.window_seconds,
+        }
+
+
+class RateLimiter:
+    """
+    Async-Fassade für die Middleware.
+
+    Mit Redis-Client teilen sich alle Worker und Replicas einen Bucket pro Key.
+    Ist Redis nicht erreichbar, entscheidet der lokale Token-Bucket (Limit pro Worker)
+    und Redis wird erst nach `fallback_cooldown` Sekunden erneut versucht.
+    """
+
+    def __init__(
+        self,
+        local: TokenBucketLimiter,
+        redis_client=None,
+        prefix: str = "ratelimit:",
+        fallback_cooldown: float = 5.0
+    ):
+        self.local = local
+        self.redis = redis_client
+        self.prefix = prefix
+        self.fallback_cooldown = fallback_cooldown
+        self._script = redis_client.register_script(TOKEN_BUCKET_LUA) if redis_client else None
+        # Keys laufen ab, sobald der Bucket wieder voll wäre - Redis-Speicher begrenzt sich selbst
+        self._ttl_ms = int(math.ceil(local.window_seconds * 1000)) + 1000
+        self._redis_down_until = 0.0
+        self.redis_errors = 0
+        self.fallback_hits = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.local.capacity
+
+    @property
+    def window_seconds(self) -> float:
+        return self.local.window_seconds
+
+    @property
+    def backend(self) -> str:
+        if self._script is None:
+            return "local"
+        return "local-fallback" if time.monotonic() < self._redis_down_until else "redis"
+
+    async def hit(self, key: str, cost: float = 1) -> RateLimitResult:
+        """Verbraucht `cost` Tokens für `key` (eine Redis-Roundtrip, sonst lokal)"""
+        if self._script is not None and time.monotonic() >= self._redis_down_until:
+            try:
+                return await self._hit_redis(key, cost)
+            except (RedisError, OSError) as e:
+                self.redis_errors += 1
+                self._redis_down_until = time.monotonic() + self.fallback_cooldown
+                logger.warning(
+                    f"Redis Rate Limiter nicht erreichbar ({e}) - "
+                    f"lokaler Fallback für {self.fallback_cooldown:.0f}s"
+                )
+
+        if self._script is not None:
+            self.fallback_hits += 1
+        return self.local.hit(key, cost)
+
+    async def _hit_redis(self, key: str, cost: float) -> RateLimitResult:
+        capacity = self.local.capacity
+        rate = self.local.refill_rate
+        allowed, tokens = await self._script(
+            keys=[f"{self.prefix}{key}"],
+            args=[capacity, rate, cost, self._ttl_ms]
+        )
+        tokens = float(tokens)
+        allowed = bool(int(allowed))
+        return RateLimitResult(
+            allowed=allowed,
+            limit=capacity,
+            remaining=int(tokens),
+            retry_after=0.0 if allowed else (cost - tokens) / rate,
+            reset_after=(capacity - tokens) / rate
+        )
+
+    def stats(self) -> dict:
+        return {
+            **self.local.stats(),
+            "backend": self.backend,
+            "redis_errors": self.redis_errors,
+            "fallback_hits": self.fallback_hits,
+        }
+
+    async def close(self) -> None:
+        if self.redis is not None:
+            await self.redis.aclose()
+
+
+def create_rate_limiter() -> RateLimiter:
+    """
+    Limiter aus RATE_LIMIT_REQUESTS / RATE_LIMIT_WINDOW / RATE_LIMIT_MAX_KEYS.
+    RATE_LIMIT_BACKEND=redis nutzt REDIS_URL (lokaler Token-Bucket bleibt als Fallback).
+    """
+    local = TokenBucketLimiter(
+        capacity=int(os.getenv("RATE_LIMIT_REQUESTS", "100")),
+        window_seconds=float(os.getenv("RATE_LIMIT_WINDOW", "60")),
+        max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", str(DEFAULT_MAX_KEYS)))
+    )
+
+    redis_client = None
+    if os.getenv("RATE_LIMIT_BACKEND", "local").lower() == "redis":
+        if not HAS_REDIS:
+            logger.warning("⚠️ RATE_LIMIT_BACKEND=redis, aber redis nicht installiert - lokaler Limiter")
+        else:
+            timeout = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.25"))
+            redis_client = aioredis.from_url(
+                os.getenv("REDIS_URL", "redis://localhost:6379"),
+                socket_timeout=timeout,
+                socket_connect_timeout=timeout
+            )
+
+    limiter = RateLimiter(
+        local,
+        redis_client=redis_client,
+        fallback_cooldown=float(os.getenv("RATE_LIMIT_REDIS_COOLDOWN", "5"))
+    )
+    logger.info(f"✅ Rate Limiter: {limiter.backend} ({local.capacity}/{local.window_seconds:.0f}s)")
+    return limiter
@@ -0,0 +1,162 @@
+"""
+Request Cost Service
+Gewichtete Rate Limits: jede Route (bzw. jeder Request) verbraucht so viele Tokens,
+wie sie ungefähr an CPU/LLM-Budget kostet - OCR, Seitenzahl und max_tokens zählen mit.
+"""
+import re
+import math
+import logging
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple, List, Dict
+
+from fastapi import HTTPException, Request, status
+
+try:
+    import pikepdf
+    HAS_PIKEPDF = True
+except ImportError:
+    HAS_PIKEPDF = False
+
+try:
+    import pdfplumber
+    HAS_PDFPLUMBER = True
+except ImportError:
+    HAS_PDFPLUMBER = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COST = 1
+
+# Zusatzkosten pro PDF-Seite (im Endpoint nachbelastet, sobald die Seitenzahl bekannt ist)
+PAGE_COST = 1
+OCR_PAGE_COST = 4
+
+# LLM: ein Token-Bucket-Token pro angefangene 250 angefragte Antwort-Tokens
+LLM_TOKENS_PER_COST_UNIT = 250
+
+
+class RouteCost(NamedTuple):
+    """Basiskosten einer Route; `flag` = Query-Parameter, der zusätzlich kostet (z.B. OCR)"""
+    name: str
+    method: str
+    pattern: "re.Pattern"
+    cost: float
+    flag: Optional[str] = None
+    flag_cost: float = 0
+    flag_default: bool = False
+
+
+def _route(name: str, method: str, path: str, cost: float, **kwargs) -> RouteCost:
+    # "{param}" → ein Pfadsegment
+    regex = re.sub(r"\{[^/]+\}", "[^/]+", path)
+    return RouteCost(name, method, re.compile(f"^{regex}$"), cost, **kwargs)
+
+
+ROUTE_COSTS: List[RouteCost] = [
+    _route("upload", "POST", "/api/upload", 2),
+    _route("extract", "POST", "/api/extract-data/{id}", 5, flag="use_ocr", flag_cost=15),
+    _route("extract", "POST", "/api/extract-data/{id}/stream", 5, flag="use_ocr", flag_cost=15),
+    _route("analyze", "POST", "/api/analyze", 5),
+    _route("report", "GET", "/api/report/{id}", 3),
+    _route("forms-extract", "POST", "/api/forms/extract", 5,
+           flag="ocr_enabled", flag_cost=15, flag_default=True),
+    # ocr_enabled kommt hier als Form-Feld - vorab mit OCR-Default abrechnen
+    _route("forms-extract", "POST", "/api/forms/extract-and-fill", 8,
+           flag="ocr_enabled", flag_cost=15, flag_default=True),
+    _route("forms-fill", "POST", "/api/forms/fill/{id}", 3),
+    _route("llm", "POST", "/api/llm/invoke", 10),
+    _route("llm", "POST", "/api/llm/chat", 10),
+    _route("llm", "POST", "/api/llm/analyze-nebenkosten", 10),
+]
+
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+class CostPolicy:
+    """Ermittelt die Vorab-Kosten eines Requests aus Methode, Pfad und Query"""
+
+    def __init__(self, routes: List[RouteCost], default_cost: float = DEFAULT_COST):
+        self.routes = routes
+        self.default_cost = default_cost
+
+    def cost_for(self, method: str, path: str, query: Dict[str, str]) -> Tuple[float, str]:
+        """Returns: (Kosten, Policy-Name)"""
+        for route in self.routes:
+            if route.method == method and route.pattern.match(path):
+                cost = route.cost
+                if route.flag:
+                    raw = query.get(route.flag)
+                    enabled = route.flag_default if raw is None else raw.lower() in _TRUE_VALUES
+                    if enabled:
+                        cost += route.flag_cost
+                return cost, route.name
+        return self.default_cost, "default"
+
+
+def pdf_page_count(pdf_path: Path) -> int:
+    """Seitenzahl ohne den Inhalt zu parsen (pikepdf, sonst pdfplumber); 1 wenn unbekannt"""
+    try:
+        if HAS_PIKEPDF:
+            with pikepdf.open(pdf_path) as pdf:
+                return len(pdf.pages)
+        if HAS_PDFPLUMBER:
+            with pdfplumber.open(pdf_path) as pdf:
+                return len(pdf.pages)
+    except Exception as e:
+        logger.debug(f"Seitenzahl nicht ermittelbar für {pdf_path}: {e}")
+    return 1
+
+
+def page_cost(pages: int, ocr: bool) -> float:
+    """Zusatzkosten für ein PDF mit `pages` Seiten (die erste Seite ist in den Basiskosten enthalten)"""
+    return max(pages - 1, 0) * (OCR_PAGE_COST if ocr else PAGE_COST)
+
+
+def llm_cost(max_tokens: int) -> float:
+    return math.ceil(max_tokens / LLM_TOKENS_PER_COST_UNIT)
+
+
+async def charge_request(request: Request, cost: float) -> None:
+    """
+    Belastet das Budget des Clients nachträglich mit `cost` (z.B. pro Seite / pro max_tokens).
+
+    Die Rate-Limit-Middleware legt Limiter und Client-Key im Request-State ab und
+    übernimmt das letzte Ergebnis in die RateLimit-* Header der Antwort.
+
+    Raises:
+        HTTPException 429: Budget reicht für diesen Request nicht
+    """
+    limiter = getattr(request.state, "rate_limiter", None)
+    if limiter is None or cost <= 0:
+        return
+
+    # Ein einzelner Request darf höchstens den vollen Bucket kosten - sonst wäre er nie erlaubt
+    cost = min(cost, limiter.capacity - request.state.rate_limit_cost)
+    if cost <= 0:
+        return
+
+    result = await limiter.hit(request.state.rate_limit_key, cost)
+    request.state.rate_limit_result = result
+    request.state.rate_limit_cost = request.state.rate_limit_cost + cost
+
+    if not result.allowed:
+        retry_after = math.ceil(result.retry_after)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded (Kosten {cost:g}, verfügbar {result.remaining})",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+def rate_limit_headers(result, policy_window: float) -> Dict[str, str]:
+    """RateLimit-* Header (IETF draft-ietf-httpapi-ratelimit-headers)"""
+    return {
+        "RateLimit-Limit": str(result.limit),
+        "RateLimit-Remaining": str(max(result.remaining, 0)),
+        "RateLimit-Reset": str(math.ceil(result.reset_after)),
+        "RateLimit-Policy": f"{result.limit};w={policy_window:g}",
+    }
+
+
+# Global Instance
+COST_POLICY = CostPolicy(ROUTE_COSTS)
@@ -0,0 +1,216 @@
+"""
+Result Cache Service
+Extraktionsergebnisse pro Dokument: In-Process-LRU plus JSON-Einträge auf Disk (geteilt über
+alle Worker, überlebt Neustarts). Schlüssel = SHA-256 des Dokuments + Extraktor-Version +
+Optionen - eine neue Extraktor-Version macht alte Einträge automatisch unerreichbar.
+"""
+import os
+import json
+import uuid
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()) / "nebenkosten-storage" / "result-cache"
+
+
+def cache_key(kind: str, sha256: str, version: str, options: Optional[Dict[str, Any]] = None) -> str:
+    """Stabiler Schlüssel (hex) aus Ergebnis-Art, Dokument-Hash, Extraktor-Version und Optionen"""
+    material = json.dumps(
+        {"kind": kind, "sha256": sha256, "version": version, "options": options or {}},
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Zweistufiger Cache für JSON-serialisierbare Ergebnisse.
+
+    Beide Stufen sind nach Größe (Bytes des JSON) begrenzt und verdrängen LRU-Einträge.
+    Disk-Einträge werden atomar geschrieben (os.replace); verdrängt ein anderer Worker eine
+    Datei, ist das für diesen Worker nur ein Miss. Werte im Speicher sind unveränderlich -
+    get() liefert jeweils eine frische Kopie.
+    """
+
+    def __init__(self, directory: Optional[Path], memory_bytes: int, disk_bytes: int):
+        self.directory = Path(directory) if directory else None
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_total = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_total = 0
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, int] = {
+            "hits_memory": 0, "hits_disk": 0, "misses": 0, "stores": 0,
+            "evictions_memory": 0, "evictions_disk": 0, "errors": 0,
+        }
+
+        if self.directory is not None and self.disk_bytes > 0:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Bestehende Einträge übernehmen (älteste zuerst)
+            existing = sorted(
+                (p for p in self.directory.glob("*.json") if p.is_file()),
+                key=lambda p: p.stat().st_mtime
+            )
+            for path in existing:
+                size = path.stat().st_size
+                self._disk[path.stem] = size
+                self._disk_total += size
+
+    @property
+    def disk_enabled(self) -> bool:
+        return self.directory is not None and self.disk_bytes > 0
+
+    def _path_for(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Blockierend (Disk-I/O) - aus async Code über run_in_threadpool aufrufen"""
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self.metrics["hits_memory"] += 1
+                return json.loads(payload)
+
+        payload = self._read_disk(key)
+        if payload is None:
+            with self._lock:
+                self.metrics["misses"] += 1
+            return None
+
+        with self._lock:
+            self.metrics["hits_disk"] += 1
+            self._remember(key, payload)
+        return json.loads(payload)
+
+    def put(self, key: str, value: Any) -> None:
+        """Speichert value in beiden Stufen; nicht serialisierbare Werte werden übersprungen"""
+        try:
+            payload = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Ergebnis nicht cachebar ({key[:12]}): {e}")
+            with self._lock:
+                self.metrics["errors"] += 1
+            return
+
+        with self._lock:
+            self.metrics["stores"] += 1
+            self._remember(key, payload)
+
+        if self.disk_enabled and len(payload) <= self.disk_bytes:
+            self._write_disk(key, payload)
+
+    def _remember(self, key: str, payload: bytes) -> None:
+        """Speicher-Stufe aktualisieren (Lock muss gehalten werden)"""
+        if len(payload) > self.memory_bytes:
+            return
+        self._memory_total -= len(self._memory.pop(key, b""))
+        self._memory[key] = payload
+        self._memory_total += len(payload)
+        while self._memory_total > self.memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_total -= len(old)
+            self.metrics["evictions_memory"] += 1
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_enabled:
+            return None
+        path = self._path_for(key)
+        try:
+            payload = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self._disk_total -= self._disk.pop(key, 0)
+            return None
+        except OSError as e:
+            logger.warning(f"Cache-Eintrag nicht lesbar ({path.name}): {e}")
+            with self._lock:
+                self.metrics["errors"] += 1
+            return None
+
+        try:
+            os.utime(path)  # LRU-Reihenfolge für den Neustart
+        except OSError:
+            pass
+        with self._lock:
+            if key not in self._disk:
+                self._disk_total += len(payload)
+            self._disk[key] = len(payload)
+            self._disk.move_to_end(key)
+        return payload
+
+    def _write_disk(self, key: str, payload: bytes) -> None:
+        path = self._path_for(key)
+        staged = self.directory / f".{key}.{uuid.uuid4().hex}"
+        try:
+            staged.write_bytes(payload)
+            os.replace(staged, path)
+        except OSError as e:
+            logger.warning(f"Cache-Eintrag nicht schreibbar ({path.name}): {e}")
+            staged.unlink(missing_ok=True)
+            with self._lock:
+                self.metrics["errors"] += 1
+            return
+
+        evicted = []
+        with self._lock:
+            self._disk_total -= self._disk.pop(key, 0)
+            self._disk[key] = len(payload)
+            self._disk_total += len(payload)
+            while self._disk_total > self.disk_bytes and len(self._disk) > 1:
+                old_key, old_size = self._disk.popitem(last=False)
+                self._disk_total -= old_size
+                self.metrics["evictions_disk"] += 1
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            self._path_for(old_key).unlink(missing_ok=True)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._memory_total -= len(self._memory.pop(key, b""))
+            self._disk_total -= self._disk.pop(key, 0)
+        if self.disk_enabled:
+            self._path_for(key).unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.metrics["hits_memory"] + self.metrics["hits_disk"] + self.metrics["misses"]
+            hits = lookups - self.metrics["misses"]
+            return {
+                **self.metrics,
+                "hit_ratio": round(hits / lookups, 3) if lookups else None,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_total,
+                "memory_max_bytes": self.memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_total,
+                "disk_max_bytes": self.disk_bytes if self.disk_enabled else 0,
+            }
+
+
+# Global Instance
+_result_cache = None
+
+def get_result_cache() -> ResultCache:
+    """
+    Singleton Result Cache
+    (RESULT_CACHE_DIR, RESULT_CACHE_MEMORY_MB, RESULT_CACHE_DISK_MB - 0 deaktiviert die Stufe)
+    """
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(
+            directory=Path(os.getenv("RESULT_CACHE_DIR") or DEFAULT_CACHE_DIR),
+            memory_bytes=int(float(os.getenv("RESULT_CACHE_MEMORY_MB", "64")) * 1024 * 1024),
+            disk_bytes=int(float(os.getenv("RESULT_CACHE_DISK_MB", "512")) * 1024 * 1024)
+        )
+    return _result_cache
@@ -0,0 +1,89 @@
+"""
+Security Middleware
+Reine ASGI-Middleware: gewichtetes Rate Limiting + OWASP Security Header in einem Durchlauf.
+Kein BaseHTTPMiddleware - keine Extra-Tasks/Streams pro Request, Streaming bleibt unangetastet.
+"""
+import math
+import logging
+from typing import Dict, List, Tuple
+
+from starlette.datastructures import MutableHeaders, QueryParams
+from starlette.responses import JSONResponse
+
+from services.rate_limiter import RateLimiter
+from services.request_costs import CostPolicy, rate_limit_headers
+
+logger = logging.getLogger(__name__)
+
+SECURITY_HEADERS: Dict[str, str] = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
+}
+HSTS_HEADER = ("Strict-Transport-Security", "max-age=31536000; includeSubDomains")
+
+
+class SecurityMiddleware:
+    """
+    Rate Limiting (Vorab-Kosten aus der CostPolicy) und Security Header.
+
+    Limiter, Client-Key und Ergebnis liegen in scope["state"] (= request.state), damit
+    Endpoints über charge_request() nachbelasten können. Die RateLimit-* Header werden
+    erst bei 'http.response.start' gesetzt und enthalten so auch diese Nachbelastung.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, cost_policy: CostPolicy):
+        self.app = app
+        self.limiter = limiter
+        self.cost_policy = cost_policy
+        self._static_headers: List[Tuple[str, str]] = list(SECURITY_HEADERS.items())
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+
+        query_string = scope.get("query_string", b"")
+        query = QueryParams(query_string) if query_string else {}
+        cost, policy = self.cost_policy.cost_for(scope["method"], scope["path"], query)
+        cost = min(cost, self.limiter.capacity)
+        result = await self.limiter.hit(client_ip, cost)
+
+        state = scope.setdefault("state", {})
+        state["rate_limiter"] = self.limiter
+        state["rate_limit_key"] = client_ip
+        state["rate_limit_cost"] = cost
+        state["rate_limit_result"] = result
+
+        is_https = scope.get("scheme") == "https"
+
+        async def send_with_headers(message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in self._static_headers:
+                    headers[name] = value
+                if is_https:
+                    headers[HSTS_HEADER[0]] = HSTS_HEADER[1]
+                for name, value in rate_limit_headers(
+                    state["rate_limit_result"], self.limiter.window_seconds
+                ).items():
+                    headers[name] = value
+            await send(message)
+
+        if not result.allowed:
+            logger.warning(f"Rate limit exceeded for {client_ip} ({policy}, Kosten {cost:g})")
+            retry_after = math.ceil(result.retry_after)
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded", "retry_after": retry_after},
+                headers={"Retry-After": str(retry_after)}
+            )
+            await response(scope, receive, send_with_headers)
+            return
+
+        await self.app(scope, receive, send_with_headers)
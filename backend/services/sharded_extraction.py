@@ -0,0 +1,147 @@
+"""
+Sharded Extraction Service
+Große PDFs (z.B. 30-80 Seiten WEG-Jahresabrechnungen) in Seitenbereiche aufteilen,
+die Bereiche parallel im Prozess-Pool extrahieren und in Seitenreihenfolge zusammenführen.
+"""
+import os
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.executor import WorkerPools
+from services.pdf_extraction_service import (
+    ExtractedPages, ProgressCallback, extract_page_range, extract_pdf_data
+)
+from services.form_layout_detector import unique_field_ids
+from services.pdf_extractor import extract_form, extract_layout_range, extract_text_range, uses_layout_detection
+from services.pdf_triage import KIND_ACROFORM, KIND_ENCRYPTED, PIPELINE_NONE
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_SHARDING = os.getenv("EXTRACTION_SHARDING", "true").lower() in ("1", "true", "yes")
+# Ab dieser Seitenzahl wird aufgeteilt
+SHARD_MIN_PAGES = int(os.getenv("SHARD_MIN_PAGES", "16"))
+# Mindestgröße eines Bereichs - jeder Shard öffnet das PDF neu
+SHARD_PAGES = int(os.getenv("SHARD_PAGES", "8"))
+
+
+def plan_shards(pages: int, workers: int, min_pages: int = SHARD_PAGES) -> List[Tuple[int, int]]:
+    """
+    Teilt `pages` Seiten in höchstens `workers` gleich große Bereiche [first, last) (0-basiert),
+    keiner kleiner als `min_pages`.
+    """
+    count = max(1, min(workers, pages // max(min_pages, 1)))
+    size, rest = divmod(pages, count)
+    shards = []
+    first = 0
+    for index in range(count):
+        last = first + size + (1 if index < rest else 0)
+        shards.append((first, last))
+        first = last
+    return shards
+
+
+def should_shard(pages: int, workers: int) -> bool:
+    return EXTRACTION_SHARDING and workers > 1 and pages >= SHARD_MIN_PAGES
+
+
+async def _run_shards(
+    executor: WorkerPools,
+    fn: Callable,
+    pdf_path: str,
+    pages: int,
+    progress: Optional[ProgressCallback] = None,
+    **kwargs
+) -> List[Any]:
+    """Führt fn(pdf_path, first, last, **kwargs) je Bereich im CPU-Pool aus; Ergebnisse in Seitenreihenfolge"""
+    shards = plan_shards(pages, executor.cpu.workers)
+    done = 0
+
+    async def run_shard(first: int, last: int) -> Any:
+        nonlocal done
+        result = await executor.run_cpu(fn, pdf_path, first, last, **kwargs)
+        done += last - first
+        if progress:
+            progress(done, pages)
+        return result
+
+    tasks = [asyncio.ensure_future(run_shard(first, last)) for first, last in shards]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        # Ein Bereich fehlgeschlagen/abgebrochen → restliche Bereiche nicht weiterrechnen
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def extract_pdf_data_sharded(
+    executor: WorkerPools,
+    pdf_path: str,
+    pages: int,
+    use_ocr: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    pipeline: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Wie extract_pdf_data, aber Text/Tabellen-Positionen (und OCR von Seiten ohne Textebene) werden pro
+    Seitenbereich parallel extrahiert. Das Parsen läuft danach einmal auf dem Gesamtergebnis.
+    """
+    if pipeline == PIPELINE_NONE:
+        # Triage: nichts Extrahierbares - kein Grund, Seiten zu lesen
+        return await executor.run_cpu(extract_pdf_data, pdf_path, use_ocr=use_ocr, pipeline=pipeline)
+
+    parts: List[ExtractedPages] = await _run_shards(
+        executor, extract_page_range, pdf_path, pages, progress, use_ocr=use_ocr
+    )
+    merged = ExtractedPages(
+        texts=[text for part in parts for text in part.texts],
+        page_positionen=[positionen for part in parts for positionen in part.page_positionen],
+        ocr_pages=tuple(page for part in parts for page in part.ocr_pages)
+    )
+    logger.info(f"📄 {pages} Seiten in {len(parts)} Bereichen extrahiert: {pdf_path}")
+    return await executor.run_cpu(
+        extract_pdf_data, pdf_path, use_ocr=use_ocr, extracted=merged, pipeline=pipeline
+    )
+
+
+async def extract_form_sharded(
+    executor: WorkerPools,
+    pdf_path: str,
+    pages: int,
+    ocr_enabled: bool = True,
+    form_id: Optional[str] = None,
+    filename: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+    triage: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Wie extract_form, aber der Text (inkl. OCR) wird pro Seitenbereich parallel extrahiert - bei
+    flachen PDFs zusammen mit den Layout-Feldern, deren IDs danach über alle Bereiche eindeutig werden.
+    """
+    if triage and triage.get("kind") in (KIND_ACROFORM, KIND_ENCRYPTED):
+        # Formularfelder bzw. kein lesbarer Text - der Seitentext wird nicht gebraucht
+        return await executor.run_cpu(
+            extract_form, pdf_path, ocr_enabled=ocr_enabled, form_id=form_id, filename=filename,
+            triage=triage
+        )
+
+    layout_fields = None
+    if uses_layout_detection(triage):
+        layouts: List[Tuple[List[Dict[str, Any]], str]] = await _run_shards(
+            executor, extract_layout_range, pdf_path, pages, progress, ocr_enabled=ocr_enabled
+        )
+        layout_fields = unique_field_ids([field for fields, _ in layouts for field in fields])
+        parts = [part for _, part in layouts]
+        text = "".join(parts)
+    else:
+        parts = await _run_shards(
+            executor, extract_text_range, pdf_path, pages, progress, ocr_enabled=ocr_enabled
+        )
+        text = "\n\n".join(part for part in parts if part.strip())
+    logger.info(f"📄 {pages} Seiten in {len(parts)} Bereichen extrahiert: {pdf_path}")
+    return await executor.run_cpu(
+        extract_form, pdf_path, ocr_enabled=ocr_enabled, form_id=form_id, filename=filename,
+        text=text, triage=triage, layout_fields=layout_fields
+    )
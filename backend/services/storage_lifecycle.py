@@ -0,0 +1,260 @@
+"""
+Storage Lifecycle Service
+Aufbewahrungsfristen (TTL) pro Datei-Klasse, Disk-Quota mit LRU-Eviction und Hintergrund-Sweeper.
+"""
+import os
+import stat
+import time
+import asyncio
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Any
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # Windows
+    HAS_FCNTL = False
+
+logger = logging.getLogger(__name__)
+
+
+class StorageClass:
+    """Eine Gruppe verwalteter Dateien mit eigener Aufbewahrungsfrist"""
+
+    def __init__(
+        self,
+        name: str,
+        directory: Path,
+        ttl_seconds: float,
+        pattern: str = "*",
+        recursive: bool = False,
+        evict: Optional[Callable[[Path, float], bool]] = None
+    ):
+        self.name = name
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.pattern = pattern
+        self.recursive = recursive
+        # Eigenes Löschen statt path.unlink() (z.B. über den Blob Store):
+        # evict(Pfad, beobachteter letzter Zugriff) → True wenn entfernt
+        self.evict = evict
+
+    def iter_files(self):
+        """Liefert (Pfad, os.stat_result); versteckte Verzeichnisse/Dateien werden übersprungen"""
+        if not self.directory.exists():
+            return
+
+        if self.recursive:
+            for dirpath, dirnames, filenames in os.walk(self.directory):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                for name in filenames:
+                    if name.startswith("."):
+                        continue
+                    path = Path(dirpath) / name
+                    if path.match(self.pattern):
+                        yield from self._with_stat(path)
+        else:
+            for path in self.directory.glob(self.pattern):
+                if not path.name.startswith("."):
+                    yield from self._with_stat(path)
+
+    @staticmethod
+    def _with_stat(path: Path):
+        try:
+            st = path.stat()
+        except OSError:
+            return  # Zwischenzeitlich gelöscht
+        if stat.S_ISREG(st.st_mode):
+            yield path, st
+
+
+def touch(path: Path) -> None:
+    """Markiert einen Zugriff (atime), damit LRU/TTL aktiv genutzte Dateien behalten"""
+    try:
+        st = os.stat(path)
+        os.utime(path, (time.time(), st.st_mtime))
+    except OSError:
+        pass
+
+
+def last_access(stat_result: os.stat_result) -> float:
+    return max(stat_result.st_atime, stat_result.st_mtime)
+
+
+class StorageLifecycleManager:
+    """Räumt abgelaufene Dateien auf und hält die Gesamtgröße unter der Quota"""
+
+    def __init__(
+        self,
+        classes: List[StorageClass],
+        quota_bytes: int,
+        interval_seconds: float = 600,
+        lock_path: Optional[Path] = None,
+        batch_size: int = 200,
+        record_sweeps: Optional[List[Callable[[], int]]] = None
+    ):
+        self.classes = classes
+        # Retention für Metadaten ohne Datei (z.B. abgeschlossene Jobs): () → Anzahl gelöscht
+        self.record_sweeps = record_sweeps or []
+        self.quota_bytes = quota_bytes
+        self.interval_seconds = interval_seconds
+        self.lock_path = lock_path
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+        self.metrics: Dict[str, Any] = {
+            "sweeps": 0,
+            "sweeps_skipped": 0,
+            "files_evicted": 0,
+            "files_evicted_ttl": 0,
+            "files_evicted_quota": 0,
+            "bytes_reclaimed": 0,
+            "records_purged": 0,
+            "managed_files": 0,
+            "managed_bytes": 0,
+            "last_sweep_at": None,
+            "last_sweep_duration_ms": None,
+            "quota_bytes": quota_bytes,
+        }
+
+    def sweep(self) -> Dict[str, Any]:
+        """
+        Ein kompletter Durchlauf (blockierend - im Thread ausführen).
+
+        1. Dateien älter als TTL ihrer Klasse löschen
+        2. Falls Gesamtgröße > Quota: am längsten ungenutzte Dateien löschen
+        3. Metadaten-Retention (record_sweeps)
+
+        Returns:
+            {"evicted": int, "bytes_reclaimed": int}
+        """
+        lock_file = self._acquire_lock()
+        if lock_file is False:
+            # Anderer Worker räumt gerade auf
+            self.metrics["sweeps_skipped"] += 1
+            return {"evicted": 0, "bytes_reclaimed": 0}
+
+        started = time.monotonic()
+        now = time.time()
+        evicted = 0
+        reclaimed = 0
+        survivors = []
+
+        try:
+            for storage_class in self.classes:
+                for path, st in storage_class.iter_files():
+                    if now - last_access(st) > storage_class.ttl_seconds:
+                        if self._evict(storage_class, path, st.st_size, last_access(st), "ttl"):
+                            evicted += 1
+                            reclaimed += st.st_size
+                            self._yield(evicted)
+                    else:
+                        survivors.append((last_access(st), st.st_size, path, storage_class))
+
+            total = sum(size for _, size, _, _ in survivors)
+            if total > self.quota_bytes:
+                survivors.sort(key=lambda entry: entry[0])
+                remaining = []
+                for entry in survivors:
+                    accessed, size, path, storage_class = entry
+                    if total > self.quota_bytes and self._evict(storage_class, path, size, accessed, "quota"):
+                        evicted += 1
+                        reclaimed += size
+                        total -= size
+                        self._yield(evicted)
+                    else:
+                        remaining.append(entry)
+                survivors = remaining
+
+            self.metrics["managed_files"] = len(survivors)
+            self.metrics["managed_bytes"] = sum(size for _, size, _, _ in survivors)
+
+            for record_sweep in self.record_sweeps:
+                try:
+                    self.metrics["records_purged"] += record_sweep()
+                except Exception as e:
+                    logger.warning(f"Metadaten-Retention fehlgeschlagen: {e}")
+        finally:
+            self._release_lock(lock_file)
+
+        self.metrics["sweeps"] += 1
+        self.metrics["last_sweep_at"] = datetime.now().isoformat()
+        self.metrics["last_sweep_duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+        if evicted:
+            logger.info(f"🧹 Storage sweep: {evicted} Dateien entfernt, {reclaimed} bytes freigegeben")
+
+        return {"evicted": evicted, "bytes_reclaimed": reclaimed}
+
+    def _evict(
+        self, storage_class: StorageClass, path: Path, size: int, accessed: float, reason: str
+    ) -> bool:
+        try:
+            if storage_class.evict:
+                if not storage_class.evict(path, accessed):
+                    return False
+            else:
+                path.unlink()
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Eviction fehlgeschlagen für {path}: {e}")
+            return False
+
+        self.metrics["files_evicted"] += 1
+        self.metrics[f"files_evicted_{reason}"] += 1
+        self.metrics["bytes_reclaimed"] += size
+
+        logger.debug(f"Evicted [{storage_class.name}/{reason}] {path.name}")
+        return True
+
+    def _yield(self, evicted: int) -> None:
+        """Niedrige Priorität: nach jedem Batch kurz pausieren, um I/O-Spitzen zu vermeiden"""
+        if evicted % self.batch_size == 0:
+            time.sleep(0.05)
+
+    def _acquire_lock(self):
+        """Nur ein Worker pro Host sweept gleichzeitig (None = kein Lock nötig/möglich)"""
+        if not self.lock_path or not HAS_FCNTL:
+            return None
+        lock_file = open(self.lock_path, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        return lock_file
+
+    @staticmethod
+    def _release_lock(lock_file) -> None:
+        if lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                logger.error(f"Storage sweep fehlgeschlagen: {e}")
+
+    def start(self) -> None:
+        """Startet den Hintergrund-Sweeper (im FastAPI-Startup-Hook aufrufen)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"✅ Storage Lifecycle aktiv (Intervall {self.interval_seconds:.0f}s, "
+                f"Quota {self.quota_bytes // 1024 // 1024}MB)"
+            )
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,84 @@
+"""
+Upload Stream Service
+Schreibt Uploads chunkweise auf Disk und berechnet dabei SHA-256 (kein Full-Read in RAM).
+"""
+import os
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# 1 MB pro Chunk - mehr als ein Chunk liegt nie gleichzeitig im Speicher
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+
+class UploadTooLargeError(Exception):
+    """Upload überschreitet das erlaubte Größenlimit"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File too large. Maximum size: {max_size // 1024 // 1024}MB")
+
+
+async def stream_upload_to_disk(
+    upload,
+    dst_path: Path,
+    max_size: int,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Kopiert ein UploadFile chunkweise nach dst_path.
+
+    - Hash wird inkrementell berechnet
+    - Bricht ab, sobald max_size überschritten ist
+    - Schreibt zuerst in eine Temp-Datei im Zielverzeichnis, dann atomarer Rename
+
+    Args:
+        upload: FastAPI/Starlette UploadFile
+        dst_path: Zielpfad
+        max_size: Maximale Größe in Bytes
+        chunk_size: Chunk-Größe in Bytes
+
+    Returns:
+        {"path": str, "size": int, "sha256": str}
+
+    Raises:
+        UploadTooLargeError: Wenn die Datei größer als max_size ist
+    """
+    dst_path = Path(dst_path)
+    dst_path.parent.mkdir(parents=True, exist_ok=True)
+
+    sha256 = hashlib.sha256()
+    size = 0
+
+    fd, tmp_name = tempfile.mkstemp(dir=dst_path.parent, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(max_size)
+                sha256.update(chunk)
+                f.write(chunk)
+
+        os.replace(tmp_name, dst_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+    logger.info(f"Streamed upload to {dst_path.name}: {size} bytes")
+
+    return {
+        "path": str(dst_path),
+        "size": size,
+        "sha256": sha256.hexdigest()
+    }